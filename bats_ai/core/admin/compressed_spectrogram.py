@@ -4,6 +4,7 @@ from django.contrib import admin
 from django.utils.html import format_html_join
 
 from bats_ai.core.models import CompressedSpectrogram
+from bats_ai.core.models.spectrogram_image import images_prefetch
 
 
 @admin.register(CompressedSpectrogram)
@@ -34,6 +35,10 @@ class CompressedSpectrogramAdmin(admin.ModelAdmin):
         "mask_url_list_display",
     ]
 
+    def get_queryset(self, request):
+        # Load every image type for the listed spectrograms in one query
+        return super().get_queryset(request).prefetch_related(images_prefetch())
+
     @admin.display(description="Image URLs")
     def image_url_list_display(self, obj):
         """Render each image URL as a clickable link in admin detail view."""
@@ -9,6 +9,7 @@ from bats_ai.core.models.nabat import (
     NABatRecordingAnnotation,
     NABatSpectrogram,
 )
+from bats_ai.core.models.spectrogram_image import images_prefetch
 
 
 # Register models for the NaBat category
@@ -45,6 +46,10 @@ class NABatSpectrogramAdmin(admin.ModelAdmin):
     search_fields = ["nabat_recording__name", "duration"]
     list_filter = ["nabat_recording", "duration"]
 
+    def get_queryset(self, request):
+        # Load every image type for the listed spectrograms in one query
+        return super().get_queryset(request).prefetch_related(images_prefetch())
+
     @admin.display(description="Image URLs")
     def image_url_list_display(self, obj):
         """Render each image URL as a clickable link in admin detail view."""
@@ -68,6 +73,10 @@ class NABatCompressedSpectrogramAdmin(admin.ModelAdmin):
     search_fields = ["nabat_recording__name", "spectrograms__id"]
     list_filter = ["nabat_recording", "cache_invalidated"]
 
+    def get_queryset(self, request):
+        # Load every image type for the listed spectrograms in one query
+        return super().get_queryset(request).prefetch_related(images_prefetch())
+
     @admin.display(description="Image URLs")
     def image_url_list_display(self, obj):
         """Render each image URL as a clickable link in admin detail view."""
@@ -4,6 +4,7 @@ from django.contrib import admin
 from django.utils.html import format_html_join
 
 from bats_ai.core.models import Spectrogram
+from bats_ai.core.models.spectrogram_image import images_prefetch
 
 
 @admin.register(Spectrogram)
@@ -33,6 +34,10 @@ class SpectrogramAdmin(admin.ModelAdmin):
         "image_url_list_display",
     ]
 
+    def get_queryset(self, request):
+        # Load every image type for the listed spectrograms in one query
+        return super().get_queryset(request).prefetch_related(images_prefetch())
+
     @admin.display(description="Image URLs")
     def image_url_list_display(self, obj):
         """Show image URLs as clickable links in both detail and list views."""
@@ -3,9 +3,10 @@ from __future__ import annotations
 import logging
 
 from ninja import NinjaAPI
-from oauth2_provider.models import AccessToken
 
 from bats_ai.core import views
+from bats_ai.core.renderers import ORJSONRenderer
+from bats_ai.core.utils.token_auth import authenticate_bearer_token
 from bats_ai.core.views import nabat
 
 logger = logging.getLogger(__name__)
@@ -13,19 +14,15 @@ logger = logging.getLogger(__name__)
 
 def global_auth(request):
     if request.user.is_anonymous:
-        token = request.headers.get("Authorization", "").replace("Bearer ", "")
-        if len(token) > 0:
-            try:
-                access_token = AccessToken.objects.get(token=token)
-            except AccessToken.DoesNotExist:
-                access_token = None
-            if access_token and access_token.user and not access_token.user.is_anonymous:
-                request.user = access_token.user
+        token_user = authenticate_bearer_token(request)
+        if token_user is not None:
+            # Answer from the cached token identity without loading the user or profile
+            return token_user.verified or token_user.is_superuser
     user = request.user
     return (not user.is_anonymous) and (user.profile.verified or user.is_superuser)
 
 
-api = NinjaAPI(auth=global_auth)
+api = NinjaAPI(auth=global_auth, renderer=ORJSONRenderer())
 
 api.add_router("/recording/", views.recording_router)
 api.add_router(
@@ -6,3 +6,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     name = "bats_ai.core"
     verbose_name = "bats-ai: Core"
+
+    def ready(self):
+        # Connect the token cache invalidation signal receivers
+        from bats_ai.core.utils import token_auth  # noqa: F401
@@ -1,3 +1,18 @@
 from __future__ import annotations
 
 DEFAULT_SAMPLE_FRAME_ID = 14
+
+# Slope measurements (kHz/ms) BatBot reports per pulse, stored in `PulseMetadata.slopes`.
+PULSE_SLOPE_KEYS: tuple[str, ...] = (
+    "slope_at_hi_fc_knee_khz_per_ms",
+    "slope_at_fc_khz_per_ms",
+    "slope_at_low_fc_heel_khz_per_ms",
+    "slope_at_peak_khz_per_ms",
+    "slope_avg_khz_per_ms",
+    "slope_hi_avg_khz_per_ms",
+    "slope_mid_avg_khz_per_ms",
+    "slope_lo_avg_khz_per_ms",
+    "slope_box_khz_per_ms",
+    "slope_hi_box_khz_per_ms",
+    "slope_lo_box_khz_per_ms",
+)
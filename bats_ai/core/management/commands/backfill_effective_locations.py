@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from bats_ai.core.models import Recording
+from bats_ai.core.utils.grts_utils import normalize_sample_frame_id
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the effective location and sample frame of recordings, "
+        "e.g. after GRTS cells were reloaded or rows were written without save()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sample-frame",
+            type=int,
+            default=None,
+            help="Only update recordings in this sample frame",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Recordings per UPDATE (by primary key range)",
+        )
+
+    def handle(self, *args, **options):
+        sample_frame_id = options["sample_frame"]
+        if sample_frame_id is not None:
+            sample_frame_id = normalize_sample_frame_id(sample_frame_id)
+        batch_size = options["batch_size"]
+
+        bounds = Recording.objects.aggregate(first=Min("pk"), last=Max("pk"))
+        if bounds["first"] is None:
+            self.stdout.write("No recordings to update")
+            return
+
+        updated = 0
+        # Each batch commits on its own, so a large backfill never holds long locks
+        for start in range(bounds["first"], bounds["last"] + 1, batch_size):
+            updated += Recording.update_effective_locations(
+                sample_frame_id=sample_frame_id,
+                pk_range=(start, start + batch_size - 1),
+            )
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} recording(s)"))
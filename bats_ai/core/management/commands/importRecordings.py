@@ -1,27 +1,47 @@
 from __future__ import annotations
 
-import contextlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import batched, islice
+import json
 import logging
+import multiprocessing
+import os
 from pathlib import Path
 import random
+from typing import TYPE_CHECKING, Any
 
 from django.contrib.auth.models import User
 from django.contrib.gis.geos import Point
-from django.core.files import File
+from django.core.files.storage import default_storage
 from django.core.management.base import BaseCommand
-from django.utils import timezone
+from django.db import transaction
 
 from bats_ai.core.models import Recording, RecordingTag
 from bats_ai.core.tasks.tasks import recording_compute_spectrogram
-from bats_ai.core.utils.guano_utils import extract_guano_metadata
+from bats_ai.core.utils.grts_index import grts_cell_ids_for_points
+from bats_ai.core.utils.recording_import import (
+    compute_spectrogram,
+    init_import_worker,
+    prepare_recording_file,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
 
 logger = logging.getLogger(__name__)
 
 _RANDOM_TAG_POOL = ("foo", "bar", "test", "sample", "data")
+_MANIFEST_NAME = ".import_manifest.jsonl"
+SPECTROGRAM_MODES = ("celery", "local", "inline")
 
 
 class Command(BaseCommand):
-    help = "Import WAV files from a directory, extract GUANO metadata, and create recordings"
+    help = (
+        "Import WAV files from a directory, extract GUANO metadata, and create recordings. "
+        "Imported files are recorded in a manifest, so an interrupted import can be re-run "
+        "to resume it."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -54,6 +74,33 @@ class Command(BaseCommand):
                 + ", ".join(_RANDOM_TAG_POOL)
             ),
         )
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes reading metadata, uploading audio and computing local spectrograms",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Recordings per INSERT",
+        )
+        parser.add_argument(
+            "--spectrograms",
+            choices=SPECTROGRAM_MODES,
+            default="celery",
+            help=(
+                "Queue spectrograms as Celery tasks, compute them in a local process pool, "
+                "or compute them inline after each batch"
+            ),
+        )
+        parser.add_argument(
+            "--manifest",
+            type=str,
+            help=f"File listing the imported files (defaults to {_MANIFEST_NAME} in the directory)",
+        )
 
     def handle(self, *args, **options):  # noqa: C901, PLR0912, PLR0915
         directory_path = Path(options["directory"])
@@ -61,6 +108,8 @@ class Command(BaseCommand):
         is_public = options.get("public", False)
         limit = options.get("limit")
         assign_random_tags = options.get("assign_random_tags", False)
+        workers = max(options["workers"], 1)
+        spectrograms = options["spectrograms"]
 
         # Validate directory
         if not directory_path.exists():
@@ -91,11 +140,7 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING(f"Using default owner: {owner.username}"))
 
         # Find all WAV files
-        wav_files = list(
-            directory_path.rglob(
-                "*.wav",
-            )
-        )
+        wav_files = sorted(directory_path.rglob("*.wav"))
 
         if not wav_files:
             self.stdout.write(
@@ -103,6 +148,22 @@ class Command(BaseCommand):
             )
             return
 
+        # Skip files imported by an earlier run
+        manifest_path = Path(options["manifest"] or directory_path / _MANIFEST_NAME)
+        imported = _read_manifest(manifest_path)
+        if imported:
+            wav_files = [
+                wav_file
+                for wav_file in wav_files
+                if _manifest_key(wav_file, directory_path) not in imported
+            ]
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Skipping {len(imported)} file(s) already imported according to "
+                    f"{manifest_path}"
+                )
+            )
+
         # Apply limit if specified
         total_files = len(wav_files)
         if limit and limit > 0:
@@ -115,110 +176,221 @@ class Command(BaseCommand):
         else:
             self.stdout.write(self.style.SUCCESS(f"Found {len(wav_files)} WAV file(s) to import"))
 
-        # Process each file
+        tags = None
+        if assign_random_tags:
+            tags = {
+                text: RecordingTag.objects.get_or_create(user=owner, text=text)[0]
+                for text in _RANDOM_TAG_POOL
+            }
+
+        # Worker processes are spawned, not forked, so that they do not share this
+        # process's database connections
+        pool_options = {
+            "max_workers": workers,
+            "mp_context": multiprocessing.get_context("spawn"),
+            "initializer": init_import_worker,
+        }
+        upload_pool = ProcessPoolExecutor(**pool_options) if workers > 1 else None
+        spectrogram_pool = ProcessPoolExecutor(**pool_options) if spectrograms == "local" else None
+        spectrogram_futures = {}
+
         successful = 0
         failed = 0
+        try:
+            paths = [str(wav_file) for wav_file in wav_files]
+            if upload_pool is not None:
+                prepared = _prepare_in_windows(upload_pool, paths, options["batch_size"] * workers)
+            else:
+                prepared = map(prepare_recording_file, paths)
 
-        for idx, wav_file in enumerate(wav_files, 1):
-            self.stdout.write(f"\n[{idx}/{len(wav_files)}] Processing: {wav_file.name}")
+            _end_partial_line(manifest_path)
+            with manifest_path.open("a", encoding="utf-8") as manifest:
+                for batch in batched(prepared, options["batch_size"], strict=False):
+                    ready = []
+                    for result in batch:
+                        name = Path(result["path"]).name
+                        if "error" in result:
+                            failed += 1
+                            self.stdout.write(
+                                self.style.ERROR(f"  ✗ Failed to import {name}: {result['error']}")
+                            )
+                            continue
+                        for warning in result["warnings"]:
+                            self.stdout.write(self.style.WARNING(f"  {name}: {warning}"))
+                        ready.append(result)
+                    if not ready:
+                        continue
 
-            try:
-                # Extract GUANO metadata
-                self.stdout.write("  Extracting GUANO metadata...")
-                metadata = extract_guano_metadata(wav_file, check_filename=True)
-
-                # Extract date and time from metadata or file modification time
-                recorded_date = None
-                recorded_time = None
-
-                if metadata.get("nabat_activation_start_time"):
-                    dt = metadata["nabat_activation_start_time"]
-                    recorded_date = dt.date()
-                    recorded_time = dt.time()
-                else:
-                    # Use file modification time as fallback
-                    mtime = timezone.datetime.fromtimestamp(
-                        wav_file.stat().st_mtime, tz=timezone.get_current_timezone()
-                    )
-                    recorded_date = mtime.date()
-                    recorded_time = mtime.time()
-                    self.stdout.write(
-                        self.style.WARNING(
-                            "  No activation start time in metadata, using file modification time"
+                    try:
+                        recordings = self._create_recordings(ready, owner, is_public, tags)
+                    except Exception as e:
+                        failed += len(ready)
+                        self.stdout.write(
+                            self.style.ERROR(
+                                f"  ✗ Failed to create {len(ready)} recording(s): {e!s}"
+                            )
                         )
-                    )
+                        logger.exception("Error creating recordings", exc_info=e)
+                        for result in ready:
+                            default_storage.delete(result["fields"]["audio_file"])
+                        continue
 
-                # Create Point from latitude/longitude if available
-                point = None
-                if metadata.get("nabat_latitude") and metadata.get("nabat_longitude"):
-                    point = Point(metadata["nabat_longitude"], metadata["nabat_latitude"])
-
-                # Get grid cell ID
-                grts_cell_id = None
-                if metadata.get("nabat_grid_cell_grts_id"):
-                    with contextlib.suppress(ValueError, TypeError):
-                        grts_cell_id = int(metadata["nabat_grid_cell_grts_id"])
-
-                # Convert species list to string if present
-                species_list_str = None
-                if metadata.get("nabat_species_list"):
-                    species_list_str = ",".join(metadata["nabat_species_list"])
-                sample_frame_id = metadata.get("nabat_sample_frame_id")
-                # Create recording
-                self.stdout.write("  Creating recording...")
-                with open(wav_file, "rb") as f:
-                    recording = Recording(
-                        name=wav_file.name,
-                        owner=owner,
-                        audio_file=File(f, name=wav_file.name),
-                        recorded_date=recorded_date,
-                        recorded_time=recorded_time,
-                        equipment=None,  # Not in GUANO metadata
-                        grts_cell_id=grts_cell_id,
-                        sample_frame_id=sample_frame_id,
-                        recording_location=point,
-                        public=is_public,
-                        comments=metadata.get("nabat_comments"),
-                        detector=metadata.get("nabat_detector_type"),
-                        software=metadata.get("nabat_software_type"),
-                        site_name=metadata.get("nabat_site_name"),
-                        species_list=species_list_str,
-                        unusual_occurrences=metadata.get("nabat_unusual_occurrences"),
+                    for result, recording in zip(ready, recordings, strict=True):
+                        manifest.write(
+                            json.dumps(
+                                {
+                                    "path": _manifest_key(Path(result["path"]), directory_path),
+                                    "recording_id": recording.pk,
+                                }
+                            )
+                            + "\n"
+                        )
+                    manifest.flush()
+                    os.fsync(manifest.fileno())
+                    successful += len(recordings)
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"[{successful + failed}/{len(wav_files)}] Created "
+                            f"{len(recordings)} recording(s)"
+                        )
                     )
-                    recording.save()
-
-                self.stdout.write(self.style.SUCCESS(f"  Created recording ID: {recording.pk}"))
 
-                if assign_random_tags:
-                    tag_text = random.choice(_RANDOM_TAG_POOL)  # noqa: S311
-                    tag, _ = RecordingTag.objects.get_or_create(user=owner, text=tag_text)
-                    recording.tags.add(tag)
-                    self.stdout.write(self.style.SUCCESS(f"  Assigned random tag: {tag_text}"))
+                    for recording in recordings:
+                        if spectrogram_pool is not None:
+                            future = spectrogram_pool.submit(compute_spectrogram, recording.pk)
+                            spectrogram_futures[future] = recording
+                        elif spectrograms == "celery":
+                            recording_compute_spectrogram.delay(recording.pk)
+                        else:
+                            self._compute_spectrogram(recording)
 
-                # Generate spectrogram synchronously
-                self.stdout.write("  Generating spectrogram...")
+            for future in as_completed(spectrogram_futures):
+                recording = spectrogram_futures[future]
                 try:
-                    result = recording_compute_spectrogram(recording.pk)
+                    future.result()
+                except Exception as e:
                     self.stdout.write(
-                        self.style.SUCCESS(
-                            f"  Spectrogram generated (ID: {result.get('spectrogram_id')})"
+                        self.style.ERROR(
+                            f"  Failed to generate spectrogram for {recording.name}: {e!s}"
                         )
                     )
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"  Failed to generate spectrogram: {e!s}"))
                     logger.exception("Error generating spectrogram", exc_info=e)
-                    raise
-
-                successful += 1
-                self.stdout.write(self.style.SUCCESS(f"  ✓ Successfully imported: {wav_file.name}"))
-
-            except Exception as e:
-                failed += 1
-                self.stdout.write(self.style.ERROR(f"  ✗ Failed to import {wav_file.name}: {e!s}"))
-                logger.exception("Error importing file", exc_info=e)
+        finally:
+            for pool in (upload_pool, spectrogram_pool):
+                if pool is not None:
+                    pool.shutdown(cancel_futures=True)
 
         # Summary
         self.stdout.write("\n" + "=" * 60)
         self.stdout.write(
             self.style.SUCCESS(f"Import complete: {successful} successful, {failed} failed")
         )
+        if spectrograms == "celery" and successful:
+            self.stdout.write(f"Queued {successful} spectrogram task(s)")
+
+    def _create_recordings(self, results, owner, is_public, tags):
+        """Insert the recordings of one batch of prepared files, with their tags."""
+        recordings = []
+        missing_cells = {}
+        for result in results:
+            fields = dict(result["fields"])
+            latitude, longitude = fields.pop("latitude"), fields.pop("longitude")
+            point = Point(longitude, latitude) if latitude is not None else None
+            recording = Recording(
+                **fields,
+                owner=owner,
+                equipment=None,  # Not in GUANO metadata
+                recording_location=point,
+                public=is_public,
+            )
+            if recording.grts_cell_id is None and point is not None:
+                missing_cells.setdefault(recording.sample_frame_id, []).append(recording)
+            recordings.append(recording)
+
+        # One GRTS index lookup per sample frame
+        for sample_frame_id, without_cell in missing_cells.items():
+            cell_ids = grts_cell_ids_for_points(
+                [(r.recording_location.y, r.recording_location.x) for r in without_cell],
+                sample_frame_id,
+            )
+            for recording, cell_id in zip(without_cell, cell_ids, strict=True):
+                recording.grts_cell_id = cell_id
+
+        with transaction.atomic():
+            recordings = Recording.objects.bulk_create(recordings)
+            # `bulk_create` does not call `save`, which sets the effective fields
+            Recording.update_effective_locations(
+                pk_range=(min(r.pk for r in recordings), max(r.pk for r in recordings))
+            )
+            if tags is not None:
+                Recording.tags.through.objects.bulk_create(
+                    Recording.tags.through(
+                        recording=recording,
+                        recordingtag=tags[random.choice(_RANDOM_TAG_POOL)],  # noqa: S311
+                    )
+                    for recording in recordings
+                )
+        return recordings
+
+    def _compute_spectrogram(self, recording):
+        try:
+            result = recording_compute_spectrogram(recording.pk)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"  Spectrogram generated for {recording.name} "
+                    f"(ID: {result.get('spectrogram_id')})"
+                )
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f"  Failed to generate spectrogram for {recording.name}: {e!s}")
+            )
+            logger.exception("Error generating spectrogram", exc_info=e)
+
+
+def _prepare_in_windows(
+    pool: ProcessPoolExecutor, paths: list[str], window: int
+) -> Iterator[dict[str, Any]]:
+    """Yield ``prepare_recording_file`` results in order, with at most ``window`` in flight.
+
+    This bounds how far the uploads run ahead of the inserts, and so the uploads an
+    interrupted import leaves without a recording.
+    """
+    remaining = iter(paths)
+    pending = deque(pool.submit(prepare_recording_file, path) for path in islice(remaining, window))
+    while pending:
+        result = pending.popleft().result()
+        for path in islice(remaining, 1):
+            pending.append(pool.submit(prepare_recording_file, path))
+        yield result
+
+
+def _manifest_key(wav_file: Path, directory_path: Path) -> str:
+    return wav_file.relative_to(directory_path).as_posix()
+
+
+def _end_partial_line(manifest_path: Path) -> None:
+    """End a partial last line left by a killed run, so new entries start on their own line."""
+    if not manifest_path.exists():
+        return
+    with manifest_path.open("rb+") as manifest:
+        if manifest.seek(0, os.SEEK_END) == 0:
+            return
+        manifest.seek(-1, os.SEEK_END)
+        if manifest.read(1) != b"\n":
+            manifest.write(b"\n")
+
+
+def _read_manifest(manifest_path: Path) -> set[str]:
+    """Return the paths, relative to the import directory, listed in the manifest."""
+    if not manifest_path.exists():
+        return set()
+    imported = set()
+    with manifest_path.open(encoding="utf-8") as manifest:
+        for line in manifest:
+            # A run that was killed mid-write may leave a partial last line
+            try:
+                imported.add(json.loads(line)["path"])
+            except (ValueError, KeyError):
+                continue
+    return imported
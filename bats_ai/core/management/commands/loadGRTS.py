@@ -12,7 +12,9 @@ import geopandas as gpd
 import requests
 from tqdm import tqdm  # progress bar
 
-from bats_ai.core.models import GRTSCells
+from bats_ai.core.models import GRTSCells, Recording
+from bats_ai.core.utils.grts_index import invalidate_grts_index
+from bats_ai.core.utils.species_ranges import rebuild_species_range_cells
 
 logger = logging.getLogger(__name__)
 
@@ -88,6 +90,12 @@ class Command(BaseCommand):
             default=5000,
             help="Batch size for database insertion",
         )
+        parser.add_argument(
+            "--range-workers",
+            type=int,
+            default=4,
+            help="Parallel workers for recomputing species range cells",
+        )
         parser.add_argument(
             "--locations",
             nargs="+",
@@ -248,6 +256,14 @@ class Command(BaseCommand):
                 if records_to_create:
                     with transaction.atomic():
                         GRTSCells.objects.bulk_create(records_to_create)
+                GRTSCells.update_derived_geometry(sample_frame_id)
+                # Recordings located by their cell may resolve to a new centroid
+                Recording.update_effective_locations(sample_frame_id=sample_frame_id)
+                rebuild_species_range_cells(
+                    sample_frame_id=sample_frame_id, workers=options["range_workers"]
+                )
+                # Lookups from the in-memory index must see the new cells
+                invalidate_grts_index()
 
                 logger.info(
                     "Finished importing shapefile for sample frame %s: %s new records",
@@ -8,6 +8,10 @@ from django.contrib.gis.geos import GEOSGeometry
 from django.core.management.base import BaseCommand, CommandError
 
 from bats_ai.core.models import Species, SpeciesRange
+from bats_ai.core.utils.species_ranges import (
+    rebuild_species_range_cells,
+    rebuild_species_range_pieces,
+)
 
 DEFAULT_GEOJSON = settings.BASE_DIR / "bats_ai" / "core" / "data" / "species-ranges.geojson"
 
@@ -31,8 +35,14 @@ class Command(BaseCommand):
             action="store_true",
             help="Delete all SpeciesRange rows before loading.",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Parallel workers for recomputing species range cells",
+        )
 
-    def handle(self, *args, **options):  # noqa: C901
+    def handle(self, *args, **options):  # noqa: C901, PLR0915
         path = Path(options["geojson_path"] or DEFAULT_GEOJSON).resolve()
         if not path.is_file():
             raise CommandError(f"GeoJSON file not found: {path}")
@@ -55,6 +65,7 @@ class Command(BaseCommand):
         clear = options["clear"]
 
         matched = 0
+        matched_species_ids: list[int] = []
         skipped_unknown = 0
         errors: list[str] = []
 
@@ -102,6 +113,7 @@ class Command(BaseCommand):
                 },
             )
             matched += 1
+            matched_species_ids.append(species.pk)
 
         self.stdout.write(
             self.style.SUCCESS(
@@ -111,3 +123,11 @@ class Command(BaseCommand):
         )
         for msg in errors:
             self.stdout.write(self.style.ERROR(msg))
+
+        # After --clear, rows of species missing from this file must go as well
+        rebuilt_species_ids = None if clear else matched_species_ids
+        rebuild_species_range_pieces(species_ids=rebuilt_species_ids)
+        created = rebuild_species_range_cells(
+            species_ids=rebuilt_species_ids, workers=options["workers"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Computed {created} species range cell(s)"))
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import Upper
+
+from bats_ai.core.models import Species
+from bats_ai.core.utils.grts_utils import normalize_sample_frame_id
+from bats_ai.core.utils.species_ranges import (
+    rebuild_species_range_cells,
+    rebuild_species_range_pieces,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute which GRTS cells intersect each species range. "
+        "Limit to some species or one sample frame to rebuild incrementally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--species",
+            nargs="+",
+            default=None,
+            help="Species codes to rebuild (default: all species)",
+        )
+        parser.add_argument(
+            "--sample-frame",
+            type=int,
+            default=None,
+            help="Only rebuild cells of this sample frame",
+        )
+        parser.add_argument(
+            "--pieces",
+            action="store_true",
+            help="Also re-subdivide the ranges of the selected species first",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Parallel workers (database connections) for the intersection",
+        )
+
+    def handle(self, *args, **options):
+        species_ids = None
+        if options["species"]:
+            codes = {code.strip().upper() for code in options["species"]}
+            species = dict(
+                Species.objects.annotate(code=Upper("species_code"))
+                .filter(code__in=codes)
+                .values_list("code", "pk")
+            )
+            missing = codes - set(species)
+            if missing:
+                raise CommandError(f"Unknown species code(s): {', '.join(sorted(missing))}")
+            species_ids = list(species.values())
+
+        sample_frame_id = options["sample_frame"]
+        if sample_frame_id is not None:
+            sample_frame_id = normalize_sample_frame_id(sample_frame_id)
+
+        if options["pieces"]:
+            pieces = rebuild_species_range_pieces(species_ids=species_ids)
+            self.stdout.write(self.style.SUCCESS(f"Created {pieces} species range piece(s)"))
+        created = rebuild_species_range_cells(
+            species_ids=species_ids,
+            sample_frame_id=sample_frame_id,
+            workers=options["workers"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Computed {created} species range cell(s)"))
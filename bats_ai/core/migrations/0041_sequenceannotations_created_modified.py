@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from django.db import migrations
+import django.utils.timezone
+import django_extensions.db.fields
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0040_alter_grtscells_id"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="sequenceannotations",
+            options={"get_latest_by": "modified"},
+        ),
+        migrations.AddField(
+            model_name="sequenceannotations",
+            name="created",
+            field=django_extensions.db.fields.CreationDateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now, verbose_name="created"
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="sequenceannotations",
+            name="modified",
+            field=django_extensions.db.fields.ModificationDateTimeField(
+                auto_now=True, verbose_name="modified"
+            ),
+        ),
+    ]
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+# Copy of GRTSCells.update_derived_geometry at the time of this migration
+BACKFILL_DERIVED_GEOMETRY_SQL = """
+UPDATE core_grtscells SET
+    centroid_4326 = COALESCE(centroid_4326, ST_Centroid(geom_4326)),
+    extent_4326 = ST_MakeEnvelope(box.min_x, box.min_y, box.max_x, box.max_y, 4326),
+    centroid_nw_4326 = ST_Centroid(ST_Intersection(
+        geom_4326, ST_MakeEnvelope(box.min_x, box.mid_y, box.mid_x, box.max_y, 4326)
+    )),
+    centroid_ne_4326 = ST_Centroid(ST_Intersection(
+        geom_4326, ST_MakeEnvelope(box.mid_x, box.mid_y, box.max_x, box.max_y, 4326)
+    )),
+    centroid_sw_4326 = ST_Centroid(ST_Intersection(
+        geom_4326, ST_MakeEnvelope(box.min_x, box.min_y, box.mid_x, box.mid_y, 4326)
+    )),
+    centroid_se_4326 = ST_Centroid(ST_Intersection(
+        geom_4326, ST_MakeEnvelope(box.mid_x, box.min_y, box.max_x, box.mid_y, 4326)
+    ))
+FROM (
+    SELECT
+        id AS cell_pk,
+        ST_XMin(geom_4326) AS min_x,
+        ST_YMin(geom_4326) AS min_y,
+        ST_XMax(geom_4326) AS max_x,
+        ST_YMax(geom_4326) AS max_y,
+        (ST_XMin(geom_4326) + ST_XMax(geom_4326)) / 2 AS mid_x,
+        (ST_YMin(geom_4326) + ST_YMax(geom_4326)) / 2 AS mid_y
+    FROM core_grtscells
+) AS box
+WHERE core_grtscells.id = box.cell_pk AND core_grtscells.extent_4326 IS NULL
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0041_sequenceannotations_created_modified"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="grtscells",
+            name="centroid_ne_4326",
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name="grtscells",
+            name="centroid_nw_4326",
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name="grtscells",
+            name="centroid_se_4326",
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name="grtscells",
+            name="centroid_sw_4326",
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name="grtscells",
+            name="extent_4326",
+            field=django.contrib.gis.db.models.fields.PolygonField(
+                blank=True, null=True, srid=4326
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="grtscells",
+            index=models.Index(
+                fields=["grts_cell_id", "sample_frame_id"], name="core_grtsce_grts_ce_63a8cb_idx"
+            ),
+        ),
+        migrations.RunSQL(BACKFILL_DERIVED_GEOMETRY_SQL, migrations.RunSQL.noop),
+    ]
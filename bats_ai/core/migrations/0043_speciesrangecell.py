@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Copy of bats_ai.core.utils.species_ranges at the time of this migration
+POPULATE_SPECIES_RANGE_CELLS_SQL = """
+INSERT INTO core_speciesrangecell (species_id, sample_frame_id, grts_cell_id)
+SELECT DISTINCT species_range.species_id, cell.sample_frame_id, cell.grts_cell_id
+FROM core_grtscells AS cell
+JOIN core_speciesrange AS species_range ON ST_Intersects(species_range.geom, cell.geom_4326)
+WHERE cell.sample_frame_id IS NOT NULL
+ON CONFLICT DO NOTHING
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0042_grtscells_derived_geometry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SpeciesRangeCell",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("sample_frame_id", models.IntegerField()),
+                ("grts_cell_id", models.IntegerField()),
+                (
+                    "species",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="range_cells",
+                        to="core.species",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("sample_frame_id", "grts_cell_id", "species"),
+                        name="unique_species_range_cell",
+                    )
+                ],
+            },
+        ),
+        migrations.RunSQL(POPULATE_SPECIES_RANGE_CELLS_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Copy of bats_ai.core.utils.species_ranges at the time of this migration
+POPULATE_SQL = """
+INSERT INTO core_speciesrangepiece (species_id, geom)
+SELECT species_id, ST_Subdivide(ST_MakeValid(geom), 256)
+FROM core_speciesrange;
+
+UPDATE core_speciesrange SET
+    geom_simplified_0001 = ST_SimplifyPreserveTopology(geom, 0.001),
+    geom_simplified_001 = ST_SimplifyPreserveTopology(geom, 0.01),
+    geom_simplified_01 = ST_SimplifyPreserveTopology(geom, 0.1);
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0043_speciesrangecell"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="speciesrange",
+            name="geom_simplified_0001",
+            field=django.contrib.gis.db.models.fields.GeometryField(
+                blank=True, null=True, srid=4326
+            ),
+        ),
+        migrations.AddField(
+            model_name="speciesrange",
+            name="geom_simplified_001",
+            field=django.contrib.gis.db.models.fields.GeometryField(
+                blank=True, null=True, srid=4326
+            ),
+        ),
+        migrations.AddField(
+            model_name="speciesrange",
+            name="geom_simplified_01",
+            field=django.contrib.gis.db.models.fields.GeometryField(
+                blank=True, null=True, srid=4326
+            ),
+        ),
+        migrations.CreateModel(
+            name="SpeciesRangePiece",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("geom", django.contrib.gis.db.models.fields.GeometryField(srid=4326)),
+                (
+                    "species",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="range_pieces",
+                        to="core.species",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunSQL(POPULATE_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+# Copy of bats_ai.core.models.recording._EFFECTIVE_LOCATION_SQL at the time of this migration
+BACKFILL_SQL = """
+UPDATE core_recording SET
+    effective_sample_frame_id = frame.sample_frame_id,
+    effective_location = COALESCE(core_recording.recording_location, (
+        SELECT cell.centroid_4326
+        FROM core_grtscells AS cell
+        WHERE cell.grts_cell_id = core_recording.grts_cell_id
+            AND cell.sample_frame_id = frame.sample_frame_id
+            AND cell.centroid_4326 IS NOT NULL
+        ORDER BY cell.id
+        LIMIT 1
+    ))
+FROM (
+    SELECT
+        id AS recording_pk,
+        CASE
+            WHEN sample_frame_id IS NULL THEN 14
+            WHEN sample_frame_id = 19 THEN 20
+            ELSE sample_frame_id
+        END AS sample_frame_id
+    FROM core_recording
+) AS frame
+WHERE core_recording.id = frame.recording_pk
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0044_speciesrangepiece_simplified_geometry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recording",
+            name="effective_sample_frame_id",
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="recording",
+            name="effective_location",
+            field=django.contrib.gis.db.models.fields.GeometryField(
+                blank=True, null=True, srid=4326
+            ),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0045_recording_effective_location"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnnotationTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "annotation_type",
+                    models.CharField(
+                        choices=[
+                            ("pulse", "Pulse"),
+                            ("sequence", "Sequence"),
+                            ("recording", "Recording"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("annotation_id", models.BigIntegerField()),
+                ("recording_id", models.BigIntegerField()),
+                ("owner_id", models.IntegerField()),
+                (
+                    "deleted",
+                    models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ExportWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("key", models.CharField(max_length=64, unique=True)),
+                ("watermark", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="annotations",
+            index=models.Index(fields=["modified"], name="core_annota_modifie_3d5aec_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="sequenceannotations",
+            index=models.Index(fields=["modified"], name="core_sequen_modifie_d5fb86_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="recordingannotation",
+            index=models.Index(fields=["modified"], name="core_record_modifie_75184b_idx"),
+        ),
+    ]
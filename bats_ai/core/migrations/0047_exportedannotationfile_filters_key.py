@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0046_annotationtombstone_exportwatermark"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportedannotationfile",
+            name="filters_key",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="exportedannotationfile",
+            name="data_version",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name="exportedannotationfile",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("status", "pending"), models.Q(("filters_key", ""), _negated=True)
+                ),
+                fields=("filters_key", "data_version"),
+                name="unique_pending_export",
+            ),
+        ),
+    ]
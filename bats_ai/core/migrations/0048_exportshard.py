@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_extensions.db.fields
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0047_exportedannotationfile_filters_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "created",
+                    django_extensions.db.fields.CreationDateTimeField(
+                        auto_now_add=True, verbose_name="created"
+                    ),
+                ),
+                (
+                    "modified",
+                    django_extensions.db.fields.ModificationDateTimeField(
+                        auto_now=True, verbose_name="modified"
+                    ),
+                ),
+                ("index", models.PositiveIntegerField()),
+                ("first_recording_id", models.BigIntegerField(null=True)),
+                ("last_recording_id", models.BigIntegerField(null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("complete", "Complete"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                ("file", models.FileField(blank=True, upload_to="exports/shards/")),
+                ("row_counts", models.JSONField(default=dict)),
+                (
+                    "export",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shards",
+                        to="core.exportedannotationfile",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["export", "index"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("export", "index"), name="unique_export_shard_index"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0048_exportshard"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportedannotationfile",
+            name="rows_exported",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="exportedannotationfile",
+            name="rows_total",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="exportedannotationfile",
+            name="cancel_requested",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name="exportedannotationfile",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("complete", "Complete"),
+                    ("failed", "Failed"),
+                    ("cancelled", "Cancelled"),
+                ],
+                default="pending",
+                max_length=32,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="exportshard",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("running", "Running"),
+                    ("complete", "Complete"),
+                    ("failed", "Failed"),
+                    ("cancelled", "Cancelled"),
+                ],
+                default="pending",
+                max_length=16,
+            ),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+# Tombstones are written by statement-level triggers, with one INSERT per DELETE
+# statement, so cascading deletes of recordings and users stay set-based.
+CREATE_TRIGGERS_SQL = """
+CREATE FUNCTION core_record_annotation_tombstones() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO core_annotationtombstone
+        (annotation_type, annotation_id, recording_id, owner_id, deleted)
+    SELECT TG_ARGV[0], deleted_rows.id, deleted_rows.recording_id, deleted_rows.owner_id, now()
+    FROM deleted_rows;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_annotations_tombstones
+AFTER DELETE ON core_annotations
+REFERENCING OLD TABLE AS deleted_rows
+FOR EACH STATEMENT EXECUTE FUNCTION core_record_annotation_tombstones('pulse');
+
+CREATE TRIGGER core_sequenceannotations_tombstones
+AFTER DELETE ON core_sequenceannotations
+REFERENCING OLD TABLE AS deleted_rows
+FOR EACH STATEMENT EXECUTE FUNCTION core_record_annotation_tombstones('sequence');
+
+CREATE TRIGGER core_recordingannotation_tombstones
+AFTER DELETE ON core_recordingannotation
+REFERENCING OLD TABLE AS deleted_rows
+FOR EACH STATEMENT EXECUTE FUNCTION core_record_annotation_tombstones('recording');
+"""
+
+DROP_TRIGGERS_SQL = """
+DROP TRIGGER core_annotations_tombstones ON core_annotations;
+DROP TRIGGER core_sequenceannotations_tombstones ON core_sequenceannotations;
+DROP TRIGGER core_recordingannotation_tombstones ON core_recordingannotation;
+DROP FUNCTION core_record_annotation_tombstones();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0050_recording_vetting_location"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGERS_SQL, reverse_sql=DROP_TRIGGERS_SQL),
+    ]
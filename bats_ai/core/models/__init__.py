@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+from .annotation_tombstone import AnnotationTombstone
 from .annotations import Annotations
 from .compressed_spectrogram import CompressedSpectrogram
 from .configuration import Configuration
-from .exported_file import ExportedAnnotationFile
+from .exported_file import ExportedAnnotationFile, ExportShard, ExportWatermark
 from .grts_cells import GRTSCells
 from .processing_task import ProcessingTask, ProcessingTaskType
 from .pulse_metadata import PulseMetadata
@@ -12,16 +13,19 @@ from .recording_annotation import RecordingAnnotation
 from .recording_annotation_status import RecordingAnnotationStatus
 from .sequence_annotations import SequenceAnnotations
 from .species import Species
-from .species_range import SpeciesRange
+from .species_range import SpeciesRange, SpeciesRangeCell, SpeciesRangePiece
 from .spectrogram import Spectrogram
 from .spectrogram_image import SpectrogramImage
 from .user_profile import UserProfile
 from .vetting_details import VettingDetails
 
 __all__ = [
+    "AnnotationTombstone",
     "Annotations",
     "CompressedSpectrogram",
     "Configuration",
+    "ExportShard",
+    "ExportWatermark",
     "ExportedAnnotationFile",
     "GRTSCells",
     "ProcessingTask",
@@ -34,6 +38,8 @@ __all__ = [
     "SequenceAnnotations",
     "Species",
     "SpeciesRange",
+    "SpeciesRangeCell",
+    "SpeciesRangePiece",
     "Spectrogram",
     "SpectrogramImage",
     "UserProfile",
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from django.db import models
+from django.utils import timezone
+
+
+class AnnotationTombstone(models.Model):
+    """Record of a deleted annotation, so incremental exports can report deletions.
+
+    Written by database triggers on the annotation tables (migration 0051), which
+    record every row of a DELETE statement at once, including cascading deletes.
+    """
+
+    class AnnotationType(models.TextChoices):
+        PULSE = "pulse", "Pulse"
+        SEQUENCE = "sequence", "Sequence"
+        RECORDING = "recording", "Recording"
+
+    annotation_type = models.CharField(max_length=16, choices=AnnotationType.choices)
+    annotation_id = models.BigIntegerField()
+    # Plain ids rather than foreign keys: the recording or owner may be deleted too
+    recording_id = models.BigIntegerField()
+    owner_id = models.IntegerField()
+    deleted = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"Deleted {self.annotation_type} annotation {self.annotation_id}"
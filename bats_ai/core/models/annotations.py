@@ -29,5 +29,9 @@ class Annotations(TimeStampedModel, models.Model):
         help_text="A confidence value between 0 and 1.0, default is 1.0.",
     )
 
+    class Meta(TimeStampedModel.Meta):
+        # Incremental exports select rows modified after a watermark
+        indexes = [models.Index(fields=["modified"])]
+
     def __str__(self):
         return f"Annotation {self.pk} (recording={self.recording_id}, owner={self.owner_id})"
@@ -15,15 +15,98 @@ class ExportedAnnotationFile(TimeStampedModel):
     expires_at = models.DateTimeField()
     status = models.CharField(
         max_length=32,
-        choices=[("pending", "Pending"), ("complete", "Complete"), ("failed", "Failed")],
+        choices=[
+            ("pending", "Pending"),
+            ("complete", "Complete"),
+            ("failed", "Failed"),
+            ("cancelled", "Cancelled"),
+        ],
         default="pending",
     )
+    # Progress of the export task; see `bats_ai.core.utils.export_progress`
+    rows_exported = models.BigIntegerField(default=0)
+    rows_total = models.BigIntegerField(null=True, blank=True)
+    cancel_requested = models.BooleanField(default=False)
+    # Identify identical export requests; see `bats_ai.core.utils.export_reuse`
+    filters_key = models.CharField(max_length=64, blank=True, db_index=True)
+    data_version = models.CharField(max_length=64, blank=True)
 
     class Meta:
         ordering = ["-created"]
+        constraints = [
+            # At most one in-flight export per identical request
+            models.UniqueConstraint(
+                fields=["filters_key", "data_version"],
+                condition=models.Q(status="pending") & ~models.Q(filters_key=""),
+                name="unique_pending_export",
+            )
+        ]
+
+    @property
+    def percent_complete(self) -> float | None:
+        if self.status == "complete":
+            return 100.0
+        if not self.rows_total:
+            return None
+        return min(100.0, 100 * self.rows_exported / self.rows_total)
+
+
+class ExportWatermark(models.Model):
+    """Point in time up to which an incremental export has delivered changes.
+
+    Kept apart from ``ExportedAnnotationFile`` so it outlives expired export files.
+    """
+
+    # Hash of the export type, format, annotation types and filters; see `export_watermark_key`
+    key = models.CharField(max_length=64, unique=True)
+    watermark = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key}: {self.watermark.isoformat()}"
+
+
+class ExportShard(TimeStampedModel):
+    """One recording ID range of a sharded export, written by its own task.
+
+    ``file`` holds the shard's part of the export until it is stitched into the export's
+    file; see `bats_ai.core.tasks.sharded_export_task`.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETE = "complete", "Complete"
+        FAILED = "failed", "Failed"
+        CANCELLED = "cancelled", "Cancelled"
+
+    export = models.ForeignKey(
+        ExportedAnnotationFile, on_delete=models.CASCADE, related_name="shards"
+    )
+    index = models.PositiveIntegerField()
+    # Inclusive range of recording IDs; both unset for an export of no recordings
+    first_recording_id = models.BigIntegerField(null=True)
+    last_recording_id = models.BigIntegerField(null=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    file = models.FileField(upload_to="exports/shards/", blank=True)
+    row_counts = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ["export", "index"]
+        constraints = [
+            models.UniqueConstraint(fields=["export", "index"], name="unique_export_shard_index")
+        ]
+
+    def __str__(self):
+        return f"{self.export_id}/{self.index}"
 
 
 @receiver(models.signals.pre_delete, sender=ExportedAnnotationFile)
 def delete_content(sender, instance, **kwargs):
     if instance.file:
         instance.file.delete(save=False)
+
+
+@receiver(models.signals.pre_delete, sender=ExportShard)
+def delete_shard_content(sender, instance, **kwargs):
+    if instance.file:
+        instance.file.delete(save=False)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from django.contrib.gis.db import models
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
 
 sample_frame_map = {
     12: "Mexico",
@@ -26,6 +28,18 @@ class GRTSCells(models.Model):
     geom_4326 = models.GeometryField()
     # Precomputed centroid of `geom_4326` for faster lookup of cell centers.
     centroid_4326 = models.PointField(srid=4326, blank=True, null=True)
+    # Precomputed bounding box of `geom_4326`, and the centroids of the parts of the cell in
+    # each quadrant of that box; see `update_derived_geometry`.
+    extent_4326 = models.PolygonField(srid=4326, blank=True, null=True)
+    centroid_nw_4326 = models.PointField(srid=4326, blank=True, null=True)
+    centroid_ne_4326 = models.PointField(srid=4326, blank=True, null=True)
+    centroid_sw_4326 = models.PointField(srid=4326, blank=True, null=True)
+    centroid_se_4326 = models.PointField(srid=4326, blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["grts_cell_id", "sample_frame_id"]),
+        ]
 
     @property
     def sample_frame_mapping(self):
@@ -34,3 +48,61 @@ class GRTSCells(models.Model):
     @staticmethod
     def sort_order():
         return [14, 20, 15, 24, 21, 19, 12, 22, 23, 25, 26]
+
+    @staticmethod
+    def sort_order_case() -> Case:
+        """Return a ``Case`` ranking ``sample_frame_id`` by ``sort_order`` (unknown frames last)."""
+        order = GRTSCells.sort_order()
+        return Case(
+            *(When(sample_frame_id=frame, then=Value(rank)) for rank, frame in enumerate(order)),
+            default=Value(len(order)),
+            output_field=IntegerField(),
+        )
+
+    @staticmethod
+    def update_derived_geometry(sample_frame_id: int | None = None) -> int:
+        """Compute ``centroid_4326``, ``extent_4326`` and the quadrant centroids in SQL.
+
+        Only rows without an extent are updated, optionally limited to one sample frame.
+        Return the number of updated rows.
+        """
+        sql = _DERIVED_GEOMETRY_SQL
+        params: list[int] = []
+        if sample_frame_id is not None:
+            sql += " AND core_grtscells.sample_frame_id = %s"
+            params.append(sample_frame_id)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+
+# Quadrants split the cell's bounding box at its midpoints
+_DERIVED_GEOMETRY_SQL = """
+UPDATE core_grtscells SET
+    centroid_4326 = COALESCE(centroid_4326, ST_Centroid(geom_4326)),
+    extent_4326 = ST_MakeEnvelope(box.min_x, box.min_y, box.max_x, box.max_y, 4326),
+    centroid_nw_4326 = ST_Centroid(ST_Intersection(
+        geom_4326, ST_MakeEnvelope(box.min_x, box.mid_y, box.mid_x, box.max_y, 4326)
+    )),
+    centroid_ne_4326 = ST_Centroid(ST_Intersection(
+        geom_4326, ST_MakeEnvelope(box.mid_x, box.mid_y, box.max_x, box.max_y, 4326)
+    )),
+    centroid_sw_4326 = ST_Centroid(ST_Intersection(
+        geom_4326, ST_MakeEnvelope(box.min_x, box.min_y, box.mid_x, box.mid_y, 4326)
+    )),
+    centroid_se_4326 = ST_Centroid(ST_Intersection(
+        geom_4326, ST_MakeEnvelope(box.mid_x, box.min_y, box.max_x, box.mid_y, 4326)
+    ))
+FROM (
+    SELECT
+        id AS cell_pk,
+        ST_XMin(geom_4326) AS min_x,
+        ST_YMin(geom_4326) AS min_y,
+        ST_XMax(geom_4326) AS max_x,
+        ST_YMax(geom_4326) AS max_y,
+        (ST_XMin(geom_4326) + ST_XMax(geom_4326)) / 2 AS mid_x,
+        (ST_YMin(geom_4326) + ST_YMax(geom_4326)) / 2 AS mid_y
+    FROM core_grtscells
+) AS box
+WHERE core_grtscells.id = box.cell_pk AND core_grtscells.extent_4326 IS NULL
+"""
@@ -2,18 +2,18 @@ from __future__ import annotations
 
 from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.postgres.fields import ArrayField
-from django.core.files.storage import default_storage
 from django.db import models
 from django_extensions.db.models import TimeStampedModel
 
 from bats_ai.core.models import SpectrogramImage
+from bats_ai.core.models.spectrogram_image import SpectrogramImagesMixin
 
 from .nabat_recording import NABatRecording
 from .nabat_spectrogram import NABatSpectrogram
 
 
 # TimeStampedModel also provides "created" and "modified" fields
-class NABatCompressedSpectrogram(TimeStampedModel, models.Model):
+class NABatCompressedSpectrogram(SpectrogramImagesMixin, TimeStampedModel, models.Model):
     nabat_recording = models.ForeignKey(
         NABatRecording, on_delete=models.CASCADE, related_name="compressed_spectrograms"
     )
@@ -35,17 +35,14 @@ class NABatCompressedSpectrogram(TimeStampedModel, models.Model):
     @property
     def image_url_list(self):
         """Ordered list of image URLs for this spectrogram."""
-        images = self.images.filter(type="compressed").order_by("index")
-        return [default_storage.url(img.image_file.name) for img in images]
+        return self.image_urls("compressed")
 
     @property
     def mask_url_list(self):
         """Ordered list of mask image URLs for this spectrogram."""
-        images = self.images.filter(type="masks").order_by("index")
-        return [default_storage.url(img.image_file.name) for img in images]
+        return self.image_urls("masks")
 
     @property
     def waveplot_url_list(self):
         """Ordered list of waveplot image URLs for this compressed spectrogram."""
-        images = self.images.filter(type="waveform_compressed").order_by("index")
-        return [default_storage.url(img.image_file.name) for img in images]
+        return self.image_urls("waveform_compressed")
@@ -3,11 +3,11 @@ from __future__ import annotations
 import logging
 
 from django.contrib.contenttypes.fields import GenericRelation
-from django.core.files.storage import default_storage
 from django.db import models
 from django_extensions.db.models import TimeStampedModel
 
 from bats_ai.core.models import SpectrogramImage
+from bats_ai.core.models.spectrogram_image import SpectrogramImagesMixin
 
 from .nabat_recording import NABatRecording
 
@@ -15,7 +15,7 @@ logger = logging.getLogger(__name__)
 
 
 # TimeStampedModel also provides "created" and "modified" fields
-class NABatSpectrogram(TimeStampedModel, models.Model):
+class NABatSpectrogram(SpectrogramImagesMixin, TimeStampedModel, models.Model):
     nabat_recording = models.ForeignKey(
         NABatRecording, on_delete=models.CASCADE, related_name="spectrograms"
     )
@@ -36,5 +36,4 @@ class NABatSpectrogram(TimeStampedModel, models.Model):
     @property
     def image_url_list(self):
         """Ordered list of image URLs for this spectrogram."""
-        images = self.images.filter(type="spectrogram").order_by("index")
-        return [default_storage.url(img.image_file.name) for img in images]
+        return self.image_urls("spectrogram")
@@ -4,9 +4,13 @@ import logging
 
 from django.contrib.auth.models import User
 from django.contrib.gis.db import models
+from django.db import connection
 from django.dispatch import receiver
 from django_extensions.db.models import TimeStampedModel
 
+from bats_ai.core.utils.grts_utils import normalize_sample_frame_id
+
+from .grts_cells import GRTSCells
 from .species import Species
 
 logger = logging.getLogger(__name__)
@@ -50,6 +54,109 @@ class Recording(TimeStampedModel, models.Model):
     )  # species that are detemrined by the owner or from annotations as official species list
     unusual_occurrences = models.TextField(blank=True, null=True)
     tags = models.ManyToManyField(RecordingTag)
+    # Maintained by `save` and `update_effective_locations`: `sample_frame_id` normalized
+    # by `normalize_sample_frame_id`, and the recording's own location or, without one,
+    # the centroid of its GRTS cell. `vetting_location` prefers the centroid instead, as
+    # the map does when vetting is enabled. Map bbox filters match on the location the
+    # map plots.
+    effective_sample_frame_id = models.IntegerField(blank=True, null=True, db_index=True)
+    effective_location = models.GeometryField(srid=4326, blank=True, null=True)
+    vetting_location = models.GeometryField(srid=4326, blank=True, null=True)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.update_effective_fields()
+        elif not _EFFECTIVE_SOURCE_FIELDS.isdisjoint(update_fields):
+            self.update_effective_fields()
+            kwargs["update_fields"] = {*update_fields, *_EFFECTIVE_FIELDS}
+        # Otherwise none of the source fields are saved, so skip the GRTS cell lookup
+        super().save(*args, **kwargs)
+
+    def update_effective_fields(self) -> None:
+        """Set the effective sample frame and locations from the source fields."""
+        self.effective_sample_frame_id = normalize_sample_frame_id(self.sample_frame_id)
+        cell_centroid = None
+        if self.grts_cell_id is not None:
+            cell_centroid = (
+                GRTSCells.objects.filter(
+                    grts_cell_id=self.grts_cell_id,
+                    sample_frame_id=self.effective_sample_frame_id,
+                    centroid_4326__isnull=False,
+                )
+                .order_by("pk")
+                .values_list("centroid_4326", flat=True)
+                .first()
+            )
+        if self.recording_location is not None:
+            self.effective_location = self.recording_location
+        else:
+            self.effective_location = cell_centroid
+        if cell_centroid is not None:
+            self.vetting_location = cell_centroid
+        else:
+            self.vetting_location = self.recording_location
+
+    @staticmethod
+    def update_effective_locations(
+        sample_frame_id: int | None = None,
+        pk_range: tuple[int, int] | None = None,
+    ) -> int:
+        """Recompute the effective fields in SQL, for rows that bypassed ``save``.
+
+        Optionally limit to one (normalized) sample frame and/or an inclusive range of
+        primary keys. Return the number of updated rows.
+        """
+        sql = _EFFECTIVE_LOCATION_SQL
+        params: list[int] = []
+        if sample_frame_id is not None:
+            sql += " AND frame.sample_frame_id = %s"
+            params.append(sample_frame_id)
+        if pk_range is not None:
+            sql += " AND core_recording.id BETWEEN %s AND %s"
+            params.extend(pk_range)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+
+_EFFECTIVE_SOURCE_FIELDS = frozenset({"recording_location", "grts_cell_id", "sample_frame_id"})
+_EFFECTIVE_FIELDS = ("effective_sample_frame_id", "effective_location", "vetting_location")
+
+# Same rules as `Recording.update_effective_fields`
+_EFFECTIVE_LOCATION_SQL = """
+UPDATE core_recording SET
+    effective_sample_frame_id = frame.sample_frame_id,
+    effective_location = COALESCE(core_recording.recording_location, (
+        SELECT cell.centroid_4326
+        FROM core_grtscells AS cell
+        WHERE cell.grts_cell_id = core_recording.grts_cell_id
+            AND cell.sample_frame_id = frame.sample_frame_id
+            AND cell.centroid_4326 IS NOT NULL
+        ORDER BY cell.id
+        LIMIT 1
+    )),
+    vetting_location = COALESCE((
+        SELECT cell.centroid_4326
+        FROM core_grtscells AS cell
+        WHERE cell.grts_cell_id = core_recording.grts_cell_id
+            AND cell.sample_frame_id = frame.sample_frame_id
+            AND cell.centroid_4326 IS NOT NULL
+        ORDER BY cell.id
+        LIMIT 1
+    ), core_recording.recording_location)
+FROM (
+    SELECT
+        id AS recording_pk,
+        CASE
+            WHEN sample_frame_id IS NULL THEN 14
+            WHEN sample_frame_id = 19 THEN 20
+            ELSE sample_frame_id
+        END AS sample_frame_id
+    FROM core_recording
+) AS frame
+WHERE core_recording.id = frame.recording_pk
+"""
 
 
 @receiver(models.signals.pre_delete, sender=Recording)
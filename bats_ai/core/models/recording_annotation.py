@@ -49,6 +49,10 @@ class RecordingAnnotation(TimeStampedModel, models.Model):
     )
     submitted = models.BooleanField(default=False)
 
+    class Meta(TimeStampedModel.Meta):
+        # Incremental exports select rows modified after a watermark
+        indexes = [models.Index(fields=["modified"])]
+
     def __str__(self):
         return (
             f"RecordingAnnotation {self.pk} (recording={self.recording_id}, owner={self.owner_id})"
@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from django.contrib.auth.models import User
 from django.db import models
+from django_extensions.db.models import TimeStampedModel
 
 from .recording import Recording
 from .species import Species
 
 
-class SequenceAnnotations(models.Model):
+# TimeStampedModel also provides "created" and "modified" fields
+class SequenceAnnotations(TimeStampedModel, models.Model):
     recording = models.ForeignKey(Recording, on_delete=models.CASCADE)
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
     start_time = models.FloatField(blank=True, null=True)
@@ -16,6 +18,10 @@ class SequenceAnnotations(models.Model):
     comments = models.TextField(blank=True, null=True)
     species = models.ManyToManyField(Species)
 
+    class Meta(TimeStampedModel.Meta):
+        # Incremental exports select rows modified after a watermark
+        indexes = [models.Index(fields=["modified"])]
+
     def __str__(self):
         return (
             f"SequenceAnnotation {self.pk} (recording={self.recording_id}, owner={self.owner_id})"
@@ -12,8 +12,54 @@ class SpeciesRange(models.Model):
         related_name="range",
     )
     geom = models.GeometryField(srid=4326)
+    # Simplified copies of `geom` for display, at tolerances in degrees given by their
+    # names; see `bats_ai.core.utils.species_ranges.rebuild_species_range_pieces`.
+    geom_simplified_0001 = models.GeometryField(srid=4326, blank=True, null=True)
+    geom_simplified_001 = models.GeometryField(srid=4326, blank=True, null=True)
+    geom_simplified_01 = models.GeometryField(srid=4326, blank=True, null=True)
     source_feature_id = models.CharField(
         max_length=255,
         blank=True,
         help_text="Optional id from the source GeoJSON feature properties.",
     )
+
+
+class SpeciesRangePiece(models.Model):
+    """A small piece of a species range, for fast spatial predicates.
+
+    Ranges are large multipolygons whose bounding boxes cover most of their area, so
+    they are split with ``ST_Subdivide`` into pieces with few vertices and tight boxes.
+    Built by ``bats_ai.core.utils.species_ranges.rebuild_species_range_pieces``.
+    """
+
+    species = models.ForeignKey(
+        Species,
+        on_delete=models.CASCADE,
+        related_name="range_pieces",
+    )
+    geom = models.GeometryField(srid=4326)
+
+
+class SpeciesRangeCell(models.Model):
+    """A GRTS cell that intersects a species range.
+
+    Precomputed from ``SpeciesRange`` and ``GRTSCells`` by
+    ``bats_ai.core.utils.species_ranges.rebuild_species_range_cells``.
+    """
+
+    species = models.ForeignKey(
+        Species,
+        on_delete=models.CASCADE,
+        related_name="range_cells",
+    )
+    sample_frame_id = models.IntegerField()
+    grts_cell_id = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            # Also serves lookups of the species in range of a cell
+            models.UniqueConstraint(
+                fields=["sample_frame_id", "grts_cell_id", "species"],
+                name="unique_species_range_cell",
+            ),
+        ]
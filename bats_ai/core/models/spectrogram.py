@@ -1,15 +1,14 @@
 from __future__ import annotations
 
 from django.contrib.contenttypes.fields import GenericRelation
-from django.core.files.storage import default_storage
 from django.db import models
 from django_extensions.db.models import TimeStampedModel
 
 from .recording import Recording
-from .spectrogram_image import SpectrogramImage
+from .spectrogram_image import SpectrogramImage, SpectrogramImagesMixin
 
 
-class Spectrogram(TimeStampedModel, models.Model):
+class Spectrogram(SpectrogramImagesMixin, TimeStampedModel, models.Model):
     recording = models.ForeignKey(Recording, on_delete=models.CASCADE, related_name="spectrograms")
     images = GenericRelation(SpectrogramImage)
     width = models.IntegerField()  # pixels
@@ -24,5 +23,4 @@ class Spectrogram(TimeStampedModel, models.Model):
     @property
     def image_url_list(self):
         """Ordered list of image URLs for this spectrogram."""
-        images = self.images.filter(type="spectrogram").order_by("index")
-        return [default_storage.url(img.image_file.name) for img in images]
+        return self.image_urls("spectrogram")
@@ -5,6 +5,8 @@ from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.dispatch import receiver
 
+from bats_ai.core.utils.storage_utils import storage_urls
+
 
 def spectrogram_image_upload_to(instance, filename):
     related = instance.content_object
@@ -18,6 +20,12 @@ def spectrogram_image_upload_to(instance, filename):
     return f"recording_{recording_id}/{instance.type}/image_{instance.index}_{filename}"
 
 
+class SpectrogramImageQuerySet(models.QuerySet):
+    def by_type(self) -> SpectrogramImageQuerySet:
+        """Order images by ``type``, then ``index``; usable as a ``Prefetch`` queryset."""
+        return self.order_by("type", "index")
+
+
 class SpectrogramImage(models.Model):
     SPECTROGRAM_TYPE_CHOICES = [
         ("spectrogram", "Spectrogram"),
@@ -38,6 +46,8 @@ class SpectrogramImage(models.Model):
     index = models.PositiveIntegerField()
     image_file = models.FileField(upload_to=spectrogram_image_upload_to)  # temporary placeholder
 
+    objects = SpectrogramImageQuerySet.as_manager()
+
     class Meta:
         ordering = ["index"]
 
@@ -45,6 +55,35 @@ class SpectrogramImage(models.Model):
         return f"SpectrogramImage {self.pk} ({self.type}, index={self.index})"
 
 
+def images_prefetch(lookup: str = "images") -> models.Prefetch:
+    """Prefetch every image of many spectrograms in one query, for their URL lists."""
+    return models.Prefetch(lookup, queryset=SpectrogramImage.objects.by_type())
+
+
+class SpectrogramImagesMixin:
+    """Image URL helpers for models with an ``images`` relation to ``SpectrogramImage``.
+
+    Callers reading several image types should prefetch the images with
+    ``images_prefetch()``, so that every type comes from one query. Without it, each
+    type is fetched on its own. Adding or removing images clears the prefetched images,
+    so the URLs are never stale.
+    """
+
+    def images_of_type(self, image_type: str) -> list[SpectrogramImage]:
+        """Images of ``image_type``, ordered by ``index``."""
+        prefetched = getattr(self, "_prefetched_objects_cache", {}).get("images")
+        if prefetched is None:
+            return list(self.images.filter(type=image_type).order_by("index"))
+        return sorted(
+            (image for image in prefetched if image.type == image_type),
+            key=lambda image: image.index,
+        )
+
+    def image_urls(self, image_type: str) -> list[str]:
+        """Ordered list of image URLs of ``image_type``."""
+        return storage_urls(image.image_file.name for image in self.images_of_type(image_type))
+
+
 @receiver(models.signals.pre_delete, sender=SpectrogramImage)
 def delete_content(sender, instance, **kwargs):
     if not instance.image_file:
@@ -0,0 +1,47 @@
+"""orjson-based JSON rendering for the Ninja API."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+
+from django.contrib.gis.geos import GEOSGeometry
+from django.utils.duration import duration_iso_string
+from django.utils.functional import Promise
+from ninja.renderers import BaseRenderer
+import orjson
+from pydantic import BaseModel
+
+# "Z" for UTC and str() of non-string dict keys, matching DjangoJSONEncoder
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    """Serialize the types orjson does not handle natively."""
+    if isinstance(obj, GEOSGeometry):
+        # Embed the geometry's GeoJSON as-is instead of parsing and re-encoding it
+        return orjson.Fragment(obj.json)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (Decimal, Promise)):
+        return str(obj)
+    if isinstance(obj, timedelta):
+        return duration_iso_string(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(data: Any) -> bytes:
+    """Encode ``data`` as JSON, including datetimes, Decimals, UUIDs and GEOS geometries.
+
+    Differences from ``DjangoJSONEncoder``: datetimes and times keep full microsecond
+    precision, and NaN or infinite floats become ``null``.
+    """
+    return orjson.dumps(data, default=_default, option=_OPTIONS)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+
+    def render(self, request, data, *, response_status):
+        return dumps(data)
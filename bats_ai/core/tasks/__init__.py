@@ -1,4 +1,4 @@
 from __future__ import annotations
 
 # Import task modules so Celery autodiscovery registers decorated tasks.
-from . import export_task, periodic, tasks  # noqa: F401
+from . import export_task, periodic, sharded_export_task, tasks  # noqa: F401
@@ -1,30 +1,46 @@
 from __future__ import annotations
 
-import csv
 from datetime import timedelta
-from io import BytesIO, StringIO
+from hashlib import sha256
+from itertools import batched, chain, groupby
 import json
 from urllib.parse import urljoin
-import zipfile
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files import File
-from django.core.files.storage import default_storage
-from django.db.models import Prefetch
+from django.contrib.gis.db.models.functions import Centroid
+from django.db.models import Count, F, Prefetch, Q
+from django.utils.dateparse import parse_datetime
 from django.utils.timezone import now
 
 from bats_ai.celery import app
+from bats_ai.core.constants import PULSE_SLOPE_KEYS
 from bats_ai.core.models import (
     Annotations,
+    AnnotationTombstone,
     ExportedAnnotationFile,
+    ExportWatermark,
+    PulseMetadata,
+    Recording,
     RecordingAnnotation,
     RecordingTag,
     SequenceAnnotations,
 )
 from bats_ai.core.models.recording_annotation import RecordingAnnotationSpecies
+from bats_ai.core.utils.export_progress import (
+    ExportCancelledError,
+    ExportProgress,
+    export_task_status,
+)
+from bats_ai.core.utils.storage_utils import storage_url
+from bats_ai.core.utils.zip_export import EXPORT_CHUNK_SIZE, ZipExportWriter
 
 RECORDING_ANNOTATION_EXPORT_SCHEMA_VERSION = 1
+# 2: users only get per-user rows and JSON entries for the tags whose recordings they annotated
+TAG_SUMMARY_EXPORT_SCHEMA_VERSION = 2
+
+# "csv" exports CSV and JSON files; "parquet" exports Parquet tables (needs the [tasks] extra)
+EXPORT_FORMATS = ("csv", "parquet")
 
 RECORDING_ANNOTATION_FLAT_FIELDNAMES = [
     "recording_id",
@@ -45,15 +61,57 @@ RECORDING_ANNOTATION_FLAT_FIELDNAMES = [
     "wav_download_url",
 ]
 
+TAG_FIELDNAMES = [
+    "tag_id",
+    "tag_text",
+    "tag_owner",
+    "total_recordings",
+    "annotated_recordings",
+    "submitted_recordings",
+    "unsubmitted_recordings",
+    "remaining_recordings",
+]
+
+TAG_USER_FIELDNAMES = [
+    "tag_id",
+    "tag_text",
+    "tag_owner",
+    "user_id",
+    "username",
+    "total_recordings",
+    "annotated_recordings",
+    "submitted_recordings",
+    "unsubmitted_recordings",
+    "remaining_recordings",
+]
+
+# Pulses per Parquet row group, and row groups per file, of pulse feature exports
+PULSE_FEATURE_BATCH_SIZE = 10_000
+PULSE_FEATURE_BATCHES_PER_PART = 25
+PULSE_FEATURE_CURVE_POINTS = 32
 
-def build_filters(filters, *, has_confidence=False):
+TOMBSTONE_FIELDNAMES = ["annotation_type", "annotation_id", "recording_id", "deleted"]
+
+# Filter keys selecting what changed, rather than which annotations are exported
+DELTA_FILTER_KEYS = ("since", "since_last_export")
+# Stored watermarks lag the export start by this much, so rows committed by transactions
+# that were still running during an export are included in the next one.
+DELTA_EXPORT_OVERLAP = timedelta(minutes=5)
+
+
+def build_filters(filters, *, has_confidence=False, since=None):
     conditions = {}
+    if since is not None:
+        conditions["modified__gt"] = since
     if filters.get("start_date"):
         conditions["created__date__gte"] = filters["start_date"]
     if filters.get("end_date"):
         conditions["created__date__lte"] = filters["end_date"]
     if filters.get("recording_ids"):
         conditions["recording__id__in"] = filters["recording_ids"]
+    if filters.get("recording_id_range"):
+        # Set for the shards of a sharded export
+        conditions["recording_id__range"] = filters["recording_id_range"]
     if filters.get("usernames"):
         conditions["owner__username__in"] = filters["usernames"]
     if has_confidence:
@@ -66,10 +124,9 @@ def build_filters(filters, *, has_confidence=False):
 
 def _annotation_species_ordered(annotation):
     """Return species list in order; supports RecordingAnnotation and plain Many-to-Many."""
-    if hasattr(annotation, "recordingannotationspecies_set"):
-        # if it is an instance of RecordingAnnotation, use the through model
-        species_ordered = annotation.recordingannotationspecies_set.order_by("order")
-        return [t.species for t in species_ordered]
+    if hasattr(annotation, "ordered_species_links"):
+        # RecordingAnnotation, with its through rows prefetched by _species_links_prefetch()
+        return [link.species for link in annotation.ordered_species_links]
     return list(annotation.species.all())
 
 
@@ -78,7 +135,7 @@ def annotation_to_dict(
 ):
     data = {
         "id": annotation.id,
-        "recording_id": annotation.recording.id,
+        "recording_id": annotation.recording_id,
         "owner": annotation.owner.username,
         "comments": annotation.comments,
         "created": annotation.created.isoformat(),
@@ -104,133 +161,433 @@ def annotation_to_dict(
 
 
 def write_csv_and_json(  # noqa: PLR0913
-    zipf,
+    export,
     name_prefix,
     queryset,
     *,
     include_times=False,
     include_freqs=False,
     include_confidence=False,
+    progress=None,
 ):
-    rows = [
+    annotations = (
+        queryset.select_related("owner").order_by("pk").iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    if progress is not None:
+        annotations = progress.track(annotations)
+    rows = (
         annotation_to_dict(
             ann,
             include_times=include_times,
             include_freqs=include_freqs,
             include_confidence=include_confidence,
         )
-        for ann in queryset.prefetch_related("species")
-    ]
+        for ann in annotations
+    )
+
+    first_row = next(rows, None)
+    if first_row is None:
+        return 0
+
+    with (
+        export.csv_writer(f"{name_prefix}_annotations.csv", first_row.keys()) as writer,
+        export.json_array(f"{name_prefix}_annotations.json") as json_rows,
+    ):
+        for row in chain([first_row], rows):
+            writer.writerow(row)
+            json_rows.append(row)
+    return json_rows.count
+
+
+def _save_export(export_record, export, filename, progress):
+    # Saves the last rows counted, and stops before uploading a cancelled export
+    progress.flush()
+    export.save(export_record.file, filename)
+    export_record.download_url = export_record.file.url
+    export_record.expires_at = now() + timedelta(hours=24)
+    # Only complete an export that was not cancelled during the upload, and leave the
+    # progress fields to `progress`
+    completed = ExportedAnnotationFile.objects.filter(
+        pk=export_record.pk, status="pending", cancel_requested=False
+    ).update(
+        file=export_record.file.name,
+        download_url=export_record.download_url,
+        status="complete",
+        expires_at=export_record.expires_at,
+        modified=now(),
+    )
+    if not completed:
+        export_record.file.delete(save=False)
+        raise ExportCancelledError(f"Export {export_record.pk} was cancelled")
+    export_record.status = "complete"
+
+
+def export_watermark_key(export_type, export_format, annotation_types, filters):
+    """Identify an export stream: the same export type, format, annotation types and filters."""
+    scope = {key: value for key, value in filters.items() if key not in DELTA_FILTER_KEYS}
+    payload = json.dumps(
+        {
+            "type": export_type,
+            "format": export_format,
+            "annotation_types": sorted(annotation_types),
+            "filters": scope,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return sha256(payload.encode()).hexdigest()
+
+
+def _resolve_since(filters, watermark_key):
+    """Return the watermark to export changes after, or ``None`` for a full export."""
+    if filters.get("since"):
+        since = filters["since"]
+        return parse_datetime(since) if isinstance(since, str) else since
+    if filters.get("since_last_export"):
+        # Without a previous export this is a full export
+        return (
+            ExportWatermark.objects.filter(key=watermark_key)
+            .values_list("watermark", flat=True)
+            .first()
+        )
+    return None
 
-    if not rows:
-        return
 
-    # Write CSV
-    csv_buf = BytesIO()
-    writer = csv.DictWriter(csv_buf, fieldnames=rows[0].keys())
-    writer.writeheader()
-    for row in rows:
-        writer.writerow(row)
-    zipf.writestr(f"{name_prefix}_annotations.csv", csv_buf.getvalue().decode())
+def _tombstones_queryset(filters, annotation_types, since):
+    tombstones = AnnotationTombstone.objects.filter(
+        deleted__gt=since,
+        annotation_type__in=[
+            t for t in annotation_types if t in AnnotationTombstone.AnnotationType.values
+        ],
+    )
+    if filters.get("recording_ids"):
+        tombstones = tombstones.filter(recording_id__in=filters["recording_ids"])
+    if filters.get("recording_id_range"):
+        tombstones = tombstones.filter(recording_id__range=filters["recording_id_range"])
+    if filters.get("usernames"):
+        tombstones = tombstones.filter(
+            owner_id__in=User.objects.filter(username__in=filters["usernames"]).values("pk")
+        )
+    return tombstones.order_by("deleted", "pk")
+
 
-    # Write JSON
-    zipf.writestr(f"{name_prefix}_annotations.json", json.dumps(rows, indent=2))
+def _tombstone_row(tombstone):
+    return {
+        "annotation_type": tombstone.annotation_type,
+        "annotation_id": tombstone.annotation_id,
+        "recording_id": tombstone.recording_id,
+        "deleted": tombstone.deleted,
+    }
 
 
 @app.task(bind=True)
-def export_annotations_task(filters: dict, annotation_types: list, export_id: int):
+def export_annotations_task(
+    self, filters: dict, annotation_types: list, export_id: int, export_format: str = "csv"
+):
+    """Export pulse, sequence and/or recording annotations matching ``filters``.
+
+    Parquet exports can also include ``"pulse_metadata"`` (for the filtered recordings).
+
+    With ``filters["since"]`` (a datetime), or ``filters["since_last_export"]`` to use the
+    watermark stored by the previous export with the same format, types and filters, only
+    annotations modified after it are exported, plus tombstones for deleted annotations.
+    Pulse metadata has no modification time and is always exported in full. The manifest
+    records the new watermark.
+    """
     export_record = ExportedAnnotationFile.objects.get(pk=export_id)
 
-    try:
-        buffer = BytesIO()
-        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-            if "pulse" in annotation_types:
-                pulse_filters = build_filters(filters, has_confidence=True)
-                qs = Annotations.objects.filter(**pulse_filters)
-                write_csv_and_json(
-                    zipf,
-                    "pulse",
-                    qs,
-                    include_times=True,
-                    include_freqs=True,
-                    include_confidence=True,
+    with export_task_status(export_record):
+        progress = ExportProgress(export_record, self)
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}")
+        # Taken before reading any rows; rows committed while the export runs are
+        # picked up by the next export, possibly twice (consumers upsert by id).
+        watermark = now() - DELTA_EXPORT_OVERLAP
+        watermark_key = export_watermark_key(
+            "annotations", export_format, annotation_types, filters
+        )
+        since = _resolve_since(filters, watermark_key)
+        progress.set_total(count_annotation_rows(filters, annotation_types, since))
+
+        write = _write_parquet_annotations if export_format == "parquet" else _write_csv_annotations
+        with ZipExportWriter() as export:
+            row_counts = write(export, filters, annotation_types, since, progress)
+            export.write_json(
+                "export_manifest.json",
+                annotations_manifest(export_format, since, watermark, row_counts),
+            )
+            _save_export(export_record, export, f"export-{export_id}.zip", progress)
+
+        ExportWatermark.objects.update_or_create(
+            key=watermark_key, defaults={"watermark": watermark}
+        )
+
+
+def annotations_manifest(export_format, since, watermark, row_counts):
+    tombstone_retention = timedelta(days=settings.BATAI_ANNOTATION_TOMBSTONE_RETENTION_DAYS)
+    manifest = {
+        "export_type": "annotations",
+        "format": export_format,
+        "exported_at": now().isoformat(),
+        "since": since.isoformat() if since is not None else None,
+        "watermark": watermark.isoformat(),
+        # False when older deletions may already have been pruned
+        "tombstones_complete": since is None or since >= now() - tombstone_retention,
+        "row_counts": row_counts,
+    }
+    if export_format == "parquet":
+        from bats_ai.core.utils.parquet_export import PARQUET_EXPORT_SCHEMA_VERSION
+
+        manifest["schema_version"] = PARQUET_EXPORT_SCHEMA_VERSION
+    return manifest
+
+
+def _pulse_metadata_queryset(filters):
+    pulses = PulseMetadata.objects.defer("contours").order_by("recording_id", "index")
+    if filters.get("recording_ids"):
+        pulses = pulses.filter(recording_id__in=filters["recording_ids"])
+    if filters.get("recording_id_range"):
+        pulses = pulses.filter(recording_id__range=filters["recording_id_range"])
+    return pulses
+
+
+def count_annotation_rows(filters, annotation_types, since):
+    """Return the number of rows ``export_annotations_task`` writes for these arguments."""
+    querysets = []
+    if "pulse" in annotation_types:
+        querysets.append(
+            Annotations.objects.filter(**build_filters(filters, has_confidence=True, since=since))
+        )
+    if "sequence" in annotation_types:
+        querysets.append(
+            SequenceAnnotations.objects.filter(
+                **build_filters(filters, has_confidence=False, since=since)
+            )
+        )
+    if "recording" in annotation_types:
+        querysets.append(
+            RecordingAnnotation.objects.filter(
+                **build_filters(filters, has_confidence=True, since=since)
+            )
+        )
+    if "pulse_metadata" in annotation_types:
+        querysets.append(_pulse_metadata_queryset(filters))
+    if since is not None:
+        querysets.append(_tombstones_queryset(filters, annotation_types, since))
+    return sum(queryset.order_by().count() for queryset in querysets)
+
+
+def _write_csv_annotations(export, filters, annotation_types, since, progress):
+    row_counts = {}
+    if "pulse" in annotation_types:
+        pulse_filters = build_filters(filters, has_confidence=True, since=since)
+        qs = Annotations.objects.filter(**pulse_filters).prefetch_related("species")
+        row_counts["pulse_annotations"] = write_csv_and_json(
+            export,
+            "pulse",
+            qs,
+            include_times=True,
+            include_freqs=True,
+            include_confidence=True,
+            progress=progress,
+        )
+
+    if "sequence" in annotation_types:
+        sequence_filters = build_filters(filters, has_confidence=False, since=since)
+        qs = SequenceAnnotations.objects.filter(**sequence_filters).prefetch_related("species")
+        row_counts["sequence_annotations"] = write_csv_and_json(
+            export, "sequence", qs, include_times=True, progress=progress
+        )
+
+    if "recording" in annotation_types:
+        recording_filters = build_filters(filters, has_confidence=True, since=since)
+        qs = RecordingAnnotation.objects.filter(**recording_filters).prefetch_related(
+            _species_links_prefetch()
+        )
+        row_counts["recording_annotations"] = write_csv_and_json(
+            export, "recording", qs, include_confidence=True, progress=progress
+        )
+
+    if since is not None:
+        tombstones = _tombstones_queryset(filters, annotation_types, since)
+        with (
+            export.csv_writer("deleted_annotations.csv", TOMBSTONE_FIELDNAMES) as writer,
+            export.json_array("deleted_annotations.json") as json_rows,
+        ):
+            for tombstone in progress.track(tombstones.iterator(chunk_size=EXPORT_CHUNK_SIZE)):
+                row = {**_tombstone_row(tombstone), "deleted": tombstone.deleted.isoformat()}
+                writer.writerow(row)
+                json_rows.append(row)
+        row_counts["deleted_annotations"] = json_rows.count
+    return row_counts
+
+
+def _annotation_parquet_row(annotation, species, **fields):
+    return {
+        "id": annotation.id,
+        "recording_id": annotation.recording_id,
+        "owner": annotation.owner.username,
+        "comments": annotation.comments,
+        "created": annotation.created,
+        "species": species,
+        **fields,
+    }
+
+
+def _parquet_point(point):
+    if point is None:
+        return None
+    return {"time_ms": point.x, "frequency_hz": point.y}
+
+
+def _pulse_metadata_parquet_row(pulse):
+    # The box is stored as a polygon with time on x and frequency on y
+    min_x, min_y, max_x, max_y = pulse.bounding_box.extent
+    return {
+        "id": pulse.id,
+        "recording_id": pulse.recording_id,
+        "index": pulse.index,
+        "bounding_box": {"start_ms": min_x, "end_ms": max_x, "low_hz": min_y, "high_hz": max_y},
+        "curve": (
+            [{"time_ms": x, "frequency_hz": y} for x, y in pulse.curve.coords]
+            if pulse.curve is not None
+            else None
+        ),
+        "char_freq": _parquet_point(pulse.char_freq),
+        "knee": _parquet_point(pulse.knee),
+        "heel": _parquet_point(pulse.heel),
+        "slopes": (
+            {key: pulse.slopes.get(key) for key in PULSE_SLOPE_KEYS}
+            if pulse.slopes is not None
+            else None
+        ),
+    }
+
+
+def _write_parquet_annotations(export, filters, annotation_types, since, progress):  # noqa: C901
+    from bats_ai.core.utils import parquet_export
+
+    tables = {}
+
+    if "pulse" in annotation_types:
+        annotations = (
+            Annotations.objects.filter(**build_filters(filters, has_confidence=True, since=since))
+            .select_related("owner")
+            .prefetch_related("species")
+            .order_by("pk")
+        )
+        with parquet_export.parquet_table(
+            export, "pulse_annotations.parquet", parquet_export.PULSE_ANNOTATION_SCHEMA
+        ) as table:
+            for annotation in progress.track(annotations.iterator(chunk_size=EXPORT_CHUNK_SIZE)):
+                table.write(
+                    _annotation_parquet_row(
+                        annotation,
+                        [s.common_name for s in annotation.species.all()],
+                        start_time=annotation.start_time,
+                        end_time=annotation.end_time,
+                        low_freq=annotation.low_freq,
+                        high_freq=annotation.high_freq,
+                        confidence=annotation.confidence,
+                    )
                 )
+        tables["pulse_annotations"] = table.count
 
-            if "sequence" in annotation_types:
-                sequence_filters = build_filters(filters, has_confidence=False)
-                qs = SequenceAnnotations.objects.filter(**sequence_filters)
-                write_csv_and_json(zipf, "sequence", qs, include_times=True)
+    if "sequence" in annotation_types:
+        annotations = (
+            SequenceAnnotations.objects.filter(
+                **build_filters(filters, has_confidence=False, since=since)
+            )
+            .select_related("owner")
+            .prefetch_related("species")
+            .order_by("pk")
+        )
+        with parquet_export.parquet_table(
+            export, "sequence_annotations.parquet", parquet_export.SEQUENCE_ANNOTATION_SCHEMA
+        ) as table:
+            for annotation in progress.track(annotations.iterator(chunk_size=EXPORT_CHUNK_SIZE)):
+                table.write(
+                    _annotation_parquet_row(
+                        annotation,
+                        [s.common_name for s in annotation.species.all()],
+                        start_time=annotation.start_time,
+                        end_time=annotation.end_time,
+                    )
+                )
+        tables["sequence_annotations"] = table.count
 
-            if "recording" in annotation_types:
-                recording_filters = build_filters(filters, has_confidence=True)
-                qs = RecordingAnnotation.objects.filter(**recording_filters).prefetch_related(
-                    "recordingannotationspecies_set__species"
+    if "recording" in annotation_types:
+        annotations = _recording_annotations_queryset().filter(
+            **build_filters(filters, has_confidence=True, since=since)
+        )
+        with parquet_export.parquet_table(
+            export, "recording_annotations.parquet", parquet_export.RECORDING_ANNOTATION_SCHEMA
+        ) as table:
+            for annotation in progress.track(annotations.iterator(chunk_size=EXPORT_CHUNK_SIZE)):
+                species, species_codes = _recording_species_lists(annotation)
+                table.write(
+                    _annotation_parquet_row(
+                        annotation,
+                        species,
+                        species_codes=species_codes,
+                        model=annotation.model,
+                        confidence=annotation.confidence,
+                        submitted=annotation.submitted,
+                        additional_data=_json_or_none(annotation.additional_data),
+                    )
                 )
-                write_csv_and_json(zipf, "recording", qs, include_confidence=True)
+        tables["recording_annotations"] = table.count
 
-        buffer.seek(0)
-        filename = f"export-{export_id}.zip"
-        export_record.file.save(filename, File(buffer), save=False)
-        export_record.download_url = export_record.file.url
-        export_record.status = "complete"
-        export_record.expires_at = now() + timedelta(hours=24)
-        export_record.save()
+    if "pulse_metadata" in annotation_types:
+        pulses = _pulse_metadata_queryset(filters)
+        with parquet_export.parquet_table(
+            export, "pulse_metadata.parquet", parquet_export.PULSE_METADATA_SCHEMA
+        ) as table:
+            for pulse in progress.track(pulses.iterator(chunk_size=EXPORT_CHUNK_SIZE)):
+                table.write(_pulse_metadata_parquet_row(pulse))
+        tables["pulse_metadata"] = table.count
 
-    except Exception:
-        export_record.status = "failed"
-        export_record.save()
-        raise
+    if since is not None:
+        tombstones = _tombstones_queryset(filters, annotation_types, since)
+        with parquet_export.parquet_table(
+            export, "deleted_annotations.parquet", parquet_export.TOMBSTONE_SCHEMA
+        ) as table:
+            for tombstone in progress.track(tombstones.iterator(chunk_size=EXPORT_CHUNK_SIZE)):
+                table.write(_tombstone_row(tombstone))
+        tables["deleted_annotations"] = table.count
+
+    return tables
+
+
+def _json_or_none(value):
+    return None if value is None else json.dumps(value)
 
 
 @app.task(bind=True)
 def export_tag_annotation_summary_task(self, export_id: int):
     export_record = ExportedAnnotationFile.objects.get(pk=export_id)
-    try:
-        tag_rows, tag_user_rows = _collect_tag_summary_rows()
-
-        buffer = BytesIO()
-        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-            _write_tag_exports(zipf, tag_rows, tag_user_rows)
-
-        buffer.seek(0)
-        filename = f"tag-annotation-summary-{export_id}.zip"
-        export_record.file.save(filename, File(buffer), save=False)
-        export_record.download_url = export_record.file.url
-        export_record.status = "complete"
-        export_record.expires_at = now() + timedelta(hours=24)
-        export_record.save()
-    except Exception:
-        export_record.status = "failed"
-        export_record.save()
-        raise
+    with export_task_status(export_record):
+        progress = ExportProgress(export_record, self)
+        progress.set_total(RecordingTag.objects.count())
+        with ZipExportWriter() as export:
+            _write_tag_exports(export, progress)
+            _save_export(export_record, export, f"tag-annotation-summary-{export_id}.zip", progress)
 
 
 @app.task(bind=True)
-def export_recording_annotation_hierarchy_task(self, export_id: int):
+def export_recording_annotation_hierarchy_task(self, export_id: int, export_format: str = "csv"):
     export_record = ExportedAnnotationFile.objects.get(pk=export_id)
-    try:
-        recordings_payload, flat_rows, manifest = _collect_recording_annotations_export()
-
-        buffer = BytesIO()
-        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-            _write_recording_annotations_zip(
-                zipf,
-                recordings_payload,
-                flat_rows,
-                manifest,
-            )
-
-        buffer.seek(0)
-        filename = f"recording-annotations-{export_id}.zip"
-        export_record.file.save(filename, File(buffer), save=False)
-        export_record.download_url = export_record.file.url
-        export_record.status = "complete"
-        export_record.expires_at = now() + timedelta(hours=24)
-        export_record.save()
-    except Exception:
-        export_record.status = "failed"
-        export_record.save()
-        raise
+    with export_task_status(export_record):
+        progress = ExportProgress(export_record, self)
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}")
+        progress.set_total(RecordingAnnotation.objects.count())
+        with ZipExportWriter() as export:
+            if export_format == "parquet":
+                _write_recording_annotations_parquet(export, progress)
+            else:
+                _write_recording_annotations_zip(export, progress)
+            _save_export(export_record, export, f"recording-annotations-{export_id}.zip", progress)
 
 
 def _recording_species_lists(annotation):
@@ -269,294 +626,376 @@ def _recording_export_metadata(recording):
             f"/recording/{recording.id}/spectrogram",
         ),
         "wav_download_url": (
-            default_storage.url(recording.audio_file.name) if recording.audio_file else None
+            storage_url(recording.audio_file.name) if recording.audio_file else None
         ),
     }
 
 
-def _collect_recording_annotations_export():
-    species_links_prefetch = Prefetch(
+def _species_links_prefetch():
+    return Prefetch(
         "recordingannotationspecies_set",
         queryset=RecordingAnnotationSpecies.objects.select_related("species").order_by("order"),
         to_attr="ordered_species_links",
     )
-    annotations = (
+
+
+def _recording_annotations_queryset():
+    return (
         RecordingAnnotation.objects.select_related("recording", "owner")
-        .prefetch_related(species_links_prefetch)
+        .prefetch_related(_species_links_prefetch())
         .order_by("recording_id", "id")
     )
 
-    recordings_by_id = {}
-    flat_rows = []
+
+def _flat_row_for_csv(row):
+    csv_row = {key: row.get(key) for key in RECORDING_ANNOTATION_FLAT_FIELDNAMES}
+    for key in ("species", "species_codes"):
+        value = csv_row.get(key)
+        if isinstance(value, list):
+            csv_row[key] = "|".join("" if item is None else str(item) for item in value)
+    if csv_row.get("additional_data") is not None:
+        csv_row["additional_data"] = json.dumps(csv_row["additional_data"])
+    return csv_row
+
+
+def _write_recording_annotations_zip(export, progress):
+    """Stream recordings (with nested annotations) and flat annotation rows into ``export``.
+
+    Annotations are ordered by recording, so only the current recording's entry is held
+    in memory.
+    """
+    annotations = progress.track(
+        _recording_annotations_queryset().iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    recording_count = 0
     submitted_annotation_count = 0
     unsubmitted_annotation_count = 0
 
-    for annotation in annotations:
-        recording = annotation.recording
-        recording_entry = recordings_by_id.get(recording.id)
-        if recording_entry is None:
-            recording_metadata = _recording_export_metadata(recording)
-            recording_entry = {
-                **recording_metadata,
-                "submitted_annotations": 0,
-                "unsubmitted_annotations": 0,
-                "annotations": [],
-            }
-            recordings_by_id[recording.id] = recording_entry
-
-        if annotation.submitted:
-            recording_entry["submitted_annotations"] += 1
-            submitted_annotation_count += 1
-        else:
-            recording_entry["unsubmitted_annotations"] += 1
-            unsubmitted_annotation_count += 1
-
-        species, species_codes = _recording_species_lists(annotation)
-        annotation_entry = _recording_annotation_entry_dict(
-            annotation,
-            species,
-            species_codes,
-        )
-        recording_entry["annotations"].append(annotation_entry)
-        flat_rows.append(
-            {
-                **_recording_export_metadata(recording),
-                **annotation_entry,
-            }
-        )
+    with (
+        export.json_array("recording_annotations.json", key="recordings") as recordings_json,
+        export.csv_writer(
+            "recording_annotations_flat.csv", RECORDING_ANNOTATION_FLAT_FIELDNAMES
+        ) as flat_csv,
+        export.json_array("recording_annotations_flat.json") as flat_json,
+    ):
+        recording_metadata = None
+        recording_entry = None
+        for annotation in annotations:
+            recording = annotation.recording
+            if recording_entry is None or recording_entry["recording_id"] != recording.id:
+                if recording_entry is not None:
+                    recordings_json.append(recording_entry)
+                recording_metadata = _recording_export_metadata(recording)
+                recording_entry = {
+                    **recording_metadata,
+                    "submitted_annotations": 0,
+                    "unsubmitted_annotations": 0,
+                    "annotations": [],
+                }
+                recording_count += 1
+
+            if annotation.submitted:
+                recording_entry["submitted_annotations"] += 1
+                submitted_annotation_count += 1
+            else:
+                recording_entry["unsubmitted_annotations"] += 1
+                unsubmitted_annotation_count += 1
+
+            species, species_codes = _recording_species_lists(annotation)
+            annotation_entry = _recording_annotation_entry_dict(
+                annotation,
+                species,
+                species_codes,
+            )
+            recording_entry["annotations"].append(annotation_entry)
+            flat_row = {**recording_metadata, **annotation_entry}
+            flat_csv.writerow(_flat_row_for_csv(flat_row))
+            flat_json.append(flat_row)
+
+        if recording_entry is not None:
+            recordings_json.append(recording_entry)
 
-    recordings_payload = sorted(
-        recordings_by_id.values(),
-        key=lambda recording: recording["recording_id"],
-    )
     annotation_count = submitted_annotation_count + unsubmitted_annotation_count
     manifest = {
         "export_type": "recording_annotation_hierarchy",
         "schema_version": RECORDING_ANNOTATION_EXPORT_SCHEMA_VERSION,
         "exported_at": now().isoformat(),
-        "recording_count": len(recordings_by_id),
+        "recording_count": recording_count,
         "annotation_count": annotation_count,
         "submitted_annotation_count": submitted_annotation_count,
         "unsubmitted_annotation_count": unsubmitted_annotation_count,
     }
-    return recordings_payload, flat_rows, manifest
+    export.write_json("export_manifest.json", manifest)
 
 
-def _flat_row_for_csv(row):
-    csv_row = {key: row.get(key) for key in RECORDING_ANNOTATION_FLAT_FIELDNAMES}
-    for key in ("species", "species_codes"):
-        value = csv_row.get(key)
-        if isinstance(value, list):
-            csv_row[key] = "|".join("" if item is None else str(item) for item in value)
-    if csv_row.get("additional_data") is not None:
-        csv_row["additional_data"] = json.dumps(csv_row["additional_data"])
-    return csv_row
+def _write_recording_annotations_parquet(export, progress):
+    """Write one flat Parquet row per recording annotation, with its recording's metadata."""
+    from bats_ai.core.utils import parquet_export
 
+    submitted_annotation_count = 0
+    unsubmitted_annotation_count = 0
+    recording_ids = set()
+    recording_metadata = None
 
-def _write_recording_annotations_zip(zipf, recordings_payload, flat_rows, manifest):
-    zipf.writestr("export_manifest.json", json.dumps(manifest))
-    zipf.writestr(
-        "recording_annotations.json",
-        json.dumps({"recordings": recordings_payload}),
+    annotations = progress.track(
+        _recording_annotations_queryset().iterator(chunk_size=EXPORT_CHUNK_SIZE)
     )
-    if not flat_rows:
-        return
+    with parquet_export.parquet_table(
+        export,
+        "recording_annotations.parquet",
+        parquet_export.RECORDING_ANNOTATION_FLAT_SCHEMA,
+    ) as table:
+        for annotation in annotations:
+            recording = annotation.recording
+            if recording_metadata is None or recording_metadata["recording_id"] != recording.id:
+                recording_metadata = _recording_export_metadata(recording)
+                recording_ids.add(recording.id)
+            if annotation.submitted:
+                submitted_annotation_count += 1
+            else:
+                unsubmitted_annotation_count += 1
 
-    zipf.writestr(
-        "recording_annotations_flat.json",
-        json.dumps(flat_rows),
-    )
-    csv_buf = StringIO()
-    writer = csv.DictWriter(csv_buf, fieldnames=RECORDING_ANNOTATION_FLAT_FIELDNAMES)
-    writer.writeheader()
-    for row in flat_rows:
-        writer.writerow(_flat_row_for_csv(row))
-    zipf.writestr("recording_annotations_flat.csv", csv_buf.getvalue())
-
-
-def _collect_tag_summary_rows():
-    tag_rows = []
-    tag_user_rows = []
-    users = list(User.objects.order_by("username").values("id", "username"))
-    tags = RecordingTag.objects.select_related("user").prefetch_related(
-        "recording_set__recordingannotation_set__owner"
+            species, species_codes = _recording_species_lists(annotation)
+            table.write(
+                {
+                    **recording_metadata,
+                    **_recording_annotation_entry_dict(annotation, species, species_codes),
+                    "created": annotation.created,
+                    "additional_data": _json_or_none(annotation.additional_data),
+                }
+            )
+
+    export.write_json(
+        "export_manifest.json",
+        {
+            "export_type": "recording_annotation_hierarchy",
+            "format": "parquet",
+            "schema_version": parquet_export.PARQUET_EXPORT_SCHEMA_VERSION,
+            "exported_at": now().isoformat(),
+            "recording_count": len(recording_ids),
+            "annotation_count": submitted_annotation_count + unsubmitted_annotation_count,
+            "submitted_annotation_count": submitted_annotation_count,
+            "unsubmitted_annotation_count": unsubmitted_annotation_count,
+        },
     )
 
-    for tag in tags:
-        tag_row, user_rows = _build_rows_for_tag(tag, users)
-        tag_rows.append(tag_row)
-        tag_user_rows.extend(user_rows)
-
-    return tag_rows, tag_user_rows
-
-
-def _build_rows_for_tag(tag, users):
-    recordings = list(tag.recording_set.all())
-    total_recordings = len(recordings)
-    annotations_by_user = _group_recording_annotations_by_user(recordings)
-    annotated_total, submitted_total, unsubmitted_total = _collect_total_sets(annotations_by_user)
-
-    tag_row = {
-        "tag_id": tag.id,
-        "tag_text": tag.text,
-        "tag_owner": tag.user.username,
-        "total_recordings": total_recordings,
-        "annotated_recordings": len(annotated_total),
-        "submitted_recordings": len(submitted_total),
-        "unsubmitted_recordings": len(unsubmitted_total),
-        "remaining_recordings": total_recordings - len(annotated_total),
-    }
-    user_rows = _build_user_rows(
-        tag,
-        total_recordings,
-        annotations_by_user,
-        users,
+
+def _tag_summary_queryset():
+    """Return tags with the number of recordings that are tagged, and annotated at all."""
+    annotated = Q(recording__recordingannotation__isnull=False)
+    return (
+        RecordingTag.objects.order_by("pk")
+        .annotate(
+            tag_owner=F("user__username"),
+            total_recordings=Count("recording", distinct=True),
+            annotated_recordings=Count("recording", filter=annotated, distinct=True),
+            submitted_recordings=Count(
+                "recording",
+                filter=Q(recording__recordingannotation__submitted=True),
+                distinct=True,
+            ),
+            unsubmitted_recordings=Count(
+                "recording",
+                filter=Q(recording__recordingannotation__submitted=False),
+                distinct=True,
+            ),
+        )
+        .values(
+            "id",
+            "text",
+            "tag_owner",
+            "total_recordings",
+            "annotated_recordings",
+            "submitted_recordings",
+            "unsubmitted_recordings",
+        )
     )
-    return tag_row, user_rows
 
 
-def _group_recording_annotations_by_user(recordings):
-    annotations_by_user = {}
-    for recording in recordings:
-        for annotation in recording.recordingannotation_set.all():
-            key = annotation.owner_id
-            if key not in annotations_by_user:
-                annotations_by_user[key] = {
-                    "username": annotation.owner.username,
-                    "annotated_recordings": set(),
-                    "submitted_recordings": set(),
-                    "unsubmitted_recordings": set(),
-                }
-            user_stats = annotations_by_user[key]
-            user_stats["annotated_recordings"].add(recording.id)
-            if annotation.submitted:
-                user_stats["submitted_recordings"].add(recording.id)
-            else:
-                user_stats["unsubmitted_recordings"].add(recording.id)
-    return annotations_by_user
-
-
-def _collect_total_sets(annotations_by_user):
-    annotated_total = set()
-    submitted_total = set()
-    unsubmitted_total = set()
-    for user_stats in annotations_by_user.values():
-        annotated_total.update(user_stats["annotated_recordings"])
-        submitted_total.update(user_stats["submitted_recordings"])
-        unsubmitted_total.update(user_stats["unsubmitted_recordings"])
-    return annotated_total, submitted_total, unsubmitted_total
-
-
-def _build_user_rows(tag, total_recordings, annotations_by_user, users):
-    user_rows = []
-    for user in users:
-        owner_id = user["id"]
-        username = user["username"]
-        user_stats = annotations_by_user.get(owner_id)
-        if user_stats is None:
-            user_stats = {
-                "username": username,
-                "annotated_recordings": set(),
-                "submitted_recordings": set(),
-                "unsubmitted_recordings": set(),
-            }
-        annotated_count = len(user_stats["annotated_recordings"])
-        user_rows.append(
-            {
-                "tag_id": tag.id,
-                "tag_text": tag.text,
-                "tag_owner": tag.user.username,
-                "user_id": owner_id,
-                "username": username,
-                "total_recordings": total_recordings,
-                "annotated_recordings": annotated_count,
-                "submitted_recordings": len(user_stats["submitted_recordings"]),
-                "unsubmitted_recordings": len(user_stats["unsubmitted_recordings"]),
-                "remaining_recordings": total_recordings - annotated_count,
-            }
+def _tag_user_summary_queryset():
+    """Return the tagged recordings annotated by each user, grouped by user and tag."""
+    return (
+        RecordingAnnotation.objects.filter(recording__tags__isnull=False)
+        .values(tag_id=F("recording__tags"), user_id=F("owner_id"), username=F("owner__username"))
+        .annotate(
+            annotated_recordings=Count("recording", distinct=True),
+            submitted_recordings=Count("recording", filter=Q(submitted=True), distinct=True),
+            unsubmitted_recordings=Count("recording", filter=Q(submitted=False), distinct=True),
         )
-    return user_rows
-
-
-def _write_tag_exports(zipf, tag_rows, tag_user_rows):
-    tag_fieldnames = [
-        "tag_id",
-        "tag_text",
-        "tag_owner",
-        "total_recordings",
-        "annotated_recordings",
-        "submitted_recordings",
-        "unsubmitted_recordings",
-        "remaining_recordings",
-    ]
-    tag_user_fieldnames = [
-        "tag_id",
-        "tag_text",
-        "tag_owner",
-        "user_id",
-        "username",
-        "total_recordings",
-        "annotated_recordings",
-        "submitted_recordings",
-        "unsubmitted_recordings",
-        "remaining_recordings",
-    ]
-
-    tag_csv_buf = StringIO()
-    tag_writer = csv.DictWriter(tag_csv_buf, fieldnames=tag_fieldnames)
-    tag_writer.writeheader()
-    for row in tag_rows:
-        tag_writer.writerow(row)
-    zipf.writestr("tag_summary.csv", tag_csv_buf.getvalue())
-
-    tag_user_csv_buf = StringIO()
-    tag_user_writer = csv.DictWriter(tag_user_csv_buf, fieldnames=tag_user_fieldnames)
-    tag_user_writer.writeheader()
-    for row in tag_user_rows:
-        tag_user_writer.writerow(row)
-    zipf.writestr("tag_summary_by_user.csv", tag_user_csv_buf.getvalue())
-
-    users_payload = _build_users_payload(tag_user_rows)
-    zipf.writestr(
-        "tag_annotation_summary.json",
-        json.dumps(
-            {
-                "users": users_payload,
-            },
-            indent=2,
-        ),
+        .order_by("username", "user_id", "tag_id")
     )
 
 
-def _build_users_payload(tag_user_rows):
-    users_by_id = {}
-    for row in tag_user_rows:
-        user_id = row["user_id"]
-        if user_id not in users_by_id:
-            users_by_id[user_id] = {
-                "user_id": user_id,
-                "username": row["username"],
-                "tags": [],
+def _write_tag_exports(export, progress):
+    """Write per-tag and per-(tag, user) recording counts.
+
+    Both are computed with one grouped query each. Users only get a row, and a JSON
+    entry, for the tags whose recordings they annotated, so the output grows with the
+    number of annotations rather than with tags x users. The per-user JSON is written one
+    user at a time, merging the users with their rows in username order.
+    """
+    tags_by_id = {}
+    with export.csv_writer("tag_summary.csv", TAG_FIELDNAMES) as tag_writer:
+        tags = _tag_summary_queryset().iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        for tag in progress.track(tags):
+            tag_fields = {
+                "tag_id": tag["id"],
+                "tag_text": tag["text"],
+                "tag_owner": tag["tag_owner"],
+                "total_recordings": tag["total_recordings"],
             }
+            tag_writer.writerow(_tag_counts_row(tag_fields, tag))
+            tags_by_id[tag["id"]] = tag_fields
+
+    user_rows = _tag_user_summary_queryset().iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    user_row = next(user_rows, None)
+    users = User.objects.order_by("username", "id").values("id", "username")
+    with (
+        export.csv_writer("tag_summary_by_user.csv", TAG_USER_FIELDNAMES) as tag_user_writer,
+        export.json_array("tag_annotation_summary.json", key="users") as json_users,
+    ):
+        for user in users.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            user_fields = {"user_id": user["id"], "username": user["username"]}
+            user_tags = []
+            # Both querysets are ordered by username and user id
+            while user_row is not None and user_row["user_id"] == user["id"]:
+                # Tags created after the tag summary was written are left out
+                tag_fields = tags_by_id.get(user_row["tag_id"])
+                if tag_fields is not None:
+                    row = _tag_counts_row({**tag_fields, **user_fields}, user_row)
+                    tag_user_writer.writerow(row)
+                    user_tags.append(_user_tag_entry(row))
+                user_row = next(user_rows, None)
+            json_users.append({**user_fields, "tags": user_tags})
+
+    export.write_json(
+        "export_manifest.json",
+        {
+            "export_type": "tag_annotation_summary",
+            "schema_version": TAG_SUMMARY_EXPORT_SCHEMA_VERSION,
+            "exported_at": now().isoformat(),
+        },
+    )
 
-        tag_entry = {
-            "tag_id": row["tag_id"],
-            "tag_text": row["tag_text"],
-            "tag_owner": row["tag_owner"],
-            "has_annotations": row["annotated_recordings"] > 0,
-        }
-        if row["annotated_recordings"] > 0:
-            tag_entry.update(
+
+def _tag_counts_row(fields, counts):
+    return {
+        **fields,
+        "annotated_recordings": counts["annotated_recordings"],
+        "submitted_recordings": counts["submitted_recordings"],
+        "unsubmitted_recordings": counts["unsubmitted_recordings"],
+        "remaining_recordings": fields["total_recordings"] - counts["annotated_recordings"],
+    }
+
+
+def _user_tag_entry(row):
+    return {
+        "tag_id": row["tag_id"],
+        "tag_text": row["tag_text"],
+        "tag_owner": row["tag_owner"],
+        "has_annotations": True,
+        "total_recordings": row["total_recordings"],
+        "annotated_recordings": row["annotated_recordings"],
+        "submitted_recordings": row["submitted_recordings"],
+        "unsubmitted_recordings": row["unsubmitted_recordings"],
+        "remaining_recordings": row["remaining_recordings"],
+    }
+
+
+@app.task(bind=True)
+def export_pulse_features_task(
+    self, filters: dict, export_id: int, curve_points: int = PULSE_FEATURE_CURVE_POINTS
+):
+    """Export a feature matrix of pulse metadata, one Parquet row per pulse.
+
+    See `bats_ai.core.utils.pulse_features` for the columns. Rows are ordered by
+    recording and pulse index, and split over ``pulse_features/part-NNNNN.parquet``
+    files listed in the manifest.
+    """
+    export_record = ExportedAnnotationFile.objects.get(pk=export_id)
+    with export_task_status(export_record):
+        from bats_ai.core.utils import pulse_features
+
+        progress = ExportProgress(export_record, self)
+        pulses = _pulse_metadata_queryset(filters)
+        progress.set_total(pulses.order_by().count())
+        with ZipExportWriter() as export:
+            parts, row_count = _write_pulse_features(export, pulses, curve_points, progress)
+            export.write_json(
+                "export_manifest.json",
                 {
-                    "total_recordings": row["total_recordings"],
-                    "annotated_recordings": row["annotated_recordings"],
-                    "submitted_recordings": row["submitted_recordings"],
-                    "unsubmitted_recordings": row["unsubmitted_recordings"],
-                    "remaining_recordings": row["remaining_recordings"],
-                }
+                    "export_type": "pulse_features",
+                    "format": "parquet",
+                    "schema_version": pulse_features.PULSE_FEATURE_SCHEMA_VERSION,
+                    "exported_at": now().isoformat(),
+                    "curve_points": curve_points,
+                    "slope_keys": list(PULSE_SLOPE_KEYS),
+                    "row_count": row_count,
+                    "parts": parts,
+                },
             )
-        else:
-            tag_entry["annotated_recordings"] = 0
-        users_by_id[user_id]["tags"].append(tag_entry)
+            _save_export(export_record, export, f"pulse-features-{export_id}.zip", progress)
+
+
+def _write_pulse_features(export, pulses, curve_points, progress):
+    from bats_ai.core.utils import parquet_export, pulse_features
 
-    return sorted(users_by_id.values(), key=lambda user: user["username"])
+    schema = pulse_features.pulse_feature_schema(curve_points)
+    batches = enumerate(
+        batched(
+            progress.track(pulses.iterator(chunk_size=PULSE_FEATURE_BATCH_SIZE)),
+            PULSE_FEATURE_BATCH_SIZE,
+            strict=False,
+        )
+    )
+    parts = []
+    row_count = 0
+    # groupby keeps only the current batch in memory
+    for part_index, part_batches in groupby(
+        batches, key=lambda item: item[0] // PULSE_FEATURE_BATCHES_PER_PART
+    ):
+        name = f"pulse_features/part-{part_index:05d}.parquet"
+        with parquet_export.parquet_table(export, name, schema) as table:
+            for _batch_index, batch in part_batches:
+                table.write_table(
+                    pulse_features.pulse_feature_table(
+                        batch, _pulse_recording_features(batch), curve_points
+                    )
+                )
+        parts.append(name)
+        row_count += table.count
+    return parts, row_count
+
+
+def _pulse_recording_features(pulses):
+    """Return the recording metadata and species labels of ``pulses``, by recording ID."""
+    recording_ids = {pulse.recording_id for pulse in pulses}
+    recordings = Recording.objects.filter(pk__in=recording_ids).annotate(
+        effective_point=Centroid("effective_location")
+    )
+    labels = {
+        annotation.recording_id: annotation
+        for annotation in RecordingAnnotation.objects.filter(recording_id__in=recording_ids)
+        .prefetch_related(_species_links_prefetch())
+        .order_by("recording_id", "-submitted", "-modified", "-pk")
+        .distinct("recording_id")
+    }
+
+    features = {}
+    for recording in recordings:
+        point = recording.effective_point
+        label = labels.get(recording.pk)
+        features[recording.pk] = {
+            "recording_name": recording.name,
+            "recorded_date": recording.recorded_date,
+            "grts_cell_id": recording.grts_cell_id,
+            "sample_frame_id": recording.sample_frame_id,
+            "latitude": point.y if point is not None else None,
+            "longitude": point.x if point is not None else None,
+            "label_annotation_id": label.pk if label is not None else None,
+            "label_submitted": label.submitted if label is not None else None,
+            "label_species_codes": (
+                _recording_species_lists(label)[1] if label is not None else None
+            ),
+        }
+    return features
@@ -1,21 +1,26 @@
 from __future__ import annotations
 
-import csv
-from datetime import timedelta
-from io import BytesIO, TextIOWrapper
-import json
 import logging
-import zipfile
-
-from django.core.files import File
-from django.utils.timezone import now
 
 from bats_ai.celery import app
 from bats_ai.core.models import ExportedAnnotationFile
 from bats_ai.core.models.nabat import NABatRecordingAnnotation
+from bats_ai.core.tasks.export_task import _save_export
+from bats_ai.core.utils.export_progress import ExportProgress, export_task_status
+from bats_ai.core.utils.zip_export import EXPORT_CHUNK_SIZE, ZipExportWriter
 
 logger = logging.getLogger(__name__)
 
+NABAT_EXPORT_FIELDNAMES = [
+    "recording_id",
+    "recording_name",
+    "user_email",
+    "confidence",
+    "created",
+    "species",
+    "comments",
+]
+
 
 def build_annotation_queryset(filters: dict):
     qs = NABatRecordingAnnotation.objects.all()
@@ -39,74 +44,33 @@ def build_annotation_queryset(filters: dict):
 @app.task(bind=True)
 def export_nabat_annotations_task(self, filters: dict, export_id: int):
     export_record = ExportedAnnotationFile.objects.get(pk=export_id)
-    try:
+    with export_task_status(export_record):
+        progress = ExportProgress(export_record, self)
         queryset = build_annotation_queryset(filters)
-
-        buffer = BytesIO()
-        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-            # CSV creation
-            csv_bytes = BytesIO()
-            csv_buffer = TextIOWrapper(csv_bytes, encoding="utf-8", newline="")
-            writer = csv.writer(csv_buffer)
-            writer = csv.writer(csv_buffer)
-            writer.writerow(
-                [
-                    "recording_id",
-                    "recording_nameuser_email",
-                    "confidence",
-                    "created",
-                    "species",
-                    "comments",
-                ]
-            )
-
-            annotations_data = []
-
-            for ann in queryset.prefetch_related("species"):
-                species_names = ", ".join(s.common_name for s in ann.species.all())
-                logger.info("Exporting Ann: %s with species names: %s", ann, species_names)
-                # Write row to CSV
-                writer.writerow(
-                    [
-                        ann.nabat_recording.recording_id,
-                        ann.nabat_recording.name,
-                        ann.user_email,
-                        ann.confidence,
-                        ann.created.isoformat(),
-                        species_names,
-                        ann.comments,
-                    ]
-                )
-
-                # Append to JSON structure
-                annotations_data.append(
-                    {
+        progress.set_total(queryset.count())
+        queryset = (
+            queryset.select_related("nabat_recording").prefetch_related("species").order_by("pk")
+        )
+
+        with ZipExportWriter() as export:
+            with (
+                export.csv_writer("annotations.csv", NABAT_EXPORT_FIELDNAMES) as writer,
+                export.json_array("annotations.json") as annotations_json,
+            ):
+                for ann in progress.track(queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)):
+                    species = [s.common_name for s in ann.species.all()]
+                    logger.debug("Exporting Ann: %s with species names: %s", ann, species)
+                    row = {
                         "recording_id": ann.nabat_recording.recording_id,
                         "recording_name": ann.nabat_recording.name,
                         "user_email": ann.user_email,
                         "confidence": ann.confidence,
                         "created": ann.created.isoformat(),
-                        "species": [s.common_name for s in ann.species.all()],
+                        "species": species,
                         "comments": ann.comments,
                     }
-                )
-
-            csv_buffer.flush()
-            # Optional: reset cursor to the beginning (not strictly needed for getvalue())
-            csv_bytes.seek(0)
-
-            zipf.writestr("annotations.csv", csv_bytes.getvalue().decode())
-            zipf.writestr("annotations.json", json.dumps(annotations_data, indent=2))
+                    writer.writerow({**row, "species": ", ".join(species)})
+                    annotations_json.append(row)
 
-        buffer.seek(0)
-        filename = f"export-{export_id}.zip"
-        export_record.file.save(filename, File(buffer), save=False)
+            _save_export(export_record, export, f"export-{export_id}.zip", progress)
         logger.info("Export URL: %s", export_record.file.url)
-        export_record.download_url = export_record.file.url
-        export_record.status = "complete"
-        export_record.expires_at = now() + timedelta(hours=24)
-        export_record.save()
-    except Exception:
-        export_record.status = "failed"
-        export_record.save()
-        raise
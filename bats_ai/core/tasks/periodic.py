@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+from datetime import timedelta
+
+from django.conf import settings
 from django.utils import timezone
 
 from bats_ai.celery import app
-from bats_ai.core.models import ExportedAnnotationFile
+from bats_ai.core.models import AnnotationTombstone, ExportedAnnotationFile
 
 
 @app.task
@@ -11,3 +14,9 @@ def delete_expired_exported_files():
     now = timezone.now()
     expired_files = ExportedAnnotationFile.objects.filter(expires_at__lt=now)
     expired_files.delete()
+
+
+@app.task
+def delete_old_annotation_tombstones():
+    cutoff = timezone.now() - timedelta(days=settings.BATAI_ANNOTATION_TOMBSTONE_RETENTION_DAYS)
+    AnnotationTombstone.objects.filter(deleted__lt=cutoff).delete()
@@ -0,0 +1,263 @@
+"""Sharded annotation exports, run in parallel across Celery workers.
+
+``export_annotations_sharded_task`` splits the recordings into ID ranges holding about
+the same number of recordings, and starts a chord with one
+``export_annotations_shard_task`` per range. Each shard runs the regular annotation
+export for its range and saves the resulting ZIP to storage. Shards add the rows they
+write to the export's progress, and their ``ExportShard`` status and row counts report
+progress per shard. ``stitch_annotations_export_task`` then streams the
+parts into a single ZIP, one member at a time: CSV files and JSON arrays are
+concatenated, and Parquet tables are kept as one file per shard, listed under ``parts``
+in the manifest.
+
+Rows are ordered by recording ID range, then by ID, rather than by ID alone.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import logging
+import shutil
+import zipfile
+
+from celery import chord
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+
+from bats_ai.celery import app
+from bats_ai.core.models import ExportedAnnotationFile, ExportShard, ExportWatermark, Recording
+from bats_ai.core.tasks.export_task import (
+    DELTA_EXPORT_OVERLAP,
+    EXPORT_FORMATS,
+    _resolve_since,
+    _save_export,
+    _write_csv_annotations,
+    _write_parquet_annotations,
+    annotations_manifest,
+    count_annotation_rows,
+    export_watermark_key,
+)
+from bats_ai.core.utils.export_progress import (
+    ExportCancelledError,
+    ExportProgress,
+    export_task_status,
+)
+from bats_ai.core.utils.zip_export import ZipExportWriter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPORT_SHARD_COUNT = 8
+_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def plan_export_shards(export_record, filters, shard_count):
+    """Create the shards of ``export_record``: ranges of about equally many recordings."""
+    recordings = Recording.objects.order_by("pk").values_list("pk", flat=True)
+    if filters.get("recording_ids"):
+        recordings = recordings.filter(pk__in=filters["recording_ids"])
+    count = recordings.count()
+    if count == 0:
+        return [ExportShard.objects.create(export=export_record, index=0)]
+
+    # One OFFSET query per shard
+    starts = [recordings[count * i // shard_count] for i in range(min(shard_count, count))]
+    ends = [start - 1 for start in starts[1:]] + [recordings.last()]
+    return ExportShard.objects.bulk_create(
+        ExportShard(
+            export=export_record,
+            index=index,
+            first_recording_id=first_recording_id,
+            last_recording_id=last_recording_id,
+        )
+        for index, (first_recording_id, last_recording_id) in enumerate(
+            zip(starts, ends, strict=True)
+        )
+    )
+
+
+@app.task(bind=True)
+def export_annotations_sharded_task(  # noqa: PLR0913
+    self,
+    filters: dict,
+    annotation_types: list,
+    export_id: int,
+    export_format: str = "csv",
+    shard_count: int = DEFAULT_EXPORT_SHARD_COUNT,
+):
+    """Run ``export_annotations_task`` as ``shard_count`` shards in parallel."""
+    export_record = ExportedAnnotationFile.objects.get(pk=export_id)
+    with export_task_status(export_record):
+        progress = ExportProgress(export_record, self)
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}")
+        # Shared by all shards; see `export_annotations_task`
+        watermark = now() - DELTA_EXPORT_OVERLAP
+        since = _resolve_since(
+            filters, export_watermark_key("annotations", export_format, annotation_types, filters)
+        )
+        progress.set_total(count_annotation_rows(filters, annotation_types, since))
+        shards = plan_export_shards(export_record, filters, shard_count)
+
+        since = since.isoformat() if since is not None else None
+        stitch = stitch_annotations_export_task.si(
+            export_id, filters, annotation_types, export_format, since, watermark.isoformat()
+        )
+        chord(
+            export_annotations_shard_task.si(
+                shard.id, filters, annotation_types, export_format, since
+            )
+            for shard in shards
+        )(stitch.on_error(fail_sharded_export_task.si(export_id)))
+
+
+@app.task(bind=True)
+def export_annotations_shard_task(  # noqa: PLR0913
+    self,
+    shard_id: int,
+    filters: dict,
+    annotation_types: list,
+    export_format: str,
+    since: str | None,
+):
+    shard = ExportShard.objects.select_related("export").get(pk=shard_id)
+    shard.status = ExportShard.Status.RUNNING
+    shard.save()
+
+    if shard.first_recording_id is not None:
+        filters = {
+            **filters,
+            "recording_id_range": [shard.first_recording_id, shard.last_recording_id],
+        }
+    write = _write_parquet_annotations if export_format == "parquet" else _write_csv_annotations
+    try:
+        # Rows are counted towards the export, shared with the other shards
+        progress = ExportProgress(shard.export, self)
+        with ZipExportWriter() as part:
+            row_counts = write(
+                part, filters, annotation_types, parse_datetime(since) if since else None, progress
+            )
+            progress.flush()
+            part.save(shard.file, f"export-{shard.export_id}-shard-{shard.index}.zip")
+    except ExportCancelledError:
+        logger.info("Export %s was cancelled", shard.export_id)
+        shard.status = ExportShard.Status.CANCELLED
+        shard.save()
+        return None
+    except Exception:
+        shard.status = ExportShard.Status.FAILED
+        shard.save()
+        raise
+
+    shard.row_counts = row_counts
+    shard.status = ExportShard.Status.COMPLETE
+    shard.save()
+    return row_counts
+
+
+@app.task(bind=True)
+def stitch_annotations_export_task(  # noqa: PLR0913
+    self,
+    export_id: int,
+    filters: dict,
+    annotation_types: list,
+    export_format: str,
+    since: str | None,
+    watermark: str,
+):
+    """Combine the parts written by the shards of an export into its file."""
+    export_record = ExportedAnnotationFile.objects.get(pk=export_id)
+    shards = list(export_record.shards.order_by("index"))
+    with export_task_status(export_record):
+        try:
+            progress = ExportProgress(export_record, self)
+            _stitch_export(export_record, export_format, since, watermark, shards, progress)
+        finally:
+            _delete_shard_files(shards)
+        ExportWatermark.objects.update_or_create(
+            key=export_watermark_key("annotations", export_format, annotation_types, filters),
+            defaults={"watermark": parse_datetime(watermark)},
+        )
+
+
+def _stitch_export(export_record, export_format, since, watermark, shards, progress):  # noqa: PLR0913
+    with ZipExportWriter() as export, contextlib.ExitStack() as stack:
+        parts = []
+        for shard in shards:
+            source = stack.enter_context(shard.file.open("rb"))
+            parts.append((shard.index, stack.enter_context(zipfile.ZipFile(source))))
+        parquet_parts = _stitch_parts(export, parts)
+
+        row_counts = {}
+        for shard in shards:
+            for table, count in shard.row_counts.items():
+                row_counts[table] = row_counts.get(table, 0) + count
+        manifest = annotations_manifest(
+            export_format,
+            parse_datetime(since) if since else None,
+            parse_datetime(watermark),
+            row_counts,
+        )
+        manifest["shards"] = len(shards)
+        if export_format == "parquet":
+            manifest["parts"] = parquet_parts
+        export.write_json("export_manifest.json", manifest)
+        _save_export(export_record, export, f"export-{export_record.pk}.zip", progress)
+
+
+@app.task(bind=True)
+def fail_sharded_export_task(self, export_id: int):
+    """Mark a sharded export as failed after one of its tasks failed."""
+    logger.error("Sharded export %s failed", export_id)
+    ExportedAnnotationFile.objects.filter(pk=export_id, status="pending").update(status="failed")
+    _delete_shard_files(ExportShard.objects.filter(export_id=export_id))
+
+
+def _delete_shard_files(shards):
+    for shard in shards:
+        if shard.file:
+            shard.file.delete()
+
+
+def _stitch_parts(export, parts):
+    """Copy the members of the shard ZIPs ``parts`` into ``export``.
+
+    Return the names of the Parquet files of each table.
+    """
+    names = dict.fromkeys(name for _index, part in parts for name in part.namelist())
+    parquet_parts = {}
+    for name in names:
+        sources = [(index, part) for index, part in parts if name in part.NameToInfo]
+        if name.endswith(".csv"):
+            _concatenate_csv(export, name, [part for _index, part in sources])
+        elif name.endswith(".json"):
+            _concatenate_json_arrays(export, name, [part for _index, part in sources])
+        else:
+            table = name.removesuffix(".parquet")
+            parquet_parts[table] = []
+            for index, part in sources:
+                member = f"{table}/part-{index:05d}.parquet"
+                export.write_file(member, part.open(name), compress=False)
+                parquet_parts[table].append(member)
+    return parquet_parts
+
+
+def _concatenate_csv(export, name, parts):
+    with export.open_text(name) as stream:
+        for i, part in enumerate(parts):
+            with io.TextIOWrapper(part.open(name), encoding="utf-8", newline="") as source:
+                header = source.readline()
+                if i == 0:
+                    stream.write(header)
+                shutil.copyfileobj(source, stream, _COPY_BUFFER_SIZE)
+
+
+def _concatenate_json_arrays(export, name, parts):
+    with export.json_array(name) as array:
+        for part in parts:
+            with io.TextIOWrapper(part.open(name), encoding="utf-8") as source:
+                # `JSONArrayWriter` writes the brackets and each item on their own lines
+                for line in source:
+                    item = line.rstrip("\n").removesuffix(",")
+                    if item not in {"[", "]", "[]"}:
+                        array.append_json(item)
@@ -4,7 +4,14 @@ from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 import factory.django
 
-from bats_ai.core.models import UserProfile, VettingDetails
+from bats_ai.core.models import (
+    Annotations,
+    Recording,
+    RecordingAnnotation,
+    Species,
+    UserProfile,
+    VettingDetails,
+)
 
 
 @factory.django.mute_signals(post_save)
@@ -44,3 +51,49 @@ class VettingDetailsFactory(factory.django.DjangoModelFactory[VettingDetails]):
 
     user = factory.SubFactory(UserFactory)
     reference_materials = factory.Faker("paragraph", nb_sentences=3)
+
+
+class SpeciesFactory(factory.django.DjangoModelFactory[Species]):
+    class Meta:
+        model = Species
+
+    species_code = factory.Sequence(lambda n: f"SP{n:02d}")
+    common_name = factory.Faker("word")
+
+
+class RecordingFactory(factory.django.DjangoModelFactory[Recording]):
+    class Meta:
+        model = Recording
+
+    name = factory.Faker("file_name", extension="wav")
+    audio_file = factory.django.FileField(filename="recording.wav")
+    owner = factory.SubFactory(UserFactory)
+
+
+class AnnotationsFactory(factory.django.DjangoModelFactory[Annotations]):
+    class Meta:
+        model = Annotations
+
+    recording = factory.SubFactory(RecordingFactory)
+    owner = factory.SubFactory(UserFactory)
+    start_time = 0
+    end_time = 10
+    low_freq = 20_000
+    high_freq = 60_000
+
+
+class RecordingAnnotationFactory(factory.django.DjangoModelFactory[RecordingAnnotation]):
+    class Meta:
+        model = RecordingAnnotation
+        skip_postgeneration_save = True
+
+    recording = factory.SubFactory(RecordingFactory)
+    owner = factory.SubFactory(UserFactory)
+    model = "User Defined"
+
+    @factory.post_generation
+    def species(self, create, extracted, **kwargs):
+        if not create or not extracted:
+            return
+        for order, species in enumerate(extracted):
+            self.recordingannotationspecies_set.create(species=species, order=order)
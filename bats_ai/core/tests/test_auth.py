@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+from datetime import timedelta
 from typing import TYPE_CHECKING
 
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+from oauth2_provider.models import AccessToken
 import pytest
 
+from bats_ai.core.utils.token_auth import _cache_key
+
 from .factories import SuperuserFactory, UserFactory
 
 if TYPE_CHECKING:
@@ -43,3 +50,63 @@ def test_auth_unverified_superuser(api_client: TestClient):
     user = SuperuserFactory(profile__verified=False)
     resp = api_client.get("configuration/me", user=user)
     assert resp.status_code == 200
+
+
+@pytest.fixture
+def access_token():
+    user = UserFactory(profile__verified=True)
+    return AccessToken.objects.create(
+        user=user,
+        token=get_random_string(32),
+        expires=timezone.now() + timedelta(hours=1),
+    )
+
+
+@pytest.mark.django_db
+def test_auth_bearer_token_revoked(
+    client: Client, access_token: AccessToken, django_capture_on_commit_callbacks
+):
+    headers = {"authorization": f"Bearer {access_token.token}"}
+    assert client.get("/api/v1/configuration/me", headers=headers).status_code == 200
+
+    # The cached identity is dropped when the revocation commits
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        access_token.revoke()
+    assert len(callbacks) == 1
+
+    assert client.get("/api/v1/configuration/me", headers=headers).status_code == 401
+
+
+@pytest.mark.django_db
+def test_auth_bearer_token_profile_unverified(
+    client: Client, access_token: AccessToken, django_capture_on_commit_callbacks
+):
+    headers = {"authorization": f"Bearer {access_token.token}"}
+    assert client.get("/api/v1/configuration/me", headers=headers).status_code == 200
+
+    profile = access_token.user.profile
+    profile.verified = False
+    with django_capture_on_commit_callbacks(execute=True):
+        profile.save()
+
+    assert client.get("/api/v1/configuration/me", headers=headers).status_code == 401
+
+
+@pytest.mark.django_db
+def test_auth_bearer_token_expired(client: Client, access_token: AccessToken):
+    access_token.expires = timezone.now() - timedelta(seconds=1)
+    access_token.save()
+    headers = {"authorization": f"Bearer {access_token.token}"}
+
+    assert client.get("/api/v1/configuration/me", headers=headers).status_code == 401
+
+
+@pytest.mark.django_db
+def test_auth_bearer_token_not_shared_through_per_process_cache(
+    client: Client, access_token: AccessToken
+):
+    headers = {"authorization": f"Bearer {access_token.token}"}
+    assert client.get("/api/v1/configuration/me", headers=headers).status_code == 200
+
+    # Other processes would never see an invalidation of the default locmem cache
+    assert cache.get(_cache_key(access_token.token)) is None
@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+import csv
+from datetime import timedelta
+import io
+import json
+from typing import TYPE_CHECKING
+import zipfile
+
+from django.contrib.gis.geos import LineString, Point, Polygon
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+import pytest
+
+from bats_ai.core.models import (
+    Annotations,
+    AnnotationTombstone,
+    ExportedAnnotationFile,
+    ExportShard,
+    ExportWatermark,
+    PulseMetadata,
+    RecordingTag,
+)
+from bats_ai.core.tasks.export_task import (
+    TAG_SUMMARY_EXPORT_SCHEMA_VERSION,
+    export_annotations_task,
+    export_pulse_features_task,
+    export_recording_annotation_hierarchy_task,
+    export_tag_annotation_summary_task,
+)
+from bats_ai.core.tasks.sharded_export_task import (
+    export_annotations_shard_task,
+    plan_export_shards,
+    stitch_annotations_export_task,
+)
+from bats_ai.core.utils.zip_export import ZipExportWriter
+
+from .factories import (
+    AnnotationsFactory,
+    RecordingAnnotationFactory,
+    RecordingFactory,
+    SpeciesFactory,
+    SuperuserFactory,
+    UserFactory,
+)
+
+if TYPE_CHECKING:
+    from ninja.testing import TestClient
+
+    from bats_ai.core.models import Species
+
+
+def _read_zip(export: ExportedAnnotationFile) -> dict[str, str]:
+    with export.file.open("rb") as f, zipfile.ZipFile(io.BytesIO(f.read())) as zipf:
+        return {name: zipf.read(name).decode() for name in zipf.namelist()}
+
+
+@pytest.mark.django_db
+def test_export_recording_annotation_hierarchy_task():
+    species: Species = SpeciesFactory.create()
+    recording = RecordingFactory.create()
+    RecordingAnnotationFactory.create(recording=recording, submitted=True, species=[species])
+    RecordingAnnotationFactory.create(recording=recording)
+    RecordingAnnotationFactory.create()
+    export = ExportedAnnotationFile.objects.create(expires_at=now())
+
+    export_recording_annotation_hierarchy_task(export.id)
+
+    export.refresh_from_db()
+    assert export.status == "complete"
+    files = _read_zip(export)
+    manifest = json.loads(files["export_manifest.json"])
+    assert manifest["recording_count"] == 2
+    assert manifest["annotation_count"] == 3
+    assert manifest["submitted_annotation_count"] == 1
+
+    recordings = json.loads(files["recording_annotations.json"])["recordings"]
+    assert recordings[0]["recording_id"] == recording.id
+    assert recordings[0]["submitted_annotations"] == 1
+    assert recordings[0]["annotations"][0]["species_codes"] == [species.species_code]
+    assert len(json.loads(files["recording_annotations_flat.json"])) == 3
+    assert len(list(csv.DictReader(io.StringIO(files["recording_annotations_flat.csv"])))) == 3
+
+
+@pytest.mark.django_db
+def test_export_recording_annotation_hierarchy_task_parquet():
+    pq = pytest.importorskip("pyarrow.parquet")
+    species: Species = SpeciesFactory.create()
+    annotation = RecordingAnnotationFactory.create(
+        species=[species], additional_data={"source": "test"}
+    )
+    export = ExportedAnnotationFile.objects.create(expires_at=now())
+
+    export_recording_annotation_hierarchy_task(export.id, "parquet")
+
+    export.refresh_from_db()
+    with export.file.open("rb") as f, zipfile.ZipFile(io.BytesIO(f.read())) as zipf:
+        manifest = json.loads(zipf.read("export_manifest.json"))
+        table = pq.read_table(io.BytesIO(zipf.read("recording_annotations.parquet")))
+    assert manifest["format"] == "parquet"
+    assert manifest["schema_version"] == 1
+    rows = table.to_pylist()
+    assert len(rows) == 1
+    assert rows[0]["recording_id"] == annotation.recording_id
+    assert rows[0]["species_codes"] == [species.species_code]
+    assert rows[0]["created"] == annotation.created
+    assert json.loads(rows[0]["additional_data"]) == {"source": "test"}
+
+
+@pytest.mark.django_db
+def test_export_tag_annotation_summary_task():
+    owner, annotator, idle = UserFactory.create_batch(3)
+    tag = RecordingTag.objects.create(user=owner, text="survey")
+    RecordingTag.objects.create(user=owner, text="unused")
+    submitted, unsubmitted, untouched = RecordingFactory.create_batch(3)
+    for recording in (submitted, unsubmitted, untouched):
+        recording.tags.add(tag)
+    RecordingAnnotationFactory.create(recording=submitted, owner=annotator, submitted=True)
+    RecordingAnnotationFactory.create(recording=submitted, owner=annotator, submitted=True)
+    RecordingAnnotationFactory.create(recording=unsubmitted, owner=annotator, submitted=False)
+    RecordingAnnotationFactory.create(recording=unsubmitted, owner=owner, submitted=True)
+    export = ExportedAnnotationFile.objects.create(expires_at=now())
+
+    export_tag_annotation_summary_task(export.id)
+
+    export.refresh_from_db()
+    files = _read_zip(export)
+    tag_rows = list(csv.DictReader(io.StringIO(files["tag_summary.csv"])))
+    assert [row["tag_text"] for row in tag_rows] == ["survey", "unused"]
+    assert tag_rows[0]["total_recordings"] == "3"
+    assert tag_rows[0]["annotated_recordings"] == "2"
+    assert tag_rows[0]["submitted_recordings"] == "2"
+    assert tag_rows[0]["unsubmitted_recordings"] == "1"
+    assert tag_rows[0]["remaining_recordings"] == "1"
+    assert tag_rows[1]["total_recordings"] == "0"
+
+    # Only users who annotated a tag's recordings get a row for it
+    user_rows = {
+        (row["tag_text"], row["username"]): row
+        for row in csv.DictReader(io.StringIO(files["tag_summary_by_user.csv"]))
+    }
+    assert user_rows.keys() == {("survey", owner.username), ("survey", annotator.username)}
+    assert user_rows["survey", annotator.username]["annotated_recordings"] == "2"
+    assert user_rows["survey", annotator.username]["submitted_recordings"] == "1"
+    assert user_rows["survey", annotator.username]["remaining_recordings"] == "1"
+    assert user_rows["survey", owner.username]["annotated_recordings"] == "1"
+
+    users = {
+        user["username"]: user for user in json.loads(files["tag_annotation_summary.json"])["users"]
+    }
+    assert users[idle.username]["tags"] == []
+    assert users[annotator.username]["tags"][0]["annotated_recordings"] == 2
+    manifest = json.loads(files["export_manifest.json"])
+    assert manifest["schema_version"] == TAG_SUMMARY_EXPORT_SCHEMA_VERSION
+
+
+@pytest.mark.django_db
+def test_export_tag_annotation_summary_task_sparse():
+    users = UserFactory.create_batch(4)
+    tags = [RecordingTag.objects.create(user=users[0], text=f"tag {i}") for i in range(5)]
+    recording = RecordingFactory.create()
+    recording.tags.add(*tags[:2])
+    RecordingAnnotationFactory.create(recording=recording, owner=users[1])
+    export = ExportedAnnotationFile.objects.create(expires_at=now())
+
+    export_tag_annotation_summary_task(export.id)
+
+    export.refresh_from_db()
+    files = _read_zip(export)
+    # One row per tag, and one per annotated (tag, user) pair, not tags x users
+    assert len(list(csv.DictReader(io.StringIO(files["tag_summary.csv"])))) == 5
+    user_rows = list(csv.DictReader(io.StringIO(files["tag_summary_by_user.csv"])))
+    assert [(row["tag_text"], row["username"]) for row in user_rows] == [
+        ("tag 0", users[1].username),
+        ("tag 1", users[1].username),
+    ]
+    json_users = json.loads(files["tag_annotation_summary.json"])["users"]
+    assert {user["username"] for user in json_users} >= {user.username for user in users}
+    assert sum(len(user["tags"]) for user in json_users) == 2
+
+
+@pytest.mark.django_db
+def test_export_annotations_task_delta():
+    unchanged = AnnotationsFactory.create()
+    changed = AnnotationsFactory.create()
+    deleted = AnnotationsFactory.create()
+    Annotations.objects.filter(pk=unchanged.pk).update(modified=now() - timedelta(days=2))
+    deleted_id = deleted.pk
+    deleted.delete()
+    export = ExportedAnnotationFile.objects.create(expires_at=now())
+    filters = {"since": (now() - timedelta(days=1)).isoformat()}
+
+    export_annotations_task(filters, ["pulse"], export.id)
+
+    export.refresh_from_db()
+    files = _read_zip(export)
+    manifest = json.loads(files["export_manifest.json"])
+    assert manifest["since"] == filters["since"]
+    assert manifest["tombstones_complete"] is True
+    assert [row["id"] for row in json.loads(files["pulse_annotations.json"])] == [changed.pk]
+    tombstones = json.loads(files["deleted_annotations.json"])
+    assert [(t["annotation_type"], t["annotation_id"]) for t in tombstones] == [
+        ("pulse", deleted_id)
+    ]
+    # The stored watermark is shared by exports with the same types and filters
+    assert ExportWatermark.objects.get().watermark.isoformat() == manifest["watermark"]
+
+
+@pytest.mark.django_db
+def test_annotation_tombstones_on_cascading_delete():
+    recording = RecordingFactory.create()
+    pulses = AnnotationsFactory.create_batch(3, recording=recording)
+    recording_annotation = RecordingAnnotationFactory.create(recording=recording)
+
+    # Tombstones are written by triggers, not by one query per annotation
+    with CaptureQueriesContext(connection) as queries:
+        recording.delete()
+
+    assert not [query for query in queries if "core_annotationtombstone" in query["sql"]]
+
+    assert sorted(
+        AnnotationTombstone.objects.values_list("annotation_type", "annotation_id")
+    ) == sorted(
+        [("pulse", pulse.pk) for pulse in pulses] + [("recording", recording_annotation.pk)]
+    )
+
+
+@pytest.mark.django_db
+def test_export_annotations_task_since_last_export():
+    AnnotationsFactory.create()
+    first = ExportedAnnotationFile.objects.create(expires_at=now())
+    export_annotations_task({"since_last_export": True}, ["pulse"], first.id)
+
+    first.refresh_from_db()
+    manifest = json.loads(_read_zip(first)["export_manifest.json"])
+    assert manifest["since"] is None
+    assert manifest["row_counts"] == {"pulse_annotations": 1}
+    first_watermark = ExportWatermark.objects.get().watermark
+
+    second = ExportedAnnotationFile.objects.create(expires_at=now())
+    export_annotations_task({"since_last_export": True}, ["pulse"], second.id)
+
+    second.refresh_from_db()
+    manifest = json.loads(_read_zip(second)["export_manifest.json"])
+    assert manifest["since"] == first_watermark.isoformat()
+    assert "deleted_annotations" in manifest["row_counts"]
+
+
+@pytest.mark.django_db
+def test_export_annotations_task_since_last_export_per_format():
+    pytest.importorskip("pyarrow.parquet")
+    AnnotationsFactory.create()
+    csv_export = ExportedAnnotationFile.objects.create(expires_at=now())
+    export_annotations_task({"since_last_export": True}, ["pulse"], csv_export.id)
+
+    # A Parquet stream with the same filters does not continue from the CSV watermark
+    parquet_export = ExportedAnnotationFile.objects.create(expires_at=now())
+    export_annotations_task({"since_last_export": True}, ["pulse"], parquet_export.id, "parquet")
+
+    parquet_export.refresh_from_db()
+    with parquet_export.file.open("rb") as f, zipfile.ZipFile(io.BytesIO(f.read())) as zipf:
+        manifest = json.loads(zipf.read("export_manifest.json"))
+    assert manifest["since"] is None
+    assert manifest["row_counts"]["pulse_annotations"] == 1
+    assert ExportWatermark.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_export_recording_annotations_species_order():
+    first, second = SpeciesFactory.create_batch(2)
+    annotations = [
+        RecordingAnnotationFactory.create(species=[second, first]),
+        RecordingAnnotationFactory.create(species=[first, second, first]),
+    ]
+    export = ExportedAnnotationFile.objects.create(expires_at=now())
+
+    # The ordered species of every annotation are prefetched in one query
+    with CaptureQueriesContext(connection) as queries:
+        export_annotations_task({}, ["recording"], export.id)
+
+    assert (
+        len(
+            [query for query in queries if 'FROM "core_recordingannotationspecies"' in query["sql"]]
+        )
+        == 1
+    )
+    export.refresh_from_db()
+    rows = json.loads(_read_zip(export)["recording_annotations.json"])
+    assert [(row["id"], row["species"]) for row in rows] == [
+        (annotations[0].pk, [second.common_name, first.common_name]),
+        (annotations[1].pk, [first.common_name, second.common_name, first.common_name]),
+    ]
+
+
+@pytest.mark.django_db
+def test_export_tag_summary_reuses_export(
+    api_client: TestClient, mocker, django_capture_on_commit_callbacks
+):
+    user = SuperuserFactory.create()
+    delay = mocker.patch(
+        "bats_ai.core.views.configuration.export_tag_annotation_summary_task.delay"
+    )
+    RecordingAnnotationFactory.create()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first = api_client.post("configuration/export-tag-summary", user=user)
+        second = api_client.post("configuration/export-tag-summary", user=user)
+
+    # The pending export is shared
+    assert first.data["exportId"] == second.data["exportId"]
+    delay.assert_called_once_with(first.data["exportId"])
+
+    ExportedAnnotationFile.objects.update(status="complete", expires_at=now() + timedelta(days=1))
+    with django_capture_on_commit_callbacks(execute=True):
+        reused = api_client.post("configuration/export-tag-summary", user=user)
+    assert reused.data["exportId"] == first.data["exportId"]
+
+    RecordingAnnotationFactory.create()
+    with django_capture_on_commit_callbacks(execute=True):
+        changed = api_client.post("configuration/export-tag-summary", user=user)
+    assert changed.data["exportId"] != first.data["exportId"]
+    assert delay.call_count == 2
+
+
+@pytest.mark.django_db
+def test_export_annotations_sharded():
+    recordings = RecordingFactory.create_batch(3)
+    for recording in recordings:
+        AnnotationsFactory.create_batch(2, recording=recording)
+    export = ExportedAnnotationFile.objects.create(expires_at=now())
+
+    shards = plan_export_shards(export, {}, 2)
+    assert [(shard.first_recording_id, shard.last_recording_id) for shard in shards] == [
+        (recordings[0].pk, recordings[1].pk - 1),
+        (recordings[1].pk, recordings[2].pk),
+    ]
+    for shard in shards:
+        export_annotations_shard_task(shard.id, {}, ["pulse"], "csv", None)
+    stitch_annotations_export_task(export.id, {}, ["pulse"], "csv", None, now().isoformat())
+
+    export.refresh_from_db()
+    assert export.status == "complete"
+    files = _read_zip(export)
+    manifest = json.loads(files["export_manifest.json"])
+    assert manifest["shards"] == 2
+    assert manifest["row_counts"] == {"pulse_annotations": 6}
+    assert len(json.loads(files["pulse_annotations.json"])) == 6
+    assert len(list(csv.DictReader(io.StringIO(files["pulse_annotations.csv"])))) == 6
+    # Shard parts are removed once stitched
+    assert not any(shard.file for shard in ExportShard.objects.all())
+
+
+@pytest.mark.django_db
+def test_export_annotations_task_progress(api_client: TestClient):
+    AnnotationsFactory.create_batch(3)
+    export = ExportedAnnotationFile.objects.create(expires_at=now())
+
+    export_annotations_task({}, ["pulse"], export.id)
+
+    resp = api_client.get(f"export-annotation/{export.id}", user=UserFactory.create())
+    assert resp.status_code == 200
+    assert resp.data["status"] == "complete"
+    assert resp.data["rowsExported"] == 3
+    assert resp.data["rowsTotal"] == 3
+    assert resp.data["percentComplete"] == 100.0
+
+
+@pytest.mark.django_db
+def test_cancel_export(api_client: TestClient):
+    user = UserFactory.create()
+    AnnotationsFactory.create()
+    export = ExportedAnnotationFile.objects.create(expires_at=now())
+
+    resp = api_client.post(f"export-annotation/{export.id}/cancel", user=user)
+    assert resp.status_code == 200
+    assert resp.data["status"] == "cancelled"
+
+    # A task started after the cancellation stops before exporting anything
+    export_annotations_task({}, ["pulse"], export.id)
+    export.refresh_from_db()
+    assert export.status == "cancelled"
+    assert not export.file
+    assert export.rows_exported == 0
+
+    resp = api_client.post(f"export-annotation/{export.id}/cancel", user=user)
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+def test_cancel_export_during_upload(mocker):
+    AnnotationsFactory.create()
+    export = ExportedAnnotationFile.objects.create(expires_at=now())
+    uploaded = []
+    save = ZipExportWriter.save
+
+    def save_and_cancel(writer, field_file, filename):
+        save(writer, field_file, filename)
+        uploaded.append(field_file.name)
+        ExportedAnnotationFile.objects.filter(pk=export.pk).update(
+            status="cancelled", cancel_requested=True
+        )
+
+    mocker.patch.object(ZipExportWriter, "save", autospec=True, side_effect=save_and_cancel)
+
+    export_annotations_task({}, ["pulse"], export.id)
+
+    # The cancellation is kept, and the uploaded file is deleted
+    export.refresh_from_db()
+    assert export.status == "cancelled"
+    assert not export.file
+    assert uploaded
+    assert not export.file.storage.exists(uploaded[0])
+
+
+@pytest.mark.django_db
+def test_export_pulse_features_task():
+    pq = pytest.importorskip("pyarrow.parquet")
+    species: Species = SpeciesFactory.create()
+    recording = RecordingFactory.create()
+    RecordingAnnotationFactory.create(recording=recording, species=[species], submitted=True)
+    # Newer, but not submitted
+    RecordingAnnotationFactory.create(recording=recording)
+    PulseMetadata.objects.create(
+        recording=recording,
+        index=0,
+        bounding_box=Polygon.from_bbox((1.0, 20_000.0, 5.0, 60_000.0)),
+        curve=LineString((1.0, 60_000.0), (3.0, 40_000.0), (5.0, 20_000.0)),
+        char_freq=Point(4.0, 25_000.0),
+        slopes={"slope_avg_khz_per_ms": -10.0},
+    )
+    PulseMetadata.objects.create(
+        recording=recording, index=1, bounding_box=Polygon.from_bbox((8.0, 30_000.0, 9.0, 50_000.0))
+    )
+    export = ExportedAnnotationFile.objects.create(expires_at=now())
+
+    export_pulse_features_task({}, export.id, 5)
+
+    export.refresh_from_db()
+    with export.file.open("rb") as f, zipfile.ZipFile(io.BytesIO(f.read())) as zipf:
+        manifest = json.loads(zipf.read("export_manifest.json"))
+        table = pq.read_table(io.BytesIO(zipf.read(manifest["parts"][0])))
+    assert manifest["row_count"] == 2
+    rows = table.to_pylist()
+    assert rows[0]["duration_ms"] == 4.0
+    assert rows[0]["bandwidth_hz"] == 40_000.0
+    assert rows[0]["char_freq_hz"] == 25_000.0
+    assert rows[0]["slope_avg_khz_per_ms"] == -10.0
+    assert rows[0]["curve_time_ms"] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert rows[0]["curve_frequency_hz"] == [60_000.0, 50_000.0, 40_000.0, 30_000.0, 20_000.0]
+    assert rows[0]["label_species_codes"] == [species.species_code]
+    assert rows[1]["curve_time_ms"] is None
+    assert rows[1]["knee_ms"] is None
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.contrib.gis.geos import Polygon
+import pytest
+
+from bats_ai.core.models import GRTSCells
+from bats_ai.core.utils.grts_index import invalidate_grts_index
+
+from .factories import UserFactory
+
+if TYPE_CHECKING:
+    from ninja.testing import TestClient
+
+
+@pytest.fixture
+def grts_cells():
+    cells = [
+        GRTSCells.objects.create(
+            grts_cell_id=grts_cell_id,
+            sample_frame_id=14,
+            geom_4326=Polygon.from_bbox(bbox),
+        )
+        for grts_cell_id, bbox in [(100, (-78, 38, -77, 39)), (101, (-77, 38, -76, 39))]
+    ]
+    GRTSCells.update_derived_geometry()
+    invalidate_grts_index()
+    yield cells
+    invalidate_grts_index()
+
+
+@pytest.mark.django_db
+def test_get_grid_cell_id(api_client: TestClient, grts_cells):
+    user = UserFactory.create()
+
+    resp = api_client.get("grts/grid_cell_id?latitude=38.5&longitude=-76.5", user=user)
+
+    assert resp.status_code == 200
+    assert resp.json() == {"grid_cell_id": 101}
+
+
+@pytest.mark.django_db
+def test_get_grid_cell_ids(api_client: TestClient, grts_cells):
+    user = UserFactory.create()
+
+    resp = api_client.post(
+        "grts/grid_cell_ids",
+        json={
+            "sample_frame": 14,
+            "points": [
+                {"latitude": 38.5, "longitude": -77.5},
+                {"latitude": 10.0, "longitude": 10.0},
+                {"latitude": 38.5, "longitude": -76.5},
+            ],
+        },
+        user=user,
+    )
+
+    assert resp.status_code == 200
+    assert resp.data == {"grid_cell_ids": [100, None, 101]}
+
+
+@pytest.mark.django_db
+def test_get_cell_center_quadrant(api_client: TestClient, grts_cells):
+    user = UserFactory.create()
+
+    resp = api_client.get("grts/100?quadrant=ne", user=user)
+
+    assert resp.status_code == 200
+    assert resp.json() == pytest.approx({"latitude": 38.75, "longitude": -77.25})
+    assert "max-age" in resp["Cache-Control"]
+
+    resp = api_client.get(
+        "grts/100?quadrant=ne", user=user, headers={"If-None-Match": resp["ETag"]}
+    )
+
+    assert resp.status_code == 304
+
+
+@pytest.mark.django_db
+def test_get_grts_cell_bbox(api_client: TestClient, grts_cells):
+    user = UserFactory.create()
+
+    resp = api_client.get("grts/101/bbox", user=user)
+
+    assert resp.status_code == 200
+    assert resp.json()["geometry"]["coordinates"] == [[-77, 38], [-77, 39], [-76, 39], [-76, 38]]
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+import wave
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import IntegrityError
+from guano import GuanoFile
+import pytest
+
+from bats_ai.core.management.commands.importRecordings import Command
+from bats_ai.core.models import Recording
+from bats_ai.core.utils import recording_import
+
+from .factories import UserFactory
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from django.contrib.auth.models import User
+
+WAV_NAMES = ["a.wav", "b.wav", "c.wav"]
+
+
+def _write_wav(path: Path, latitude: float) -> None:
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(250_000)
+        wav.writeframes(b"\0\0" * 100)
+    guano = GuanoFile(str(path))
+    guano["NABat|Latitude"] = latitude
+    guano["NABat|Longitude"] = -72.5
+    guano["NABat|Activation start time"] = "20240101T120000"
+    guano.write(make_backup=False)
+
+
+@pytest.fixture
+def wav_directory(tmp_path: Path) -> Path:
+    for index, name in enumerate(WAV_NAMES):
+        _write_wav(tmp_path / name, 43.0 + index)
+    return tmp_path
+
+
+@pytest.fixture
+def owner() -> User:
+    return UserFactory.create()
+
+
+@pytest.fixture
+def spectrogram_delay(mocker):
+    return mocker.patch(
+        "bats_ai.core.management.commands.importRecordings.recording_compute_spectrogram.delay"
+    )
+
+
+def _import(directory: Path, owner: User, *args: str) -> None:
+    call_command(
+        "importRecordings", str(directory), "--owner", owner.username, "--workers", "1", *args
+    )
+
+
+def _manifest_paths(directory: Path) -> list[str]:
+    lines = (directory / ".import_manifest.jsonl").read_text().splitlines()
+    return [
+        json.loads(line)["path"] for line in lines if line.startswith("{") and line.endswith("}")
+    ]
+
+
+@pytest.mark.django_db
+def test_import_recordings(wav_directory: Path, owner: User, spectrogram_delay):
+    _import(wav_directory, owner, "--batch-size", "2", "--assign-random-tags")
+
+    recordings = Recording.objects.order_by("name")
+    assert [recording.name for recording in recordings] == WAV_NAMES
+    for recording in recordings:
+        assert recording.owner == owner
+        assert recording.recorded_date.isoformat() == "2024-01-01"
+        # Set by `update_effective_locations` after the batched insert
+        assert recording.effective_location == recording.recording_location
+        assert recording.effective_sample_frame_id is not None
+        assert recording.tags.count() == 1
+        assert default_storage.exists(recording.audio_file.name)
+    assert spectrogram_delay.call_count == len(WAV_NAMES)
+    assert sorted(_manifest_paths(wav_directory)) == WAV_NAMES
+
+
+@pytest.mark.django_db
+def test_import_recordings_resume(wav_directory: Path, owner: User, spectrogram_delay):
+    # A run killed while writing the manifest leaves a partial last line
+    (wav_directory / ".import_manifest.jsonl").write_text(
+        json.dumps({"path": "a.wav", "recording_id": 1}) + '\n{"path": "b.w'
+    )
+
+    _import(wav_directory, owner)
+
+    assert sorted(Recording.objects.values_list("name", flat=True)) == ["b.wav", "c.wav"]
+    assert sorted(_manifest_paths(wav_directory)) == WAV_NAMES
+
+    # Everything is imported now
+    _import(wav_directory, owner)
+    assert Recording.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_import_recordings_failed_insert(
+    wav_directory: Path, owner: User, spectrogram_delay, mocker
+):
+    uploaded = []
+    upload_audio = recording_import._upload_audio
+
+    def record_upload(wav_file):
+        uploaded.append(upload_audio(wav_file))
+        return uploaded[-1]
+
+    mocker.patch.object(recording_import, "_upload_audio", side_effect=record_upload)
+    mocker.patch.object(Command, "_create_recordings", side_effect=IntegrityError("boom"))
+
+    _import(wav_directory, owner)
+
+    assert not Recording.objects.exists()
+    # The uploads of the failed batch are deleted, and a later run retries its files
+    assert len(uploaded) == len(WAV_NAMES)
+    assert not [name for name in uploaded if default_storage.exists(name)]
+    assert _manifest_paths(wav_directory) == []
+    spectrogram_delay.assert_not_called()
@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+from array import array
+import json
+import struct
+from typing import TYPE_CHECKING
+
+from django.contrib.gis.geos import LineString, Point, Polygon
+import pytest
+
+from bats_ai.core.models import (
+    Annotations,
+    CompressedSpectrogram,
+    PulseMetadata,
+    SequenceAnnotations,
+    Spectrogram,
+    SpectrogramImage,
+)
+from bats_ai.core.models.spectrogram_image import images_prefetch
+from bats_ai.core.utils.pulse_columns import PULSE_COLUMNS_CONTENT_TYPE
+
+from .factories import (
+    AnnotationsFactory,
+    RecordingAnnotationFactory,
+    RecordingFactory,
+    SpeciesFactory,
+    UserFactory,
+)
+
+if TYPE_CHECKING:
+    from ninja.testing import TestClient
+
+
+@pytest.mark.django_db
+def test_get_recording_query_count(api_client: TestClient, django_assert_num_queries):
+    recording = RecordingFactory.create()
+    user = recording.owner
+    other_user = UserFactory.create()
+    species = SpeciesFactory.create_batch(3)
+    RecordingAnnotationFactory.create(recording=recording, owner=user, species=species)
+    RecordingAnnotationFactory.create(recording=recording, owner=user, species=species[:1])
+    AnnotationsFactory.create(recording=recording, owner=other_user)
+    # Warm the cached profile used by the API auth check
+    assert user.profile.verified
+
+    # Recording with annotations, then file annotations, then their ordered species
+    with django_assert_num_queries(3):
+        resp = api_client.get(f"recording/{recording.id}/", user=user)
+
+    assert resp.status_code == 200
+    assert resp.data["id"] == recording.id
+    assert resp.data["owner_username"] == user.username
+    assert resp.data["hasSpectrogram"] is False
+    assert resp.data["userAnnotations"] == 2
+    assert resp.data["userMadeAnnotations"] is True
+    assert len(resp.data["fileAnnotations"]) == 2
+    species_codes = {
+        tuple(s["species_code"] for s in annotation["species"])
+        for annotation in resp.data["fileAnnotations"]
+    }
+    assert species_codes == {
+        tuple(s.species_code for s in species),
+        (species[0].species_code,),
+    }
+
+
+@pytest.mark.django_db
+def test_get_recording_not_found(api_client: TestClient):
+    user = UserFactory.create()
+
+    resp = api_client.get("recording/0/", user=user)
+
+    assert resp.status_code == 200
+    assert resp.data == {"error": "Recording not found"}
+
+
+@pytest.mark.django_db
+def test_get_spectrogram_viewer_bundle_not_modified(api_client: TestClient):
+    recording = RecordingFactory.create()
+    user = recording.owner
+    Spectrogram.objects.create(
+        recording=recording,
+        width=100,
+        height=50,
+        duration=1000,
+        frequency_min=0,
+        frequency_max=100_000,
+    )
+    AnnotationsFactory.create(recording=recording, owner=user)
+
+    resp = api_client.get(f"recording/{recording.id}/viewer", user=user)
+
+    assert resp.status_code == 200
+    assert resp.data["compressed"] is None
+    assert len(resp.data["annotations"]) == 1
+    etag = resp["ETag"]
+
+    resp = api_client.get(
+        f"recording/{recording.id}/viewer", user=user, headers={"If-None-Match": etag}
+    )
+
+    assert resp.status_code == 304
+
+    AnnotationsFactory.create(recording=recording, owner=user)
+    resp = api_client.get(
+        f"recording/{recording.id}/viewer", user=user, headers={"If-None-Match": etag}
+    )
+
+    assert resp.status_code == 200
+    assert resp["ETag"] != etag
+    assert len(resp.data["annotations"]) == 2
+
+
+@pytest.mark.django_db
+def test_get_spectrogram_viewer_bundle_etag_changes(api_client: TestClient, mocker):
+    recording = RecordingFactory.create()
+    user = recording.owner
+    Spectrogram.objects.create(
+        recording=recording,
+        width=100,
+        height=50,
+        duration=1000,
+        frequency_min=0,
+        frequency_max=100_000,
+    )
+    pulse = PulseMetadata.objects.create(
+        recording=recording,
+        index=0,
+        bounding_box=Polygon.from_bbox((1.0, 20_000.0, 5.0, 60_000.0)),
+        slopes={"slope_avg_khz_per_ms": -10.0},
+    )
+    etag = api_client.get(f"recording/{recording.id}/viewer", user=user)["ETag"]
+
+    # A recompute updates pulses in place, with the same rows and count
+    PulseMetadata.objects.filter(pk=pulse.pk).update(slopes={"slope_avg_khz_per_ms": -12.0})
+    resp = api_client.get(
+        f"recording/{recording.id}/viewer", user=user, headers={"If-None-Match": etag}
+    )
+
+    assert resp.status_code == 200
+    assert resp["ETag"] != etag
+
+    # Presigned URLs are re-signed in the next storage URL bucket
+    etag = resp["ETag"]
+    mocker.patch(
+        "bats_ai.core.views.recording.storage_url_bucket",
+        return_value=10**9,
+    )
+    resp = api_client.get(
+        f"recording/{recording.id}/viewer", user=user, headers={"If-None-Match": etag}
+    )
+
+    assert resp.status_code == 200
+    assert resp["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_get_pulse_data_columns(api_client: TestClient):
+    recording = RecordingFactory.create()
+    PulseMetadata.objects.create(
+        recording=recording,
+        index=0,
+        bounding_box=Polygon.from_bbox((1.0, 20_000.0, 5.0, 60_000.0)),
+        curve=LineString((1.0, 50_000.0), (2.0, 40_000.0), (3.0, 30_000.0)),
+        char_freq=Point(2.0, 40_000.0),
+        slopes={"slope_avg_khz_per_ms": -10.0},
+    )
+
+    resp = api_client.get(
+        f"recording/{recording.id}/pulse_data",
+        user=recording.owner,
+        headers={"Accept": PULSE_COLUMNS_CONTENT_TYPE},
+    )
+
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == PULSE_COLUMNS_CONTENT_TYPE
+    content = resp.content
+    assert content[:4] == b"BPC1"
+    (header_length,) = struct.unpack("<I", content[4:8])
+    header = json.loads(content[8 : 8 + header_length])
+    body_start = -(-(8 + header_length) // 8) * 8
+    columns = {column["name"]: column for column in header["columns"]}
+    assert header["count"] == 1
+    assert columns["curve"]["shape"] == [3, 2]
+    curve = columns["curve"]
+    values = array("f")
+    values.frombytes(
+        content[body_start + curve["offset"] : body_start + curve["offset"] + curve["length"]]
+    )
+    assert list(values) == [1.0, 50_000.0, 2.0, 40_000.0, 3.0, 30_000.0]
+
+
+@pytest.mark.django_db
+def test_batch_annotations(api_client: TestClient):
+    recording = RecordingFactory.create()
+    user = recording.owner
+    species = SpeciesFactory.create_batch(2)
+    to_update = AnnotationsFactory.create(recording=recording, owner=user)
+    to_delete = AnnotationsFactory.create(recording=recording, owner=user)
+
+    resp = api_client.post(
+        f"recording/{recording.id}/annotations/batch",
+        json={
+            "pulse": {
+                "create": [
+                    {
+                        "start_time": 10,
+                        "end_time": 20,
+                        "low_freq": 30000,
+                        "high_freq": 50000,
+                        "species_ids": [species[0].id, species[1].id],
+                    }
+                ],
+                "update": [
+                    {
+                        "id": to_update.id,
+                        "version": to_update.modified.isoformat(),
+                        "comments": "updated",
+                        "species_ids": [species[1].id],
+                    }
+                ],
+                "delete": [to_delete.id],
+            },
+            "sequence": {"create": [{"start_time": 0, "end_time": 100, "type": "Search"}]},
+        },
+        user=user,
+    )
+
+    assert resp.status_code == 200
+    created_id = resp.data["pulse"]["created"][0]
+    assert resp.data["pulse"]["updated"] == [to_update.id]
+    assert resp.data["pulse"]["deleted"] == [to_delete.id]
+    assert set(Annotations.objects.get(pk=created_id).species.all()) == set(species)
+    to_update.refresh_from_db()
+    assert to_update.comments == "updated"
+    assert list(to_update.species.all()) == [species[1]]
+    assert not Annotations.objects.filter(pk=to_delete.id).exists()
+    sequence = SequenceAnnotations.objects.get(pk=resp.data["sequence"]["created"][0])
+    assert sequence.type == "Search"
+
+
+@pytest.mark.django_db
+def test_batch_annotations_version_conflict(api_client: TestClient):
+    recording = RecordingFactory.create()
+    user = recording.owner
+    annotation = AnnotationsFactory.create(recording=recording, owner=user)
+    stale_version = annotation.modified.isoformat()
+    annotation.comments = "changed elsewhere"
+    annotation.save()
+
+    resp = api_client.post(
+        f"recording/{recording.id}/annotations/batch",
+        json={
+            "pulse": {
+                "create": [{"start_time": 0, "end_time": 1, "low_freq": 1, "high_freq": 2}],
+                "update": [{"id": annotation.id, "version": stale_version, "comments": "mine"}],
+            }
+        },
+        user=user,
+    )
+
+    assert resp.status_code == 409
+    annotation.refresh_from_db()
+    assert annotation.comments == "changed elsewhere"
+    assert Annotations.objects.filter(recording=recording).count() == 1
+
+
+@pytest.mark.django_db
+def test_batch_annotations_naive_version(api_client: TestClient):
+    recording = RecordingFactory.create()
+    user = recording.owner
+    annotation = AnnotationsFactory.create(recording=recording, owner=user)
+
+    resp = api_client.post(
+        f"recording/{recording.id}/annotations/batch",
+        json={
+            "pulse": {
+                "update": [
+                    {
+                        "id": annotation.id,
+                        "version": annotation.modified.replace(tzinfo=None).isoformat(),
+                        "comments": "mine",
+                    }
+                ],
+            }
+        },
+        user=user,
+    )
+
+    assert resp.status_code == 422
+    annotation.refresh_from_db()
+    assert annotation.comments != "mine"
+
+
+@pytest.mark.django_db
+def test_compressed_spectrogram_image_urls(django_assert_num_queries):
+    recording = RecordingFactory.create()
+    spectrogram = Spectrogram.objects.create(
+        recording=recording,
+        width=100,
+        height=50,
+        duration=1000,
+        frequency_min=0,
+        frequency_max=100_000,
+    )
+    compressed = CompressedSpectrogram.objects.create(
+        recording=recording,
+        spectrogram=spectrogram,
+        length=10,
+        starts=[[0.0]],
+        stops=[[1.0]],
+        widths=[[10.0]],
+    )
+    for image_type in ("compressed", "masks", "waveform_compressed"):
+        for index in (1, 0):
+            SpectrogramImage.objects.create(
+                content_object=compressed,
+                type=image_type,
+                index=index,
+                image_file=f"recording_{recording.id}/{image_type}/image_{index}.png",
+            )
+
+    # Without a prefetch, each list only fetches its own type
+    with django_assert_num_queries(1):
+        assert len(compressed.image_url_list) == 2
+
+    compressed = CompressedSpectrogram.objects.prefetch_related(images_prefetch()).get(
+        pk=compressed.pk
+    )
+    # Every image type comes from the prefetched images
+    with django_assert_num_queries(0):
+        urls = [
+            compressed.image_url_list,
+            compressed.mask_url_list,
+            compressed.waveplot_url_list,
+        ]
+
+    for image_type, type_urls in zip(
+        ("compressed", "masks", "waveform_compressed"), urls, strict=True
+    ):
+        assert len(type_urls) == 2
+        assert f"/{image_type}/image_0.png" in type_urls[0]
+        assert f"/{image_type}/image_1.png" in type_urls[1]
+
+    # Adding an image clears the prefetched images
+    compressed.images.create(
+        type="masks", index=2, image_file=f"recording_{recording.id}/masks/image_2.png"
+    )
+    assert len(compressed.mask_url_list) == 3
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from django.contrib.gis.geos import Point, Polygon
+import pytest
+
+from bats_ai.core.models import Configuration, GRTSCells, Recording, Spectrogram
+
+from .factories import RecordingFactory
+
+if TYPE_CHECKING:
+    from django.test import Client
+    from ninja.testing import TestClient
+
+
+@pytest.mark.django_db
+def test_get_recording_locations(client: Client):
+    recording = RecordingFactory.create(recording_location=Point(-77.0, 38.9, srid=4326))
+    user = recording.owner
+    shared = RecordingFactory.create(public=True, recording_location=Point(10.0, 50.0, srid=4326))
+    Spectrogram.objects.create(
+        recording=shared, width=1, height=1, duration=1, frequency_min=0, frequency_max=1
+    )
+    # Shared recordings without a spectrogram and private recordings are hidden
+    RecordingFactory.create(public=True, recording_location=Point(0.0, 0.0, srid=4326))
+    RecordingFactory.create(recording_location=Point(0.0, 0.0, srid=4326))
+    client.force_login(user)
+
+    resp = client.get("/api/v1/recording-locations/")
+
+    assert resp.status_code == 200
+    data = json.loads(b"".join(resp.streaming_content))
+    assert data["type"] == "FeatureCollection"
+    assert [feature["properties"] for feature in data["features"]] == [
+        {"recording_id": recording.id, "filename": recording.audio_file.name},
+        {"recording_id": shared.id, "filename": shared.audio_file.name},
+    ]
+    assert data["features"][0]["geometry"] == {"type": "Point", "coordinates": [-77.0, 38.9]}
+
+
+@pytest.mark.django_db
+def test_get_recording_locations_tile(api_client: TestClient):
+    recording = RecordingFactory.create(recording_location=Point(-77.0, 38.9, srid=4326))
+    # Private recordings of other users are never shown
+    RecordingFactory.create(recording_location=Point(-77.0, 38.9, srid=4326))
+
+    resp = api_client.get("recording-locations/tiles/0/0/0.mvt", user=recording.owner)
+
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "application/vnd.mapbox-vector-tile"
+    assert "private" in resp["Cache-Control"]
+    assert b"recordings" in resp.content
+    assert recording.audio_file.name.encode() in resp.content
+
+    # Zoom 4 tile over the north-western Pacific
+    resp = api_client.get("recording-locations/tiles/4/0/0.mvt", user=recording.owner)
+
+    assert resp.status_code == 200
+    assert resp.content == b""
+
+
+@pytest.mark.django_db
+def test_get_recording_locations_tile_invalid(api_client: TestClient):
+    recording = RecordingFactory.create()
+
+    resp = api_client.get("recording-locations/tiles/1/2/0.mvt", user=recording.owner)
+
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+def test_get_recording_location_clusters(api_client: TestClient):
+    recording = RecordingFactory.create(recording_location=Point(-77.0, 38.9, srid=4326))
+    user = recording.owner
+    RecordingFactory.create(owner=user, recording_location=Point(-77.1, 38.8, srid=4326))
+    far_away = RecordingFactory.create(owner=user, recording_location=Point(10.0, 50.0, srid=4326))
+
+    resp = api_client.get("recording-locations/clusters?zoom=0", user=user)
+
+    assert resp.status_code == 200
+    clusters = sorted(
+        (feature["properties"] for feature in resp.data["features"]),
+        key=lambda properties: properties["count"],
+    )
+    assert clusters == [
+        {"count": 1, "recording_id": far_away.id},
+        {"count": 2, "recording_id": None},
+    ]
+
+    resp = api_client.get("recording-locations/clusters?zoom=12", user=user)
+
+    assert resp.status_code == 200
+    assert len(resp.data["features"]) == 3
+
+
+@pytest.mark.django_db
+def test_recording_effective_location():
+    cell = Polygon.from_bbox((-78.0, 38.0, -76.0, 40.0))
+    GRTSCells.objects.create(
+        grts_cell_id=7, sample_frame_id=20, geom_4326=cell, centroid_4326=cell.centroid
+    )
+    located = RecordingFactory.create(
+        recording_location=Point(10.0, 50.0, srid=4326), grts_cell_id=7, sample_frame_id=19
+    )
+    by_cell = RecordingFactory.create(grts_cell_id=7, sample_frame_id=19)
+    unlocated = RecordingFactory.create(grts_cell_id=8)
+
+    assert located.effective_sample_frame_id == 20
+    assert located.effective_location == Point(10.0, 50.0, srid=4326)
+    assert located.vetting_location == Point(-77.0, 39.0, srid=4326)
+    assert by_cell.effective_location == Point(-77.0, 39.0, srid=4326)
+    assert by_cell.vetting_location == Point(-77.0, 39.0, srid=4326)
+    assert unlocated.effective_sample_frame_id == 14
+    assert unlocated.effective_location is None
+
+    # Rows written without save() are fixed by the SQL backfill
+    Recording.objects.filter(pk=by_cell.pk).update(effective_location=None, vetting_location=None)
+    assert Recording.update_effective_locations(sample_frame_id=20) == 2
+    by_cell.refresh_from_db()
+    assert by_cell.effective_location == Point(-77.0, 39.0, srid=4326)
+    assert by_cell.vetting_location == Point(-77.0, 39.0, srid=4326)
+
+    by_cell.grts_cell_id = None
+    by_cell.save(update_fields=["grts_cell_id"])
+    by_cell.refresh_from_db()
+    assert by_cell.effective_location is None
+
+
+@pytest.mark.django_db
+def test_recording_save_unrelated_update_fields(django_assert_num_queries):
+    recording = RecordingFactory.create(grts_cell_id=7)
+    recording.comments = "checked"
+
+    # Only the UPDATE; the GRTS cell centroid is not looked up again
+    with django_assert_num_queries(1):
+        recording.save(update_fields=["comments"])
+
+
+@pytest.mark.django_db
+def test_get_recording_locations_bbox(client: Client):
+    cell = Polygon.from_bbox((-78.0, 38.0, -76.0, 40.0))
+    GRTSCells.objects.create(
+        grts_cell_id=7, sample_frame_id=14, geom_4326=cell, centroid_4326=cell.centroid
+    )
+    by_cell = RecordingFactory.create(grts_cell_id=7)
+    user = by_cell.owner
+    by_point = RecordingFactory.create(owner=user, recording_location=Point(-77.5, 38.5))
+    RecordingFactory.create(owner=user, recording_location=Point(10.0, 50.0, srid=4326))
+    client.force_login(user)
+
+    resp = client.get("/api/v1/recording-locations/", {"bbox": "-78,38,-76,40"})
+
+    assert resp.status_code == 200
+    data = json.loads(b"".join(resp.streaming_content))
+    assert {feature["properties"]["recording_id"] for feature in data["features"]} == {
+        by_cell.id,
+        by_point.id,
+    }
+
+
+@pytest.mark.django_db
+def test_get_recording_locations_bbox_vetting(client: Client):
+    config = Configuration.objects.first() or Configuration()
+    config.mark_annotations_completed_enabled = True
+    config.save()
+    cell = Polygon.from_bbox((-78.0, 38.0, -76.0, 40.0))
+    GRTSCells.objects.create(
+        grts_cell_id=7, sample_frame_id=14, geom_4326=cell, centroid_4326=cell.centroid
+    )
+    # Plotted at its cell centroid, inside the bbox, although its own point is outside
+    far_point_in_cell = RecordingFactory.create(
+        grts_cell_id=7, recording_location=Point(10.0, 50.0, srid=4326)
+    )
+    user = far_point_in_cell.owner
+    # Plotted at its own point, since it has no cell
+    by_point = RecordingFactory.create(owner=user, recording_location=Point(-77.5, 38.5))
+    # Own point inside the bbox, but plotted at the centroid of a cell outside it
+    outside = Polygon.from_bbox((9.0, 49.0, 11.0, 51.0))
+    GRTSCells.objects.create(
+        grts_cell_id=8, sample_frame_id=14, geom_4326=outside, centroid_4326=outside.centroid
+    )
+    RecordingFactory.create(owner=user, grts_cell_id=8, recording_location=Point(-77.5, 38.5))
+    client.force_login(user)
+
+    resp = client.get("/api/v1/recording-locations/", {"bbox": "-78,38,-76,40"})
+
+    assert resp.status_code == 200
+    data = json.loads(b"".join(resp.streaming_content))
+    features = {
+        feature["properties"]["recording_id"]: feature["geometry"]["coordinates"]
+        for feature in data["features"]
+    }
+    assert features == {far_point_in_cell.id: [-77.0, 39.0], by_point.id: [-77.5, 38.5]}
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from decimal import Decimal
+import json
+
+from django.contrib.gis.geos import Point
+
+from bats_ai.core.renderers import dumps
+
+
+def test_dumps_geometry_as_geojson():
+    data = json.loads(dumps({"location": Point(-77.5, 38.25)}))
+
+    assert data == {"location": {"type": "Point", "coordinates": [-77.5, 38.25]}}
+
+
+def test_dumps_django_types():
+    data = json.loads(
+        dumps(
+            {
+                "created": datetime(2024, 5, 1, 12, 30, tzinfo=UTC),
+                "value": Decimal("1.50"),
+                1: "non-string key",
+            }
+        )
+    )
+
+    assert data == {"created": "2024-05-01T12:30:00Z", "value": "1.50", "1": "non-string key"}
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.contrib.gis.geos import Polygon
+import pytest
+
+from bats_ai.core.models import GRTSCells, SpeciesRange, SpeciesRangeCell
+from bats_ai.core.utils.species_ranges import (
+    rebuild_species_range_cells,
+    rebuild_species_range_pieces,
+)
+
+from .factories import SpeciesFactory
+
+if TYPE_CHECKING:
+    from ninja.testing import TestClient
+
+
+@pytest.mark.django_db
+def test_get_species_in_range(api_client: TestClient):
+    in_range, out_of_range = SpeciesFactory.create_batch(2)
+    SpeciesRange.objects.create(species=in_range, geom=Polygon.from_bbox((-80, 35, -75, 40)))
+    SpeciesRange.objects.create(species=out_of_range, geom=Polygon.from_bbox((0, 0, 5, 5)))
+    GRTSCells.objects.create(
+        grts_cell_id=100, sample_frame_id=14, geom_4326=Polygon.from_bbox((-78, 38, -77, 39))
+    )
+
+    assert rebuild_species_range_pieces() == 2
+    # Display copies are simplified from the full range
+    assert not SpeciesRange.objects.filter(geom_simplified_01__isnull=True).exists()
+    assert rebuild_species_range_cells() == 1
+    assert SpeciesRangeCell.objects.get().species == in_range
+
+    resp = api_client.get("species/?grts_cell_id=100&sample_frame_id=14")
+
+    assert resp.status_code == 200
+    in_range_by_code = {species["species_code"]: species["in_range"] for species in resp.data}
+    assert in_range_by_code == {in_range.species_code: True, out_of_range.species_code: False}
+
+    resp = api_client.get("species/?grts_cell_id=999&sample_frame_id=14")
+
+    assert {species["in_range"] for species in resp.data} == {None}
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+import pytest
+
+from bats_ai.core.utils.storage_utils import storage_url, storage_urls
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_storage_urls_reused(mocker):
+    url_spy = mocker.spy(default_storage, "url")
+
+    first = storage_urls(["a/image_0.png", "a/image_1.png", "a/image_0.png"])
+    second = storage_urls(["a/image_1.png", "a/image_0.png"])
+
+    assert first[0] == first[2]
+    assert second == [first[1], first[0]]
+    assert storage_url("a/image_0.png") == first[0]
+    assert url_spy.call_count == 2
+
+
+def test_storage_urls_new_bucket(mocker):
+    url_spy = mocker.spy(default_storage, "url")
+    mocked_time = mocker.patch("bats_ai.core.utils.storage_utils.time.time", return_value=0)
+
+    storage_url("a/image_0.png")
+    mocked_time.return_value = 10 * 24 * 60 * 60
+    storage_url("a/image_0.png")
+
+    assert url_spy.call_count == 2
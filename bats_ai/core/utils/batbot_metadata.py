@@ -18,6 +18,8 @@ except ImportError as exc:
 from django.conf import settings
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
+from bats_ai.core.constants import PULSE_SLOPE_KEYS
+
 from .contour_utils import process_spectrogram_assets_for_contours
 
 logger = logging.getLogger(__name__)
@@ -309,19 +311,7 @@ class BatBotSlopes(TypedDict, total=False):
     slope_lo_box_khz_per_ms: float | None
 
 
-_SEGMENT_SLOPE_KEYS: tuple[str, ...] = (
-    "slope_at_hi_fc_knee_khz_per_ms",
-    "slope_at_fc_khz_per_ms",
-    "slope_at_low_fc_heel_khz_per_ms",
-    "slope_at_peak_khz_per_ms",
-    "slope_avg_khz_per_ms",
-    "slope_hi_avg_khz_per_ms",
-    "slope_mid_avg_khz_per_ms",
-    "slope_lo_avg_khz_per_ms",
-    "slope_box_khz_per_ms",
-    "slope_hi_box_khz_per_ms",
-    "slope_lo_box_khz_per_ms",
-)
+_SEGMENT_SLOPE_KEYS: tuple[str, ...] = PULSE_SLOPE_KEYS
 
 
 class BatBotMetadataCurve(TypedDict):
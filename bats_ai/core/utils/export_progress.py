@@ -0,0 +1,96 @@
+"""Progress reporting and cooperative cancellation for export tasks.
+
+``ExportProgress`` counts the rows an export task writes. After every
+``EXPORT_CHUNK_SIZE`` rows it adds them to the export's ``rows_exported``, publishes the
+progress through the Celery task's ``update_state``, and raises
+``ExportCancelledError`` once the export has been cancelled, so that tasks stop between
+chunks. Several tasks, such as the shards of one export, may count rows of the same
+export.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+from typing import TYPE_CHECKING
+
+from django.db.models import F
+
+from bats_ai.core.models import ExportedAnnotationFile
+from bats_ai.core.utils.zip_export import EXPORT_CHUNK_SIZE
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from celery import Task
+
+logger = logging.getLogger(__name__)
+
+
+class ExportCancelledError(Exception):
+    """Raised in an export task when its export has been cancelled."""
+
+
+class ExportProgress:
+    """Count the rows written by an export task; raises if the export is cancelled."""
+
+    def __init__(self, export_record: ExportedAnnotationFile, task: Task | None = None):
+        self.export_id = export_record.pk
+        self.rows_exported = export_record.rows_exported
+        self.rows_total = export_record.rows_total
+        self._task = task
+        self._unsaved = 0
+        # Do not start exports that were cancelled while queued
+        self.flush()
+
+    def set_total(self, rows_total: int) -> None:
+        self.rows_total = rows_total
+        ExportedAnnotationFile.objects.filter(pk=self.export_id).update(rows_total=rows_total)
+
+    def track[T](self, rows: Iterable[T]) -> Iterator[T]:
+        """Yield ``rows``, counting each one once it has been written."""
+        for row in rows:
+            yield row
+            self.add()
+
+    def add(self, count: int = 1) -> None:
+        self._unsaved += count
+        if self._unsaved >= EXPORT_CHUNK_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """Save the rows counted so far, report progress, and stop if cancelled."""
+        exports = ExportedAnnotationFile.objects.filter(pk=self.export_id)
+        if self._unsaved:
+            exports.update(rows_exported=F("rows_exported") + self._unsaved)
+            self._unsaved = 0
+        self.rows_exported, self.rows_total, cancel_requested = exports.values_list(
+            "rows_exported", "rows_total", "cancel_requested"
+        ).get()
+
+        # Tasks called directly, as in tests, have no state to update
+        if self._task is not None and self._task.request.id is not None:
+            self._task.update_state(
+                state="Progress",
+                meta={
+                    "export_id": self.export_id,
+                    "rows_exported": self.rows_exported,
+                    "rows_total": self.rows_total,
+                },
+            )
+        if cancel_requested:
+            raise ExportCancelledError(f"Export {self.export_id} was cancelled")
+
+
+@contextlib.contextmanager
+def export_task_status(export_record: ExportedAnnotationFile) -> Iterator[None]:
+    """Mark ``export_record`` as failed if the block raises; stop quietly if cancelled."""
+    try:
+        yield
+    except ExportCancelledError:
+        logger.info("Export %s was cancelled", export_record.pk)
+    except Exception:
+        ExportedAnnotationFile.objects.filter(pk=export_record.pk, status="pending").update(
+            status="failed"
+        )
+        raise
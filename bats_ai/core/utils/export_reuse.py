@@ -0,0 +1,157 @@
+"""Reuse of export files for repeated identical export requests.
+
+Each export stores a key for its type and normalized filters, and a data version: a
+digest of cheap aggregates (latest modification times, tombstones, row counts and
+ids) over the tables it reads. A request is answered with an existing export when one
+with the same key and data version is complete and not about to expire, or still
+pending. A partial unique constraint on pending exports makes concurrent identical
+requests share one task.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from hashlib import sha256
+import json
+from typing import TYPE_CHECKING, Any
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.utils.timezone import now
+
+from bats_ai.core.models import (
+    AnnotationTombstone,
+    ExportedAnnotationFile,
+    PulseMetadata,
+    Recording,
+    RecordingAnnotation,
+    RecordingTag,
+)
+from bats_ai.core.models.nabat import NABatRecordingAnnotation
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from django.db.models import QuerySet
+
+# A reused file must stay downloadable for at least this long
+EXPORT_REUSE_MIN_LIFETIME = timedelta(hours=1)
+# Pending exports older than this are assumed to have died with their worker
+EXPORT_PENDING_TIMEOUT = timedelta(hours=2)
+
+
+def normalize_export_filters(filters: dict[str, Any]) -> dict[str, Any]:
+    """Drop unset filters, sort list values and make dates JSON-serializable."""
+    normalized = {}
+    for key, value in filters.items():
+        if value is None or value == []:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            normalized[key] = sorted(value)
+        else:
+            normalized[key] = value.isoformat() if hasattr(value, "isoformat") else value
+    return normalized
+
+
+def export_filters_key(export_type: str, filters_applied: dict[str, Any]) -> str:
+    payload = json.dumps([export_type, filters_applied], sort_keys=True, default=str)
+    return sha256(payload.encode()).hexdigest()
+
+
+def _stats(queryset: QuerySet, field: str | None = None) -> tuple:
+    """Return ``(row count, max pk[, max field])`` for ``queryset``."""
+    aggregates = {"count": Count("pk"), "last_pk": Max("pk")}
+    if field is not None:
+        aggregates["last_value"] = Max(field)
+    return tuple(queryset.order_by().aggregate(**aggregates).values())
+
+
+def _digest(*stats: Any) -> str:
+    return sha256(repr(stats).encode()).hexdigest()
+
+
+def recording_annotations_data_version() -> str:
+    """Return the data version of the recording annotation hierarchy export.
+
+    Species changes always save their annotation, so they move its ``modified``.
+    """
+    return _digest(
+        RecordingAnnotation.objects.aggregate(Max("modified")),
+        AnnotationTombstone.objects.filter(
+            annotation_type=AnnotationTombstone.AnnotationType.RECORDING
+        ).aggregate(Max("deleted")),
+        Recording.objects.aggregate(Max("modified")),
+    )
+
+
+def tag_summary_data_version() -> str:
+    """Return the data version of the tag annotation summary export.
+
+    Tags, tag assignments and users have no modification time; any addition or removal
+    changes their row count or largest id, but renames go unnoticed.
+    """
+    return _digest(
+        recording_annotations_data_version(),
+        _stats(RecordingTag.objects.all()),
+        _stats(Recording.tags.through.objects.all()),
+        _stats(User.objects.all()),
+    )
+
+
+def pulse_features_data_version() -> str:
+    """Return the data version of the pulse feature export.
+
+    Pulse metadata recomputed in place, with the same rows, goes unnoticed.
+    """
+    return _digest(
+        recording_annotations_data_version(),
+        _stats(PulseMetadata.objects.all()),
+    )
+
+
+def nabat_annotations_data_version() -> str:
+    return _digest(_stats(NABatRecordingAnnotation.objects.all(), "modified"))
+
+
+def get_or_start_export(
+    export_type: str,
+    filters_applied: dict[str, Any],
+    *,
+    data_version: str,
+    start: Callable[[ExportedAnnotationFile], Any],
+) -> ExportedAnnotationFile:
+    """Return a reusable export for these filters and data, or create one and ``start`` it.
+
+    ``start`` is called with the new export once the creating transaction commits,
+    typically to enqueue its task.
+    """
+    filters_key = export_filters_key(export_type, filters_applied)
+    matching = ExportedAnnotationFile.objects.filter(
+        filters_key=filters_key, data_version=data_version
+    )
+    matching.filter(status="pending", created__lt=now() - EXPORT_PENDING_TIMEOUT).update(
+        status="failed"
+    )
+
+    reusable = (
+        matching.filter(status="complete", expires_at__gt=now() + EXPORT_REUSE_MIN_LIFETIME)
+        | matching.filter(status="pending")
+    ).first()
+    if reusable is not None:
+        return reusable
+
+    try:
+        with transaction.atomic():
+            export = ExportedAnnotationFile.objects.create(
+                filters_applied=filters_applied,
+                filters_key=filters_key,
+                data_version=data_version,
+                status="pending",
+                expires_at=now() + timedelta(hours=24),
+            )
+    except IntegrityError:
+        # An identical export was started concurrently
+        return matching.get(status="pending")
+    transaction.on_commit(lambda: start(export))
+    return export
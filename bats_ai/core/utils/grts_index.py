@@ -0,0 +1,120 @@
+"""Process-level spatial index for GRTS point-in-cell lookups.
+
+The GRTS grid is static reference data, so instead of running an ``ST_Contains``
+query per point, each process lazily loads the cells of a sample frame into a
+Shapely ``STRtree`` and answers lookups in memory. ``loadGRTS`` calls
+``invalidate_grts_index`` after changing cells, which bumps a version in the shared
+cache; indexes are also rebuilt after ``GRTS_INDEX_MAX_AGE_SECONDS`` in case the
+cache is per-process.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from django.contrib.gis.db.models.functions import AsWKB
+from django.core.cache import cache
+
+# Shapely is installed with geopandas
+import shapely
+
+from bats_ai.core.models import GRTSCells
+from bats_ai.core.utils.grts_utils import normalize_sample_frame_id
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+GRTS_INDEX_VERSION_KEY = "grts-index-version"
+GRTS_INDEX_MAX_AGE_SECONDS = 3600
+
+
+@dataclass(frozen=True)
+class _SampleFrameIndex:
+    tree: shapely.STRtree
+    cell_ids: list[int]
+    version: int
+    built_at: float
+
+
+_indexes: dict[int, _SampleFrameIndex] = {}
+_lock = threading.Lock()
+
+
+def _build_index(sample_frame_id: int, version: int) -> _SampleFrameIndex:
+    cell_ids: list[int] = []
+    wkbs: list[bytes] = []
+    rows = (
+        GRTSCells.objects.filter(sample_frame_id=sample_frame_id)
+        # The lowest pk wins when cells overlap
+        .order_by("pk")
+        .values_list("grts_cell_id", AsWKB("geom_4326"))
+    )
+    for cell_id, wkb in rows.iterator(chunk_size=5000):
+        cell_ids.append(cell_id)
+        wkbs.append(bytes(wkb))
+    return _SampleFrameIndex(
+        tree=shapely.STRtree(shapely.from_wkb(wkbs)),
+        cell_ids=cell_ids,
+        version=version,
+        built_at=time.monotonic(),
+    )
+
+
+def _is_current(index: _SampleFrameIndex | None, version: int) -> bool:
+    return (
+        index is not None
+        and index.version == version
+        and time.monotonic() - index.built_at <= GRTS_INDEX_MAX_AGE_SECONDS
+    )
+
+
+def _get_index(sample_frame_id: int) -> _SampleFrameIndex:
+    version = cache.get(GRTS_INDEX_VERSION_KEY, 0)
+    index = _indexes.get(sample_frame_id)
+    if not _is_current(index, version):
+        with _lock:
+            # Another thread may have rebuilt it while we waited
+            index = _indexes.get(sample_frame_id)
+            if not _is_current(index, version):
+                index = _indexes[sample_frame_id] = _build_index(sample_frame_id, version)
+    return index
+
+
+def grts_cell_ids_for_points(
+    points: Sequence[tuple[float, float]], sample_frame_id: int | None
+) -> list[int | None]:
+    """Return the GRTS cell ID containing each ``(latitude, longitude)``, or ``None``.
+
+    Matches ``GRTSCells.objects.filter(geom_4326__contains=point, ...)``, with the
+    sample frame normalized by ``normalize_sample_frame_id``.
+    """
+    if not points:
+        return []
+    index = _get_index(normalize_sample_frame_id(sample_frame_id))
+    geometries = shapely.points([(longitude, latitude) for latitude, longitude in points])
+    point_indexes, cell_indexes = index.tree.query(geometries, predicate="within")
+
+    matches: dict[int, int] = {}
+    for point_index, cell_index in zip(point_indexes.tolist(), cell_indexes.tolist(), strict=True):
+        if point_index not in matches or cell_index < matches[point_index]:
+            matches[point_index] = cell_index
+    return [index.cell_ids[matches[i]] if i in matches else None for i in range(len(points))]
+
+
+def grts_cell_id_for_point(
+    latitude: float, longitude: float, sample_frame_id: int | None
+) -> int | None:
+    """Return the GRTS cell ID containing a point; see ``grts_cell_ids_for_points``."""
+    return grts_cell_ids_for_points([(latitude, longitude)], sample_frame_id)[0]
+
+
+def invalidate_grts_index() -> None:
+    """Make every process rebuild its GRTS indexes on the next lookup."""
+    _indexes.clear()
+    try:
+        cache.incr(GRTS_INDEX_VERSION_KEY)
+    except ValueError:
+        cache.set(GRTS_INDEX_VERSION_KEY, 1, timeout=None)
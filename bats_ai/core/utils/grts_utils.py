@@ -1,17 +1,5 @@
 from __future__ import annotations
 
-from django.db.models import Case, F, IntegerField, Value, When
-
-
-def recording_effective_sample_frame_id_case() -> Case:
-    """Return a ``Case`` matching ``normalize_sample_frame_id`` for ``Recording`` rows."""
-    return Case(
-        When(sample_frame_id__isnull=True, then=Value(14)),
-        When(sample_frame_id=19, then=Value(20)),
-        default=F("sample_frame_id"),
-        output_field=IntegerField(),
-    )
-
 
 def normalize_sample_frame_id(sample_frame_id: int | None) -> int | None:
     """Normalize sample frame IDs for AKCAN compatibility.
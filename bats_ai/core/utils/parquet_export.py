@@ -0,0 +1,173 @@
+"""Parquet tables for annotation exports.
+
+Rows are buffered up to ``row_group_size`` and written as one Parquet row group at a
+time, so memory stays bounded by the row group rather than by the export. Lists (such as
+species and curves) and nested values (such as slopes) keep their types instead of being
+flattened to strings as in the CSV exports.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import tempfile
+from typing import TYPE_CHECKING, Any
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError as exc:
+    raise RuntimeError(
+        "Parquet exports require additional dependencies specified by the [tasks] extra."
+    ) from exc
+
+from bats_ai.core.constants import PULSE_SLOPE_KEYS
+from bats_ai.core.utils.zip_export import EXPORT_CHUNK_SIZE
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from bats_ai.core.utils.zip_export import ZipExportWriter
+
+# Bump when a column is renamed, removed or changes type
+PARQUET_EXPORT_SCHEMA_VERSION = 1
+
+_TIMESTAMP = pa.timestamp("us", tz="UTC")
+_POINT = pa.struct([("time_ms", pa.float64()), ("frequency_hz", pa.float64())])
+
+_ANNOTATION_FIELDS = [
+    pa.field("id", pa.int64(), nullable=False),
+    pa.field("recording_id", pa.int64(), nullable=False),
+    pa.field("owner", pa.string()),
+    pa.field("comments", pa.string()),
+    pa.field("created", _TIMESTAMP),
+    pa.field("species", pa.list_(pa.string())),
+]
+
+PULSE_ANNOTATION_SCHEMA = pa.schema(
+    [
+        *_ANNOTATION_FIELDS,
+        pa.field("start_time", pa.float64()),
+        pa.field("end_time", pa.float64()),
+        pa.field("low_freq", pa.float64()),
+        pa.field("high_freq", pa.float64()),
+        pa.field("confidence", pa.float64()),
+    ]
+)
+
+SEQUENCE_ANNOTATION_SCHEMA = pa.schema(
+    [
+        *_ANNOTATION_FIELDS,
+        pa.field("start_time", pa.float64()),
+        pa.field("end_time", pa.float64()),
+    ]
+)
+
+RECORDING_ANNOTATION_SCHEMA = pa.schema(
+    [
+        *_ANNOTATION_FIELDS,
+        pa.field("species_codes", pa.list_(pa.string())),
+        pa.field("model", pa.string()),
+        pa.field("confidence", pa.float64()),
+        pa.field("submitted", pa.bool_()),
+        # Free-form JSON, serialized
+        pa.field("additional_data", pa.string()),
+    ]
+)
+
+# One row per recording annotation, with its recording's metadata
+RECORDING_ANNOTATION_FLAT_SCHEMA = pa.schema(
+    [
+        pa.field("recording_id", pa.int64(), nullable=False),
+        pa.field("filename", pa.string()),
+        pa.field("grts_cell_id", pa.int64()),
+        pa.field("sample_frame_id", pa.int64()),
+        pa.field("spectrogram_url", pa.string()),
+        pa.field("wav_download_url", pa.string()),
+        *(field for field in RECORDING_ANNOTATION_SCHEMA if field.name != "recording_id"),
+    ]
+)
+
+PULSE_METADATA_SCHEMA = pa.schema(
+    [
+        pa.field("id", pa.int64(), nullable=False),
+        pa.field("recording_id", pa.int64(), nullable=False),
+        pa.field("index", pa.int32(), nullable=False),
+        pa.field(
+            "bounding_box",
+            pa.struct(
+                [
+                    ("start_ms", pa.float64()),
+                    ("end_ms", pa.float64()),
+                    ("low_hz", pa.float64()),
+                    ("high_hz", pa.float64()),
+                ]
+            ),
+        ),
+        pa.field("curve", pa.list_(_POINT)),
+        pa.field("char_freq", _POINT),
+        pa.field("knee", _POINT),
+        pa.field("heel", _POINT),
+        pa.field("slopes", pa.struct([(key, pa.float64()) for key in PULSE_SLOPE_KEYS])),
+    ]
+)
+
+TOMBSTONE_SCHEMA = pa.schema(
+    [
+        pa.field("annotation_type", pa.string(), nullable=False),
+        pa.field("annotation_id", pa.int64(), nullable=False),
+        pa.field("recording_id", pa.int64(), nullable=False),
+        pa.field("deleted", _TIMESTAMP, nullable=False),
+    ]
+)
+
+
+class ParquetTableWriter:
+    """Buffer row dicts and write them to a Parquet file one row group at a time."""
+
+    def __init__(self, sink, schema: pa.Schema, *, row_group_size: int):
+        self._writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        self._schema = schema
+        self._row_group_size = row_group_size
+        self._rows: list[dict[str, Any]] = []
+        self.count = 0
+
+    def write(self, row: dict[str, Any]) -> None:
+        self._rows.append(row)
+        self.count += 1
+        if len(self._rows) >= self._row_group_size:
+            self._flush()
+
+    def write_table(self, table: pa.Table) -> None:
+        """Write ``table`` as a row group of its own, after any buffered rows."""
+        self._flush()
+        self._writer.write_table(table)
+        self.count += table.num_rows
+
+    def _flush(self) -> None:
+        if self._rows:
+            self._writer.write_table(pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+@contextlib.contextmanager
+def parquet_table(
+    export: ZipExportWriter,
+    name: str,
+    schema: pa.Schema,
+    *,
+    row_group_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[ParquetTableWriter]:
+    """Write a Parquet member of ``export``; the file is built on disk and stored uncompressed."""
+    sink = tempfile.TemporaryFile()  # noqa: SIM115
+    try:
+        table = ParquetTableWriter(sink, schema, row_group_size=row_group_size)
+        yield table
+        table.close()
+    except BaseException:
+        sink.close()
+        raise
+    export.write_file(name, sink, compress=False)
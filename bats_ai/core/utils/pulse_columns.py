@@ -0,0 +1,127 @@
+"""Packed columnar encoding of ``PulseMetadata`` for binary API responses.
+
+The payload is::
+
+    b"BPC1" | uint32 header length | header JSON | padding | column buffers
+
+All numbers are little-endian. The header lists each column's ``name``, ``dtype``,
+``shape`` and byte ``offset``/``length`` relative to the first column buffer; every
+buffer starts on an 8-byte boundary. Missing points and slopes are NaN.
+
+Columns, for ``n`` pulses with ``m`` curve points in total:
+
+- ``id`` (int64, ``[n]``) and ``index`` (int32, ``[n]``)
+- ``curve_offsets`` (uint32, ``[n + 1]``): pulse ``i`` owns curve rows
+  ``curve_offsets[i]:curve_offsets[i + 1]``
+- ``curve`` (float32, ``[m, 2]``): ``[time_ms, frequency_hz]`` rows
+- ``char_freq``, ``knee``, ``heel`` (float32, ``[n, 2]``): ``[time_ms, frequency_hz]``
+- ``bounding_box`` (float32, ``[n, 4]``): ``[start_ms, end_ms, low_hz, high_hz]``
+- ``slopes`` (float32, ``[n, len(keys)]``): one column per entry of the header's ``keys``
+"""
+
+from __future__ import annotations
+
+from array import array
+import json
+import math
+import struct
+import sys
+from typing import TYPE_CHECKING
+
+from bats_ai.core.constants import PULSE_SLOPE_KEYS
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from bats_ai.core.models import PulseMetadata
+
+PULSE_COLUMNS_CONTENT_TYPE = "application/vnd.batai.pulse-columns"
+PULSE_COLUMNS_MAGIC = b"BPC1"
+PULSE_COLUMNS_VERSION = 1
+
+_DTYPES = {"q": "int64", "i": "int32", "I": "uint32", "f": "float32"}
+_ALIGNMENT = 8
+
+
+def _extend_point(column: array, point) -> None:
+    if point is None:
+        column.extend((math.nan, math.nan))
+    else:
+        column.extend((point.x, point.y))
+
+
+def encode_pulse_columns(pulses: Iterable[PulseMetadata]) -> bytes:
+    """Encode pulses (ordered as given) into the packed columnar format."""
+    ids = array("q")
+    indexes = array("i")
+    curve_offsets = array("I", [0])
+    curve = array("f")
+    char_freq = array("f")
+    knee = array("f")
+    heel = array("f")
+    bounding_box = array("f")
+    slopes = array("f")
+
+    for pulse in pulses:
+        ids.append(pulse.pk)
+        indexes.append(pulse.index)
+        if pulse.curve is not None:
+            for time_ms, frequency_hz in pulse.curve.coords:
+                curve.extend((time_ms, frequency_hz))
+        curve_offsets.append(len(curve) // 2)
+        _extend_point(char_freq, pulse.char_freq)
+        _extend_point(knee, pulse.knee)
+        _extend_point(heel, pulse.heel)
+        # The box is stored as a polygon with time on x and frequency on y
+        min_x, min_y, max_x, max_y = pulse.bounding_box.extent
+        bounding_box.extend((min_x, max_x, min_y, max_y))
+        pulse_slopes = pulse.slopes or {}
+        slopes.extend(
+            math.nan if pulse_slopes.get(key) is None else pulse_slopes[key]
+            for key in PULSE_SLOPE_KEYS
+        )
+
+    count = len(ids)
+    columns = [
+        ("id", ids, [count]),
+        ("index", indexes, [count]),
+        ("curve_offsets", curve_offsets, [count + 1]),
+        ("curve", curve, [len(curve) // 2, 2]),
+        ("char_freq", char_freq, [count, 2]),
+        ("knee", knee, [count, 2]),
+        ("heel", heel, [count, 2]),
+        ("bounding_box", bounding_box, [count, 4]),
+        ("slopes", slopes, [count, len(PULSE_SLOPE_KEYS)]),
+    ]
+
+    buffers: list[bytes] = []
+    column_headers = []
+    offset = 0
+    for name, values, shape in columns:
+        if sys.byteorder == "big":
+            values.byteswap()
+        data = values.tobytes()
+        column_headers.append(
+            {
+                "name": name,
+                "dtype": _DTYPES[values.typecode],
+                "shape": shape,
+                "offset": offset,
+                "length": len(data),
+            }
+        )
+        padding = -len(data) % _ALIGNMENT
+        buffers.append(data + b"\0" * padding)
+        offset += len(data) + padding
+
+    header = json.dumps(
+        {
+            "version": PULSE_COLUMNS_VERSION,
+            "count": count,
+            "keys": list(PULSE_SLOPE_KEYS),
+            "columns": column_headers,
+        }
+    ).encode()
+    prefix = PULSE_COLUMNS_MAGIC + struct.pack("<I", len(header)) + header
+    prefix += b"\0" * (-len(prefix) % _ALIGNMENT)
+    return prefix + b"".join(buffers)
@@ -0,0 +1,173 @@
+"""Feature matrix of ``PulseMetadata`` for model training, one row per pulse.
+
+``pulse_feature_table`` turns a batch of pulses into a ``pyarrow.Table``. Scalar
+features are computed with NumPy over the whole batch: the bounding box with its
+duration and bandwidth, the characteristic frequency, knee and heel points, and one
+column per slope in ``PULSE_SLOPE_KEYS``. Curves are resampled to ``curve_points``
+points evenly spaced in time between their first and last point, as fixed-size lists.
+Missing values are nulls.
+
+Each row also carries its recording's metadata and species labels, passed in by
+recording ID (see ``RECORDING_FEATURE_FIELDS``).
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+try:
+    import numpy as np
+    import pyarrow as pa
+except ImportError as exc:
+    raise RuntimeError(
+        "Pulse feature exports require additional dependencies specified by the [tasks] extra."
+    ) from exc
+
+from bats_ai.core.constants import PULSE_SLOPE_KEYS
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    import numpy.typing as npt
+
+    from bats_ai.core.models import PulseMetadata
+
+# Bump when a column is renamed, removed or changes type
+PULSE_FEATURE_SCHEMA_VERSION = 1
+
+RECORDING_FEATURE_FIELDS = [
+    pa.field("recording_name", pa.string()),
+    pa.field("recorded_date", pa.date32()),
+    pa.field("grts_cell_id", pa.int64()),
+    pa.field("sample_frame_id", pa.int64()),
+    pa.field("latitude", pa.float64()),
+    pa.field("longitude", pa.float64()),
+    # From the recording's latest submitted annotation, or its latest annotation
+    pa.field("label_annotation_id", pa.int64()),
+    pa.field("label_submitted", pa.bool_()),
+    pa.field("label_species_codes", pa.list_(pa.string())),
+]
+
+_POINT_NAMES = ("char_freq", "knee", "heel")
+
+
+def pulse_feature_schema(curve_points: int) -> pa.Schema:
+    return pa.schema(
+        [
+            pa.field("pulse_id", pa.int64(), nullable=False),
+            pa.field("recording_id", pa.int64(), nullable=False),
+            pa.field("index", pa.int32(), nullable=False),
+            *RECORDING_FEATURE_FIELDS,
+            pa.field("start_ms", pa.float32()),
+            pa.field("end_ms", pa.float32()),
+            pa.field("low_hz", pa.float32()),
+            pa.field("high_hz", pa.float32()),
+            pa.field("duration_ms", pa.float32()),
+            pa.field("bandwidth_hz", pa.float32()),
+            *(
+                pa.field(f"{name}_{axis}", pa.float32())
+                for name in _POINT_NAMES
+                for axis in ("ms", "hz")
+            ),
+            *(pa.field(key, pa.float32()) for key in PULSE_SLOPE_KEYS),
+            pa.field("curve_time_ms", pa.list_(pa.float32(), curve_points)),
+            pa.field("curve_frequency_hz", pa.list_(pa.float32(), curve_points)),
+        ]
+    )
+
+
+def _float_column(values: npt.ArrayLike) -> pa.Array:
+    # from_pandas turns NaN into null
+    return pa.array(np.asarray(values, dtype=np.float32), type=pa.float32(), from_pandas=True)
+
+
+def _points(pulses: Sequence[PulseMetadata], name: str) -> npt.NDArray[np.float64]:
+    points = np.full((len(pulses), 2), np.nan)
+    for i, pulse in enumerate(pulses):
+        point = getattr(pulse, name)
+        if point is not None:
+            points[i] = (point.x, point.y)
+    return points
+
+
+def _resampled_curves(
+    pulses: Sequence[PulseMetadata], curve_points: int
+) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.bool_]]:
+    """Return ``[n, 2, curve_points]`` times and frequencies, and which pulses have none."""
+    curves = np.full((len(pulses), 2, curve_points), np.nan, dtype=np.float32)
+    missing = np.ones(len(pulses), dtype=np.bool_)
+    fractions = np.linspace(0.0, 1.0, curve_points)
+    for i, pulse in enumerate(pulses):
+        if pulse.curve is None:
+            continue
+        coords = np.asarray(pulse.curve.coords, dtype=np.float64)
+        times, frequencies = coords[np.argsort(coords[:, 0], kind="stable")].T
+        sample_times = times[0] + (times[-1] - times[0]) * fractions
+        curves[i, 0] = sample_times
+        curves[i, 1] = np.interp(sample_times, times, frequencies)
+        missing[i] = False
+    return curves, missing
+
+
+def _curve_column(
+    values: npt.NDArray[np.float32], missing: npt.NDArray[np.bool_], curve_points: int
+) -> pa.Array:
+    return pa.FixedSizeListArray.from_arrays(
+        pa.array(values.reshape(-1), type=pa.float32()),
+        curve_points,
+        mask=pa.array(missing),
+    )
+
+
+def pulse_feature_table(
+    pulses: Sequence[PulseMetadata],
+    recordings: dict[int, dict[str, Any]],
+    curve_points: int,
+) -> pa.Table:
+    """Return the feature rows of ``pulses``.
+
+    ``recordings`` maps each pulse's ``recording_id`` to its values of the
+    ``RECORDING_FEATURE_FIELDS``.
+    """
+    # The box is stored as a polygon with time on x and frequency on y
+    extents = np.array([pulse.bounding_box.extent for pulse in pulses], dtype=np.float64)
+    start_ms, low_hz, end_ms, high_hz = extents.reshape(-1, 4).T
+    slopes = np.array(
+        [
+            [
+                np.nan if (value := (pulse.slopes or {}).get(key)) is None else value
+                for key in PULSE_SLOPE_KEYS
+            ]
+            for pulse in pulses
+        ],
+        dtype=np.float64,
+    ).reshape(-1, len(PULSE_SLOPE_KEYS))
+    curves, missing_curves = _resampled_curves(pulses, curve_points)
+
+    columns: dict[str, Any] = {
+        "pulse_id": [pulse.pk for pulse in pulses],
+        "recording_id": [pulse.recording_id for pulse in pulses],
+        "index": [pulse.index for pulse in pulses],
+    }
+    for field in RECORDING_FEATURE_FIELDS:
+        columns[field.name] = [recordings[pulse.recording_id][field.name] for pulse in pulses]
+    columns.update(
+        {
+            "start_ms": _float_column(start_ms),
+            "end_ms": _float_column(end_ms),
+            "low_hz": _float_column(low_hz),
+            "high_hz": _float_column(high_hz),
+            "duration_ms": _float_column(end_ms - start_ms),
+            "bandwidth_hz": _float_column(high_hz - low_hz),
+        }
+    )
+    for name in _POINT_NAMES:
+        points = _points(pulses, name)
+        columns[f"{name}_ms"] = _float_column(points[:, 0])
+        columns[f"{name}_hz"] = _float_column(points[:, 1])
+    for i, key in enumerate(PULSE_SLOPE_KEYS):
+        columns[key] = _float_column(slopes[:, i])
+    columns["curve_time_ms"] = _curve_column(curves[:, 0], missing_curves, curve_points)
+    columns["curve_frequency_hz"] = _curve_column(curves[:, 1], missing_curves, curve_points)
+
+    return pa.Table.from_pydict(columns, schema=pulse_feature_schema(curve_points))
@@ -0,0 +1,103 @@
+"""Per-file work of the ``importRecordings`` command, run in worker processes.
+
+``prepare_recording_file`` reads the GUANO metadata of a WAV file and uploads its
+audio to storage, and returns the values of its ``Recording`` fields; the command
+fills in those that need the database, such as the owner and the GRTS cell, and inserts
+the recordings in batches. Nothing is imported from models at module level, so that
+worker processes can import this module before ``init_import_worker`` sets up Django.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+from pathlib import Path
+from typing import Any
+
+import django
+from django.core.files import File
+from django.utils import timezone
+
+from bats_ai.core.utils.guano_utils import extract_guano_metadata
+
+logger = logging.getLogger(__name__)
+
+
+def init_import_worker() -> None:
+    """Set up Django in a worker process started by ``importRecordings``."""
+    django.setup()
+
+
+def _recording_fields(wav_file: Path, metadata: dict) -> tuple[dict[str, Any], list[str]]:
+    fields: dict[str, Any] = {"name": wav_file.name}
+    warnings = []
+
+    if metadata.get("nabat_activation_start_time"):
+        dt = metadata["nabat_activation_start_time"]
+    else:
+        dt = timezone.datetime.fromtimestamp(
+            wav_file.stat().st_mtime, tz=timezone.get_current_timezone()
+        )
+        warnings.append("No activation start time in metadata, using file modification time")
+    fields["recorded_date"] = dt.date()
+    fields["recorded_time"] = dt.time()
+
+    # Built into a Point by the command
+    fields["longitude"] = fields["latitude"] = None
+    if metadata.get("nabat_latitude") and metadata.get("nabat_longitude"):
+        fields["longitude"] = metadata["nabat_longitude"]
+        fields["latitude"] = metadata["nabat_latitude"]
+
+    fields["grts_cell_id"] = None
+    if metadata.get("nabat_grid_cell_grts_id"):
+        with contextlib.suppress(ValueError, TypeError):
+            fields["grts_cell_id"] = int(metadata["nabat_grid_cell_grts_id"])
+    fields["sample_frame_id"] = metadata.get("nabat_sample_frame_id")
+
+    fields["species_list"] = None
+    if metadata.get("nabat_species_list"):
+        fields["species_list"] = ",".join(metadata["nabat_species_list"])
+    fields.update(
+        comments=metadata.get("nabat_comments"),
+        detector=metadata.get("nabat_detector_type"),
+        software=metadata.get("nabat_software_type"),
+        site_name=metadata.get("nabat_site_name"),
+        unusual_occurrences=metadata.get("nabat_unusual_occurrences"),
+    )
+    return fields, warnings
+
+
+def _upload_audio(wav_file: Path) -> str:
+    """Save ``wav_file`` as ``Recording.audio_file`` would; return its storage name."""
+    from bats_ai.core.models import Recording
+
+    field = Recording._meta.get_field("audio_file")
+    with wav_file.open("rb") as f:
+        return field.storage.save(
+            field.generate_filename(None, wav_file.name), File(f), max_length=field.max_length
+        )
+
+
+def prepare_recording_file(path: str) -> dict[str, Any]:
+    """Read the metadata of the WAV file at ``path`` and upload its audio.
+
+    Return ``path``, the ``fields`` of its recording and any ``warnings``, or ``path``
+    and the ``error`` that stopped it.
+    """
+    wav_file = Path(path)
+    try:
+        fields, warnings = _recording_fields(
+            wav_file, extract_guano_metadata(wav_file, check_filename=True)
+        )
+        fields["audio_file"] = _upload_audio(wav_file)
+    except Exception as e:
+        logger.exception("Error preparing %s", path)
+        return {"path": path, "error": str(e)}
+    return {"path": path, "fields": fields, "warnings": warnings}
+
+
+def compute_spectrogram(recording_id: int) -> dict:
+    """Run ``recording_compute_spectrogram`` in this process."""
+    from bats_ai.core.tasks.tasks import recording_compute_spectrogram
+
+    return recording_compute_spectrogram(recording_id)
@@ -0,0 +1,171 @@
+"""Precomputed species range data: subdivided pieces and GRTS cell intersections."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import uuid
+
+from django.contrib.gis.db.models import GeometryField
+from django.db import connection, transaction
+from django.db.models import Func, Max, Min, Value
+
+from bats_ai.core.models import GRTSCells, SpeciesRange, SpeciesRangeCell, SpeciesRangePiece
+
+logger = logging.getLogger(__name__)
+
+# Cells per INSERT ... SELECT; each chunk is one unit of parallel work
+CELL_CHUNK_SIZE = 5000
+# Vertex limit for ST_Subdivide
+RANGE_PIECE_MAX_VERTICES = 256
+# Tolerances (degrees) of the SpeciesRange.geom_simplified_* fields
+SIMPLIFIED_GEOMETRY_TOLERANCES = {
+    "geom_simplified_0001": 0.001,
+    "geom_simplified_001": 0.01,
+    "geom_simplified_01": 0.1,
+}
+
+_INSERT_RANGE_PIECES_SQL = """
+INSERT INTO core_speciesrangepiece (species_id, geom)
+SELECT species_id, ST_Subdivide(ST_MakeValid(geom), %(max_vertices)s)
+FROM core_speciesrange
+WHERE %(species_ids)s::bigint[] IS NULL OR species_id = ANY(%(species_ids)s)
+"""
+
+# Rebuilt cells are staged in an unlogged table, shared by the worker connections
+_CREATE_STAGING_SQL = """
+CREATE UNLOGGED TABLE {staging} (
+    species_id bigint NOT NULL,
+    sample_frame_id integer NOT NULL,
+    grts_cell_id integer NOT NULL
+)
+"""
+
+_STAGE_RANGE_CELLS_SQL = """
+INSERT INTO {staging} (species_id, sample_frame_id, grts_cell_id)
+SELECT DISTINCT piece.species_id, cell.sample_frame_id, cell.grts_cell_id
+FROM core_grtscells AS cell
+JOIN core_speciesrangepiece AS piece ON ST_Intersects(piece.geom, cell.geom_4326)
+WHERE cell.id >= %(start)s AND cell.id < %(stop)s
+    AND cell.sample_frame_id IS NOT NULL
+    AND (%(species_ids)s::bigint[] IS NULL OR piece.species_id = ANY(%(species_ids)s))
+    AND (%(sample_frame_id)s::integer IS NULL OR cell.sample_frame_id = %(sample_frame_id)s)
+"""
+
+_INSERT_RANGE_CELLS_SQL = """
+INSERT INTO core_speciesrangecell (species_id, sample_frame_id, grts_cell_id)
+SELECT DISTINCT species_id, sample_frame_id, grts_cell_id
+FROM {staging}
+ON CONFLICT DO NOTHING
+"""
+
+
+def rebuild_species_range_pieces(*, species_ids: list[int] | None = None) -> int:
+    """Recompute ``SpeciesRangePiece`` rows and simplified display geometries of ranges.
+
+    Run this whenever ``SpeciesRange.geom`` changes, before ``rebuild_species_range_cells``.
+    Return the number of pieces created.
+    """
+    ranges = SpeciesRange.objects.all()
+    pieces = SpeciesRangePiece.objects.all()
+    if species_ids is not None:
+        ranges = ranges.filter(species_id__in=species_ids)
+        pieces = pieces.filter(species_id__in=species_ids)
+
+    with transaction.atomic():
+        pieces.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _INSERT_RANGE_PIECES_SQL,
+                {"species_ids": species_ids, "max_vertices": RANGE_PIECE_MAX_VERTICES},
+            )
+            created = cursor.rowcount
+        ranges.update(
+            **{
+                field: Func(
+                    "geom",
+                    Value(tolerance),
+                    function="ST_SimplifyPreserveTopology",
+                    output_field=GeometryField(srid=4326),
+                )
+                for field, tolerance in SIMPLIFIED_GEOMETRY_TOLERANCES.items()
+            }
+        )
+    logger.info("Created %s species range piece(s)", created)
+    return created
+
+
+def _stage_chunk(staging: str, params: dict, *, close_connection: bool) -> None:
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(_STAGE_RANGE_CELLS_SQL.format(staging=staging), params)
+    finally:
+        if close_connection:
+            # Worker threads get their own connection, which Django won't close for us
+            connection.close()
+
+
+def rebuild_species_range_cells(
+    *,
+    species_ids: list[int] | None = None,
+    sample_frame_id: int | None = None,
+    workers: int = 1,
+) -> int:
+    """Recompute ``SpeciesRangeCell`` rows, optionally for some species or one sample frame.
+
+    Intersections are tested against ``SpeciesRangePiece``, so the pieces of the species
+    in scope must be current.
+    The intersection is split into chunks of ``CELL_CHUNK_SIZE`` cells, run on
+    ``workers`` threads with their own database connections; with one worker it runs
+    on the caller's connection (and transaction). Chunks are written to a staging table,
+    then swapped for the existing rows in scope in one transaction, so readers never
+    see a partial rebuild.
+    Return the number of rows created.
+    """
+    stale = SpeciesRangeCell.objects.all()
+    cells = GRTSCells.objects.all()
+    if species_ids is not None:
+        stale = stale.filter(species_id__in=species_ids)
+    if sample_frame_id is not None:
+        stale = stale.filter(sample_frame_id=sample_frame_id)
+        cells = cells.filter(sample_frame_id=sample_frame_id)
+
+    bounds = cells.aggregate(first=Min("pk"), last=Max("pk"))
+    chunks = []
+    if bounds["first"] is not None:
+        chunks = [
+            {
+                "start": start,
+                "stop": start + CELL_CHUNK_SIZE,
+                "species_ids": species_ids,
+                "sample_frame_id": sample_frame_id,
+            }
+            for start in range(bounds["first"], bounds["last"] + 1, CELL_CHUNK_SIZE)
+        ]
+    if workers > 1 and connection.in_atomic_block:
+        # Threads can't see the uncommitted staging table
+        raise RuntimeError("Parallel rebuilds can't run inside a transaction")
+
+    staging = connection.ops.quote_name(f"core_speciesrangecell_rebuild_{uuid.uuid4().hex}")
+    with connection.cursor() as cursor:
+        cursor.execute(_CREATE_STAGING_SQL.format(staging=staging))
+    try:
+        if workers <= 1:
+            for chunk in chunks:
+                _stage_chunk(staging, chunk, close_connection=False)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(
+                    executor.map(
+                        lambda chunk: _stage_chunk(staging, chunk, close_connection=True), chunks
+                    )
+                )
+        with transaction.atomic(), connection.cursor() as cursor:
+            stale.delete()
+            cursor.execute(_INSERT_RANGE_CELLS_SQL.format(staging=staging))
+            created = cursor.rowcount
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+    logger.info("Created %s species range cell(s) from %s chunk(s)", created, len(chunks))
+    return created
@@ -0,0 +1,78 @@
+"""Cached URL generation for files in the default storage.
+
+Signed URLs are reused through the default cache. They are only identical across
+processes when that cache is shared (``DJANGO_CACHE_URL``). The S3 client always signs
+with the current time, so URLs cannot be made deterministic without the cache.
+"""
+
+from __future__ import annotations
+
+from hashlib import sha256
+import time
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# Cached URLs are always handed out with at least this much signature lifetime left.
+URL_EXPIRY_MARGIN_SECONDS = 300
+
+
+def _url_cache_timeout() -> int:
+    """Return how long a generated URL may be reused, slightly below its signature expiry."""
+    # S3Storage exposes its presigned URL lifetime; other backends use the setting.
+    expiry = getattr(default_storage, "querystring_expire", None)
+    if not expiry:
+        expiry = settings.BATAI_STORAGE_URL_EXPIRY_SECONDS
+    return max(int(expiry) - URL_EXPIRY_MARGIN_SECONDS, 1)
+
+
+def storage_url_bucket() -> int:
+    """Return the current time bucket; ``storage_urls`` hands out new URLs in each bucket."""
+    return int(time.time()) // _url_cache_timeout()
+
+
+def _url_cache_key(name: str, bucket: int) -> str:
+    # Object keys may contain characters memcached rejects, so hash them.
+    digest = sha256(name.encode()).hexdigest()
+    return f"storage-url:{bucket}:{digest}"
+
+
+def storage_urls(names: Iterable[str]) -> list[str]:
+    """Return URLs for ``names`` in order, reusing recently signed URLs.
+
+    URLs are cached per object key in fixed time buckets, so every request within a
+    bucket receives an identical URL (which browsers can cache), as long as the cache
+    is shared between processes. A URL signed at any
+    point in a bucket stays valid for at least ``URL_EXPIRY_MARGIN_SECONDS`` after the
+    bucket ends.
+    """
+    names = list(names)
+    if not names:
+        return []
+    timeout = _url_cache_timeout()
+    bucket = storage_url_bucket()
+    keys = {name: _url_cache_key(name, bucket) for name in names}
+    cached = cache.get_many(keys.values())
+
+    missing: dict[str, str] = {}
+    urls = []
+    for name in names:
+        url = cached.get(keys[name]) or missing.get(keys[name])
+        if url is None:
+            url = default_storage.url(name)
+            missing[keys[name]] = url
+        urls.append(url)
+
+    if missing:
+        cache.set_many(missing, timeout=timeout)
+    return urls
+
+
+def storage_url(name: str) -> str:
+    """Return a URL for a single object key; see ``storage_urls``."""
+    return storage_urls([name])[0]
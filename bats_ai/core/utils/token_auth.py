@@ -0,0 +1,165 @@
+"""Cached resolution of OAuth bearer tokens for API authentication.
+
+Resolving a token normally costs one query for the ``AccessToken`` (joined to its user)
+and another for the user's profile. The result needed by the API auth callables (user
+id, ``verified``, ``is_superuser`` and the token's expiry) is kept in the shared Django
+cache and, for a few seconds, in a per-process dict in front of it. Entries are dropped
+when the token is saved or deleted (which is how revocation happens) and when the user
+or their profile changes, once the transaction commits, so a concurrent request cannot
+cache the old row again; other processes may keep serving their local copy for up to
+``LOCAL_CACHE_SECONDS``.
+
+Invalidation only reaches other processes through a shared cache. With a per-process
+default cache (the ``locmemcache://`` default of ``DJANGO_CACHE_URL``) identities are
+therefore only kept in the local dict, for ``LOCAL_CACHE_SECONDS``. Expired tokens are
+rejected.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from hashlib import sha256
+import time
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from oauth2_provider.models import AccessToken
+
+from bats_ai.core.models import UserProfile
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from datetime import datetime
+
+    from django.http import HttpRequest
+
+LOCAL_CACHE_SECONDS = 5
+# Default cache backends whose entries are private to each process
+_PER_PROCESS_CACHE_BACKENDS = frozenset(
+    {
+        "django.core.cache.backends.dummy.DummyCache",
+        "django.core.cache.backends.locmem.LocMemCache",
+    }
+)
+
+
+@dataclass(frozen=True)
+class TokenUser:
+    user_id: int
+    verified: bool
+    is_superuser: bool
+    expires: datetime | None
+
+
+# Cache key -> (monotonic deadline, identity)
+_local_cache: dict[str, tuple[float, TokenUser]] = {}
+
+
+def _cache_key(token: str) -> str:
+    # Never use the raw token as a cache key; it would be readable from the cache backend.
+    return f"api-token:{sha256(token.encode()).hexdigest()}"
+
+
+def _load_token_user(token: str) -> TokenUser | None:
+    access_token = (
+        AccessToken.objects.select_related("user__profile")
+        .filter(token=token, user__isnull=False)
+        .first()
+    )
+    if access_token is None or access_token.is_expired():
+        return None
+    user = access_token.user
+    profile = getattr(user, "profile", None)
+    return TokenUser(
+        user_id=user.pk,
+        verified=bool(profile and profile.verified),
+        is_superuser=user.is_superuser,
+        expires=access_token.expires,
+    )
+
+
+def _is_expired(token_user: TokenUser) -> bool:
+    return token_user.expires is not None and token_user.expires <= timezone.now()
+
+
+def _shared_cache_enabled() -> bool:
+    return settings.CACHES["default"]["BACKEND"] not in _PER_PROCESS_CACHE_BACKENDS
+
+
+def get_token_user(token: str) -> TokenUser | None:
+    """Return the cached identity for a bearer token, or ``None`` if it is unknown or expired.
+
+    Unknown tokens are not cached, so a token is usable as soon as it is issued.
+    """
+    key = _cache_key(token)
+    now = time.monotonic()
+    local = _local_cache.get(key)
+    if local is not None and local[0] > now and not _is_expired(local[1]):
+        return local[1]
+
+    shared = _shared_cache_enabled()
+    token_user = cache.get(key) if shared else None
+    if token_user is None or _is_expired(token_user):
+        token_user = _load_token_user(token)
+        if token_user is None:
+            _local_cache.pop(key, None)
+            return None
+        if shared:
+            cache.set(key, token_user, timeout=settings.BATAI_TOKEN_AUTH_CACHE_SECONDS)
+    _local_cache[key] = (now + LOCAL_CACHE_SECONDS, token_user)
+    return token_user
+
+
+def authenticate_bearer_token(request: HttpRequest) -> TokenUser | None:
+    """Set ``request.user`` from the request's bearer token, if it has a valid one.
+
+    The user is loaded lazily, so views that only need the auth result never query it.
+    """
+    token = request.headers.get("Authorization", "").replace("Bearer ", "")
+    if len(token) == 0:
+        return None
+    token_user = get_token_user(token)
+    if token_user is not None:
+        request.user = SimpleLazyObject(lambda: User.objects.get(pk=token_user.user_id))
+    return token_user
+
+
+def invalidate_tokens(tokens: Iterable[str]) -> None:
+    """Drop cached identities for ``tokens``."""
+    keys = [_cache_key(token) for token in tokens]
+    for key in keys:
+        _local_cache.pop(key, None)
+    cache.delete_many(keys)
+
+
+def invalidate_user_tokens(user_id: int) -> None:
+    """Drop cached identities for every token belonging to a user."""
+    invalidate_tokens(AccessToken.objects.filter(user_id=user_id).values_list("token", flat=True))
+
+
+@receiver(post_save, sender=AccessToken, dispatch_uid="invalidate_saved_access_token")
+@receiver(post_delete, sender=AccessToken, dispatch_uid="invalidate_deleted_access_token")
+def _invalidate_access_token(sender, instance: AccessToken, **kwargs):
+    token = instance.token
+    transaction.on_commit(lambda: invalidate_tokens([token]))
+
+
+@receiver(post_save, sender=UserProfile, dispatch_uid="invalidate_saved_profile_tokens")
+@receiver(post_delete, sender=UserProfile, dispatch_uid="invalidate_deleted_profile_tokens")
+def _invalidate_profile_tokens(sender, instance: UserProfile, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_user_tokens(user_id))
+
+
+@receiver(post_save, sender=User, dispatch_uid="invalidate_saved_user_tokens")
+def _invalidate_user_tokens(sender, instance: User, created, **kwargs):
+    if not created:
+        user_id = instance.pk
+        transaction.on_commit(lambda: invalidate_user_tokens(user_id))
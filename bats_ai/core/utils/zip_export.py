@@ -0,0 +1,160 @@
+"""Bounded-memory ZIP exports.
+
+``ZipExportWriter`` builds the archive in a temporary file on disk, one member at a time,
+and hands that file to the ``FileField``'s storage. The S3 and MinIO backends upload file
+objects larger than a few MB with multipart uploads, so neither the archive nor its rows
+are ever held in memory as a whole.
+
+A ZIP archive can only have one member open for writing. Members opened while another
+one is open are written to a spooled temporary file instead, and copied into the
+archive once the open member is closed, so CSV and JSON views of the same rows can be
+written in a single pass over a queryset.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import csv
+import io
+import json
+import shutil
+import tempfile
+import time
+from typing import IO, TYPE_CHECKING, Any, Self
+import zipfile
+
+from django.core.files import File
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from django.db.models.fields.files import FieldFile
+
+# Rows fetched per query when iterating export querysets
+EXPORT_CHUNK_SIZE = 2000
+# Spooled members move from memory to disk above this size
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class JSONArrayWriter:
+    """Append items to a JSON array member, one item per line."""
+
+    def __init__(self, stream: IO[str]):
+        self._stream = stream
+        self.count = 0
+
+    def append(self, item: Any) -> None:
+        self.append_json(json.dumps(item))
+
+    def append_json(self, item: str) -> None:
+        """Append an item that is already serialized, on a single line."""
+        self._stream.write(",\n" if self.count else "\n")
+        self._stream.write(item)
+        self.count += 1
+
+
+class ZipExportWriter:
+    """Write a ZIP export incrementally; use as a context manager and finish with ``save``."""
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()  # noqa: SIM115
+        self._zip = zipfile.ZipFile(self._file, "w", zipfile.ZIP_DEFLATED)
+        self._member_open = False
+        # (member name, spooled content, compression)
+        self._pending: list[tuple[str, IO[bytes], int]] = []
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Discard the archive, if it was not saved."""
+        for _name, spool, _compress_type in self._pending:
+            spool.close()
+        self._pending.clear()
+        self._file.close()
+
+    @contextlib.contextmanager
+    def open_text(self, name: str) -> Iterator[IO[str]]:
+        """Open a UTF-8 text member named ``name`` for writing."""
+        if self._member_open:
+            spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)  # noqa: SIM115
+            stream = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+            try:
+                yield stream
+                stream.flush()
+            except BaseException:
+                stream.close()
+                raise
+            stream.detach()
+            self._pending.append((name, spool, zipfile.ZIP_DEFLATED))
+            return
+
+        self._member_open = True
+        try:
+            # force_zip64: the member size is unknown when it is opened
+            member = self._zip.open(name, "w", force_zip64=True)
+            with io.TextIOWrapper(member, encoding="utf-8", newline="") as stream:
+                yield stream
+        finally:
+            self._member_open = False
+        self._write_pending()
+
+    @contextlib.contextmanager
+    def csv_writer(self, name: str, fieldnames: Iterable[str]) -> Iterator[csv.DictWriter]:
+        """Open a CSV member and yield a ``DictWriter`` whose header is already written."""
+        with self.open_text(name) as stream:
+            writer = csv.DictWriter(stream, fieldnames=list(fieldnames))
+            writer.writeheader()
+            yield writer
+
+    @contextlib.contextmanager
+    def json_array(self, name: str, *, key: str | None = None) -> Iterator[JSONArrayWriter]:
+        """Open a JSON member holding an array, or an object with the array under ``key``."""
+        with self.open_text(name) as stream:
+            if key is not None:
+                stream.write(f"{{{json.dumps(key)}: ")
+            stream.write("[")
+            array = JSONArrayWriter(stream)
+            yield array
+            stream.write("\n]" if array.count else "]")
+            if key is not None:
+                stream.write("}")
+
+    def write_json(self, name: str, data: Any, **kwargs) -> None:
+        """Write a small JSON document member in one go."""
+        with self.open_text(name) as stream:
+            stream.write(json.dumps(data, **kwargs))
+
+    def write_file(self, name: str, source: IO[bytes], *, compress: bool = True) -> None:
+        """Copy the binary file ``source`` into member ``name``; ``source`` is closed after.
+
+        Disable ``compress`` for formats that are already compressed, such as Parquet.
+        """
+        source.seek(0)
+        compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        self._pending.append((name, source, compress_type))
+        if not self._member_open:
+            self._write_pending()
+
+    def _write_pending(self) -> None:
+        while self._pending:
+            name, spool, compress_type = self._pending.pop(0)
+            with spool:
+                spool.seek(0)
+                info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+                info.compress_type = compress_type
+                # Same permissions as members opened by name
+                info.external_attr = 0o600 << 16
+                with self._zip.open(info, "w", force_zip64=True) as member:
+                    shutil.copyfileobj(spool, member, _COPY_BUFFER_SIZE)
+
+    def save(self, field_file: FieldFile, filename: str) -> None:
+        """Finish the archive and save it to ``field_file`` (without saving the model)."""
+        self._write_pending()
+        self._zip.close()
+        self._file.seek(0)
+        field_file.save(filename, File(self._file), save=False)
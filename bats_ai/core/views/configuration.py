@@ -1,24 +1,33 @@
 from __future__ import annotations
 
-from datetime import timedelta
 import logging
+from typing import Literal
 
 from django.http import JsonResponse
-from django.utils.timezone import now
 from ninja import Schema
 from ninja.pagination import RouterPaginated
 
-from bats_ai.core.models import Configuration, ExportedAnnotationFile
+from bats_ai.core.models import Configuration
 from bats_ai.core.tasks.export_task import (
+    PULSE_FEATURE_CURVE_POINTS,
+    export_pulse_features_task,
     export_recording_annotation_hierarchy_task,
     export_tag_annotation_summary_task,
 )
+from bats_ai.core.utils.export_reuse import (
+    get_or_start_export,
+    pulse_features_data_version,
+    recording_annotations_data_version,
+    tag_summary_data_version,
+)
 
 logger = logging.getLogger(__name__)
 
 
 router = RouterPaginated()
 
+MAX_PULSE_FEATURE_CURVE_POINTS = 1024
+
 
 # Define schema for the Configuration data
 class ConfigurationSchema(Schema):
@@ -95,12 +104,12 @@ def export_tag_summary(request):
     if not request.user.is_authenticated or not request.user.is_superuser:
         return JsonResponse({"error": "Permission denied"}, status=403)
 
-    export = ExportedAnnotationFile.objects.create(
-        filters_applied={"type": "tag_annotation_summary"},
-        status="pending",
-        expires_at=now() + timedelta(hours=24),
+    export = get_or_start_export(
+        "tag_annotation_summary",
+        {"type": "tag_annotation_summary"},
+        data_version=tag_summary_data_version(),
+        start=lambda export: export_tag_annotation_summary_task.delay(export.id),
     )
-    export_tag_annotation_summary_task.delay(export.id)
     return {"exportId": export.id}
 
 
@@ -108,14 +117,35 @@ def export_tag_summary(request):
     "/export-recording-annotations",
     response=ExportTagSummaryResponse,
 )
-def export_recording_annotations(request):
+def export_recording_annotations(request, export_format: Literal["csv", "parquet"] = "csv"):
     if not request.user.is_authenticated or not request.user.is_superuser:
         return JsonResponse({"error": "Permission denied"}, status=403)
 
-    export = ExportedAnnotationFile.objects.create(
-        filters_applied={"type": "recording_annotation_hierarchy"},
-        status="pending",
-        expires_at=now() + timedelta(hours=24),
+    export = get_or_start_export(
+        "recording_annotation_hierarchy",
+        {"type": "recording_annotation_hierarchy", "format": export_format},
+        data_version=recording_annotations_data_version(),
+        start=lambda export: export_recording_annotation_hierarchy_task.delay(
+            export.id, export_format
+        ),
+    )
+    return {"exportId": export.id}
+
+
+@router.post("/export-pulse-features", response=ExportTagSummaryResponse)
+def export_pulse_features(request, curve_points: int = PULSE_FEATURE_CURVE_POINTS):
+    if not request.user.is_authenticated or not request.user.is_superuser:
+        return JsonResponse({"error": "Permission denied"}, status=403)
+    if not 2 <= curve_points <= MAX_PULSE_FEATURE_CURVE_POINTS:
+        return JsonResponse(
+            {"error": f"curve_points must be between 2 and {MAX_PULSE_FEATURE_CURVE_POINTS}"},
+            status=400,
+        )
+
+    export = get_or_start_export(
+        "pulse_features",
+        {"type": "pulse_features", "curve_points": curve_points},
+        data_version=pulse_features_data_version(),
+        start=lambda export: export_pulse_features_task.delay({}, export.id, curve_points),
     )
-    export_recording_annotation_hierarchy_task.delay(export.id)
     return {"exportId": export.id}
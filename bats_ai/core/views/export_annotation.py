@@ -33,11 +33,18 @@ def _is_recording_annotation_hierarchy_export(
     )
 
 
+def _is_pulse_features_export(export: ExportedAnnotationFile) -> bool:
+    filters_applied = export.filters_applied
+    return isinstance(filters_applied, dict) and filters_applied.get("type") == "pulse_features"
+
+
 def _can_access_export(request, export: ExportedAnnotationFile) -> bool:
     # Tag annotation summary exports include user-level aggregate stats,
     # so only admins can access them.
-    if _is_tag_annotation_summary_export(export) or _is_recording_annotation_hierarchy_export(
-        export
+    if (
+        _is_tag_annotation_summary_export(export)
+        or _is_recording_annotation_hierarchy_export(export)
+        or _is_pulse_features_export(export)
     ):
         return request.user.is_authenticated and request.user.is_superuser
     return True
@@ -49,21 +56,33 @@ class ExportedAnnotationFileSchema(BaseModel):
     downloadUrl: str | None
     created: datetime
     expiresAt: datetime | None
+    rowsExported: int
+    rowsTotal: int | None
+    percentComplete: float | None
+    cancelRequested: bool
 
     model_config = ConfigDict(from_attributes=True)
 
+    @classmethod
+    def from_export(cls, export: ExportedAnnotationFile) -> ExportedAnnotationFileSchema:
+        return cls(
+            id=export.id,
+            status=export.status,
+            downloadUrl=export.download_url if export.status == "complete" else None,
+            created=export.created,
+            expiresAt=export.expires_at,
+            rowsExported=export.rows_exported,
+            rowsTotal=export.rows_total,
+            percentComplete=export.percent_complete,
+            cancelRequested=export.cancel_requested,
+        )
+
 
 @router.get("/", response=list[ExportedAnnotationFileSchema])
 def list_exports(request):
     exports = ExportedAnnotationFile.objects.order_by("-created")
     return [
-        ExportedAnnotationFileSchema(
-            id=e.id,
-            status=e.status,
-            downloadUrl=e.download_url if e.status == "complete" else None,
-            created=e.created,
-            expiresAt=e.expires_at,
-        )
+        ExportedAnnotationFileSchema.from_export(e)
         for e in exports
         if _can_access_export(request, e)
     ]
@@ -74,13 +93,23 @@ def get_export_status(request, export_id: int):
     export = get_object_or_404(ExportedAnnotationFile, pk=export_id)
     if not _can_access_export(request, export):
         return JsonResponse({"error": "Permission denied"}, status=403)
-    return ExportedAnnotationFileSchema(
-        id=export.id,
-        status=export.status,
-        downloadUrl=(export.download_url if export.status == "complete" else None),
-        created=export.created,
-        expiresAt=export.expires_at,
+    return ExportedAnnotationFileSchema.from_export(export)
+
+
+@router.post("/{export_id}/cancel", response=ExportedAnnotationFileSchema)
+def cancel_export(request, export_id: int):
+    export = get_object_or_404(ExportedAnnotationFile, pk=export_id)
+    if not _can_access_export(request, export):
+        return JsonResponse({"error": "Permission denied"}, status=403)
+
+    # The export task stops at its next progress check and removes its partial files
+    cancelled = ExportedAnnotationFile.objects.filter(pk=export_id, status="pending").update(
+        status="cancelled", cancel_requested=True
     )
+    if not cancelled:
+        return JsonResponse({"error": "Only pending exports can be cancelled."}, status=400)
+    export.refresh_from_db()
+    return ExportedAnnotationFileSchema.from_export(export)
 
 
 @router.delete("/{export_id}")
@@ -90,7 +119,7 @@ def delete_export(request, export_id: int):
         return JsonResponse({"error": "Permission denied"}, status=403)
 
     # Optional: block deleting exports still in progress
-    if export.status not in ("complete", "failed", "expired"):
+    if export.status not in ("complete", "failed", "cancelled", "expired"):
         return JsonResponse(
             {"error": "Cannot delete an export that is still in progress."},
             status=400,
@@ -1,17 +1,46 @@
 from __future__ import annotations
 
-from django.contrib.gis.geos import Point, Polygon
-from django.http import HttpRequest, JsonResponse
-from django.shortcuts import get_list_or_404
-from ninja import Query
+import hashlib
+
+from django.contrib.gis.geos import Polygon
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from ninja import Field, Query, Schema
+from ninja.errors import HttpError
 from ninja.pagination import RouterPaginated
 
 from bats_ai.core.constants import DEFAULT_SAMPLE_FRAME_ID
 from bats_ai.core.models import GRTSCells
+from bats_ai.core.utils.grts_index import grts_cell_id_for_point, grts_cell_ids_for_points
 from bats_ai.core.utils.grts_utils import normalize_sample_frame_id
 
 router = RouterPaginated()
 
+MAX_GRID_CELL_ID_POINTS = 10_000
+GRTS_CELL_CACHE_SECONDS = 24 * 60 * 60
+QUADRANT_CENTROID_FIELDS = {
+    "NW": "centroid_nw_4326",
+    "NE": "centroid_ne_4326",
+    "SW": "centroid_sw_4326",
+    "SE": "centroid_se_4326",
+}
+
+
+class GridCellIdPointSchema(Schema):
+    latitude: float
+    longitude: float
+
+
+class GridCellIdsSchema(Schema):
+    sample_frame: int = DEFAULT_SAMPLE_FRAME_ID
+    points: list[GridCellIdPointSchema] = Field(..., max_length=MAX_GRID_CELL_ID_POINTS)
+
+
+class GridCellIdsResponseSchema(Schema):
+    # One entry per point, None where no cell contains it
+    grid_cell_ids: list[int | None]
+
 
 @router.get("/grid_cell_id")
 def get_grid_cell_id(
@@ -21,19 +50,12 @@ def get_grid_cell_id(
     sample_frame: int = Query(DEFAULT_SAMPLE_FRAME_ID),
 ):
     try:
-        sample_frame = normalize_sample_frame_id(sample_frame)
-
-        # Create a point object from the provided latitude and longitude
-        point = Point(longitude, latitude, srid=4326)
-
-        # Query the grid cell that contains the provided point
-        cell = GRTSCells.objects.filter(
-            geom_4326__contains=point, sample_frame_id=sample_frame
-        ).first()
+        # Look up the grid cell that contains the provided point
+        grid_cell_id = grts_cell_id_for_point(latitude, longitude, sample_frame)
 
-        if cell:
+        if grid_cell_id is not None:
             # Return the grid cell ID
-            return JsonResponse({"grid_cell_id": cell.grts_cell_id})
+            return JsonResponse({"grid_cell_id": grid_cell_id})
         else:
             return JsonResponse(
                 {"error": "No grid cell found for the provided latitude and longitude"},
@@ -43,6 +65,40 @@ def get_grid_cell_id(
         return JsonResponse({"error": str(e)}, status=200)
 
 
+@router.post("/grid_cell_ids", response=GridCellIdsResponseSchema)
+def get_grid_cell_ids(request: HttpRequest, payload: GridCellIdsSchema):
+    """Return the grid cell ID containing each point, in order."""
+    grid_cell_ids = grts_cell_ids_for_points(
+        [(point.latitude, point.longitude) for point in payload.points], payload.sample_frame
+    )
+    return {"grid_cell_ids": grid_cell_ids}
+
+
+def _cached_json_response(request: HttpRequest, data: dict) -> HttpResponse:
+    """Return ``data`` as JSON with an ETag and a long ``max-age``; GRTS cells are static."""
+    response = JsonResponse(data)
+    etag = quote_etag(hashlib.sha256(response.content).hexdigest())
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, max_age=GRTS_CELL_CACHE_SECONDS)
+    return response
+
+
+def _quadrant_centroid(geom_4326, quadrant: str):
+    """Compute a quadrant centroid for cells loaded before it was precomputed."""
+    min_x, min_y, max_x, max_y = geom_4326.extent
+    mid_x = (min_x + max_x) / 2
+    mid_y = (min_y + max_y) / 2
+    bbox = {
+        "NW": (min_x, mid_y, mid_x, max_y),
+        "NE": (mid_x, mid_y, max_x, max_y),
+        "SW": (min_x, min_y, mid_x, mid_y),
+        "SE": (mid_x, min_y, max_x, mid_y),
+    }[quadrant]
+    return geom_4326.intersection(Polygon.from_bbox(bbox)).centroid
+
+
 @router.get("/{grts_cell_id}")
 def get_cell_center(
     request: HttpRequest,
@@ -50,56 +106,27 @@ def get_cell_center(
     quadrant: str | None = None,
     sample_frame: int | None = Query(DEFAULT_SAMPLE_FRAME_ID),
 ):
-    if sample_frame is not None:
-        sample_frame = normalize_sample_frame_id(sample_frame)
-        cells = get_list_or_404(GRTSCells, grts_cell_id=grts_cell_id, sample_frame_id=sample_frame)
-    else:
-        cells = get_list_or_404(GRTSCells, grts_cell_id=grts_cell_id)
-
-    # Define a custom order for sample_frame_id
-    custom_order = GRTSCells.sort_order()  # Define your custom order here
-
-    # Define a custom key function to sort cells based on the custom order
-    def custom_sort_key(cell):
-        return custom_order.index(cell.sample_frame_id)
-
-    # Sort the cells queryset based on the custom order
-    sorted_cells = sorted(cells, key=custom_sort_key)
-    cell = sorted_cells[0]
-    geom_4326 = cell.geom_4326
-
-    # Get the centroid of the entire cell polygon
-    center = geom_4326.centroid
-
-    if quadrant:
-        # If quadrant is specified, divide the cell polygon into quadrants
-        min_x, min_y, max_x, max_y = geom_4326.extent
-        mid_x = (min_x + max_x) / 2
-        mid_y = (min_y + max_y) / 2
+    quadrant = quadrant.upper() if quadrant else None
+    if quadrant is not None and quadrant not in QUADRANT_CENTROID_FIELDS:
+        raise HttpError(400, "quadrant must be one of NW, NE, SW or SE")
+    center_field = QUADRANT_CENTROID_FIELDS[quadrant] if quadrant else "centroid_4326"
 
-        # Determine the bounding box coordinates of the specified quadrant
-        if quadrant.upper() == "NW":
-            bbox = (min_x, mid_y, mid_x, max_y)
-        elif quadrant.upper() == "SE":
-            bbox = (mid_x, min_y, max_x, mid_y)
-        elif quadrant.upper() == "SW":
-            bbox = (min_x, min_y, mid_x, mid_y)
-        elif quadrant.upper() == "NE":
-            bbox = (mid_x, mid_y, max_x, max_y)
-
-        quadrant_polygon = Polygon.from_bbox(bbox)
-
-        # Intersect the cell polygon with the specified quadrant's polygon
-        quadrant_polygon = geom_4326.intersection(quadrant_polygon)
-
-        # Get the centroid of the intersected polygon
-        center = quadrant_polygon.centroid
+    cells = GRTSCells.objects.filter(grts_cell_id=grts_cell_id)
+    if sample_frame is not None:
+        cells = cells.filter(sample_frame_id=normalize_sample_frame_id(sample_frame))
+    # Without a sample frame, prefer cells by `GRTSCells.sort_order`
+    cell = cells.order_by(GRTSCells.sort_order_case(), "pk").only(center_field).first()
+    if cell is None:
+        raise Http404("No GRTSCells matches the given query.")
 
-    # Get the latitude and longitude of the centroid
-    center_latitude = center.y
-    center_longitude = center.x
+    center = getattr(cell, center_field)
+    if center is None:
+        # Deferred, so only loaded for cells without precomputed centroids
+        center = (
+            _quadrant_centroid(cell.geom_4326, quadrant) if quadrant else cell.geom_4326.centroid
+        )
 
-    return JsonResponse({"latitude": center_latitude, "longitude": center_longitude})
+    return _cached_json_response(request, {"latitude": center.y, "longitude": center.x})
 
 
 @router.get("/{grts_cell_id}/bbox")
@@ -109,11 +136,16 @@ def get_grts_cell_bbox(
     sample_frame: int = Query(DEFAULT_SAMPLE_FRAME_ID),
 ):
     sample_frame = normalize_sample_frame_id(sample_frame)
-    cells = get_list_or_404(GRTSCells, grts_cell_id=grts_cell_id, sample_frame_id=sample_frame)
-    cell = cells[0]
-    geom = cell.geom_4326
-
-    min_x, min_y, max_x, max_y = geom.extent
+    cell = (
+        GRTSCells.objects.filter(grts_cell_id=grts_cell_id, sample_frame_id=sample_frame)
+        .order_by("pk")
+        .only("extent_4326")
+        .first()
+    )
+    if cell is None:
+        raise Http404("No GRTSCells matches the given query.")
+    # Deferred `geom_4326` is only loaded for cells without a precomputed extent
+    min_x, min_y, max_x, max_y = (cell.extent_4326 or cell.geom_4326).extent
 
     geojson = {
         "type": "Feature",
@@ -132,4 +164,4 @@ def get_grts_cell_bbox(
             "sample_frame": sample_frame,
         },
     }
-    return JsonResponse(geojson)
+    return _cached_json_response(request, geojson)
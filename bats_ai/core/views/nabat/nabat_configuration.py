@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from datetime import date, datetime, timedelta
-import json
+# Evaluated at runtime by the Schema classes
+from datetime import date, datetime  # noqa: TC003
 import logging
 from typing import TYPE_CHECKING, Any, Literal
 
@@ -11,14 +11,18 @@ from django.db import transaction
 from django.db.models import Count
 from django.http import HttpRequest, JsonResponse
 from django.shortcuts import get_object_or_404
-from django.utils.timezone import now
 from ninja import Query, Router, Schema
 from ninja.pagination import paginate
 
-from bats_ai.core.models import ExportedAnnotationFile, ProcessingTask, ProcessingTaskType
+from bats_ai.core.models import ProcessingTask, ProcessingTaskType
 from bats_ai.core.models.nabat import NABatRecording, NABatRecordingAnnotation
 from bats_ai.core.tasks.nabat.nabat_export_task import export_nabat_annotations_task
 from bats_ai.core.tasks.nabat.nabat_update_species import update_nabat_species
+from bats_ai.core.utils.export_reuse import (
+    get_or_start_export,
+    nabat_annotations_data_version,
+    normalize_export_filters,
+)
 
 if TYPE_CHECKING:
     import uuid
@@ -79,7 +83,8 @@ class RecordingListItemSchema(Schema):
     acoustic_batch_id: int | None
     name: str
     created: datetime | None
-    recording_location: dict[str, Any] | None
+    # GeoJSON geometry; the GEOS object is rendered directly by the API renderer
+    recording_location: Any
     annotation_count: int | None
 
 
@@ -130,9 +135,7 @@ def list_recordings(request: HttpRequest, filters: Query[RecordingFilterSchema])
             "recording_id": rec.recording_id,
             "survey_event_id": rec.survey_event_id,
             "acoustic_batch_id": rec.acoustic_batch_id,
-            "recording_location": (
-                json.loads(rec.recording_location.geojson) if rec.recording_location else None
-            ),
+            "recording_location": rec.recording_location,
         }
         for rec in recordings
     ]
@@ -215,10 +218,10 @@ class AnnotationExportRequest(Schema):
     "/export",
 )
 def export_annotations(request: HttpRequest, filters: AnnotationExportRequest):
-    export = ExportedAnnotationFile.objects.create(
-        filters_applied=filters.dict(),
-        status="pending",
-        expires_at=now() + timedelta(hours=24),
+    export = get_or_start_export(
+        "nabat_annotations",
+        normalize_export_filters(filters.dict()),
+        data_version=nabat_annotations_data_version(),
+        start=lambda export: export_nabat_annotations_task.delay(filters.dict(), export.id),
     )
-    export_nabat_annotations_task.delay(filters.dict(), export.id)
     return export.id
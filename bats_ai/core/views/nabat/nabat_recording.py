@@ -11,7 +11,6 @@ from django.http import HttpRequest, JsonResponse
 from django.shortcuts import get_object_or_404
 from ninja import Form, Schema
 from ninja.pagination import RouterPaginated
-from oauth2_provider.models import AccessToken
 import requests
 
 from bats_ai.core.models import ProcessingTask, ProcessingTaskType, Species
@@ -20,7 +19,9 @@ from bats_ai.core.models.nabat import (
     NABatRecording,
     NABatRecordingAnnotation,
 )
+from bats_ai.core.models.spectrogram_image import images_prefetch
 from bats_ai.core.tasks.nabat.nabat_data_retrieval import nabat_recording_initialize
+from bats_ai.core.utils.token_auth import authenticate_bearer_token
 from bats_ai.core.views.species import SpeciesSchema
 
 logger = logging.getLogger(__name__)
@@ -29,14 +30,7 @@ router = RouterPaginated()
 
 def admin_auth(request):
     if request.user.is_anonymous:
-        token = request.headers.get("Authorization", "").replace("Bearer ", "")
-        if len(token) > 0:
-            try:
-                access_token = AccessToken.objects.get(token=token)
-            except AccessToken.DoesNotExist:
-                access_token = None
-            if access_token and access_token.user and not access_token.user.is_anonymous:
-                request.user = access_token.user
+        authenticate_bearer_token(request)
     return True
 
 
@@ -311,7 +305,12 @@ def get_spectrogram_compressed(
     if isinstance(email_or_response, JsonResponse):
         return email_or_response
 
-    compressed_spectrogram = NABatCompressedSpectrogram.objects.filter(nabat_recording=pk).first()
+    compressed_spectrogram = (
+        NABatCompressedSpectrogram.objects.filter(nabat_recording=pk)
+        .select_related("spectrogram")
+        .prefetch_related(images_prefetch())
+        .first()
+    )
 
     if not compressed_spectrogram:
         return JsonResponse({"error": "Compressed Spectrogram not found"}, status=404)
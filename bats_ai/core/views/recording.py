@@ -1,18 +1,34 @@
 from __future__ import annotations
 
-from datetime import date, datetime, time
-import json
+from datetime import date, datetime, time, timedelta
+import hashlib
 import logging
 from typing import TYPE_CHECKING, Any, Literal
 
-from django.contrib.auth.models import User
 from django.contrib.gis.geos import Point, Polygon
 from django.contrib.postgres.aggregates import ArrayAgg
-from django.core.files.storage import default_storage
-from django.db.models import Count, Exists, OuterRef, Prefetch, Q, QuerySet
-from django.http import Http404
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import transaction
+from django.db.models import (
+    Count,
+    Exists,
+    Max,
+    OuterRef,
+    Prefetch,
+    Q,
+    QuerySet,
+    StringAgg,
+    Subquery,
+    TextField,
+    Value,
+)
+from django.db.models.functions import MD5, Cast, Concat
+from django.http import Http404, HttpResponse, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.http import parse_etags
 from ninja import File, Form, Query, Schema
+from ninja.errors import HttpError
 
 # Django-Ninja accesses additional params directly, so we need to ignore the type checker.
 from ninja.files import UploadedFile  # noqa: TC002
@@ -29,8 +45,17 @@ from bats_ai.core.models import (
     Species,
     Spectrogram,
 )
+from bats_ai.core.models.recording_annotation import RecordingAnnotationSpecies
+from bats_ai.core.models.spectrogram_image import images_prefetch
+from bats_ai.core.renderers import dumps
 from bats_ai.core.tasks.tasks import recording_compute_spectrogram
-from bats_ai.core.views.recording_location import _parse_bbox, filter_recordings_by_map_bbox
+from bats_ai.core.utils.pulse_columns import PULSE_COLUMNS_CONTENT_TYPE, encode_pulse_columns
+from bats_ai.core.utils.storage_utils import storage_url, storage_url_bucket
+from bats_ai.core.views.recording_location import (
+    _parse_bbox,
+    _vetting_enabled,
+    filter_recordings_by_map_bbox,
+)
 from bats_ai.core.views.species import SpeciesSchema
 
 if TYPE_CHECKING:
@@ -125,7 +150,10 @@ class RecordingAnnotationSchema(Schema):
 
     @classmethod
     def from_orm(cls, obj: RecordingAnnotation):
-        species_ordered = obj.recordingannotationspecies_set.order_by("order")
+        # Use the ordered species links when they were prefetched (see get_recording)
+        species_ordered = getattr(obj, "ordered_species_links", None)
+        if species_ordered is None:
+            species_ordered = obj.recordingannotationspecies_set.order_by("order")
         species_list = [t.species for t in species_ordered]
         return cls(
             species=[SpeciesSchema.from_orm(s) for s in species_list],
@@ -150,7 +178,8 @@ class RecordingListItemSchema(Schema):
     recorded_time: time | None
     equipment: str | None
     comments: str | None
-    recording_location: dict[str, Any] | None
+    # GeoJSON geometry; the GEOS object is rendered directly by the API renderer
+    recording_location: Any
     grts_cell_id: int | None
     sample_frame_id: int | None
     public: bool
@@ -187,6 +216,8 @@ class AnnotationSchema(Schema):
     type: str | None = None
     id: int | None = None
     owner_email: str = None
+    # Version token for batch updates (see AnnotationBatchSchema)
+    modified: datetime | None = None
 
     @classmethod
     def from_orm(cls, obj: Annotations, owner_email=None):
@@ -200,6 +231,7 @@ class AnnotationSchema(Schema):
             id=obj.id,
             type=obj.type,
             owner_email=owner_email,  # Include owner_email in the schema
+            modified=obj.modified,
         )
 
 
@@ -226,7 +258,7 @@ class PulseContourSchema(Schema):
             id=obj.id,
             index=obj.index,
             contours=obj.contours if obj.contours is not None else [],
-            bounding_box=json.loads(obj.bounding_box.geojson),
+            bounding_box=obj.bounding_box,
         )
 
 
@@ -284,6 +316,8 @@ class SequenceAnnotationSchema(Schema):
     comments: str
     species: list[SpeciesSchema] | None
     owner_email: str = None
+    # Version token for batch updates (see AnnotationBatchSchema)
+    modified: datetime | None = None
 
     @classmethod
     def from_orm(cls, obj, owner_email=None):
@@ -295,6 +329,7 @@ class SequenceAnnotationSchema(Schema):
             comments=obj.comments,
             id=obj.id,
             owner_email=owner_email,  # Include owner_email in the schema
+            modified=obj.modified,
         )
 
 
@@ -305,6 +340,85 @@ class UpdateSequenceAnnotationSchema(Schema):
     comments: str | None = None
 
 
+class BatchPulseAnnotationCreateSchema(Schema):
+    start_time: float
+    end_time: float
+    low_freq: float
+    high_freq: float
+    type: str | None = None
+    comments: str | None = None
+    species_ids: list[int] = []
+
+
+class BatchPulseAnnotationUpdateSchema(Schema):
+    id: int
+    # `modified` as last read by the client; the update is rejected if the row changed since
+    version: datetime | None = None
+    start_time: float | None = None
+    end_time: float | None = None
+    low_freq: float | None = None
+    high_freq: float | None = None
+    type: str | None = None
+    comments: str | None = None
+    # Replaces the species when given
+    species_ids: list[int] | None = None
+
+
+class BatchSequenceAnnotationCreateSchema(Schema):
+    start_time: float
+    end_time: float
+    type: str | None = None
+    comments: str | None = None
+    species_ids: list[int] = []
+
+
+class BatchSequenceAnnotationUpdateSchema(Schema):
+    id: int
+    # `modified` as last read by the client; the update is rejected if the row changed since
+    version: datetime | None = None
+    start_time: float | None = None
+    end_time: float | None = None
+    type: str | None = None
+    comments: str | None = None
+    # Replaces the species when given
+    species_ids: list[int] | None = None
+
+
+class BatchPulseAnnotationOperationsSchema(Schema):
+    create: list[BatchPulseAnnotationCreateSchema] = []
+    update: list[BatchPulseAnnotationUpdateSchema] = []
+    delete: list[int] = []
+
+
+class BatchSequenceAnnotationOperationsSchema(Schema):
+    create: list[BatchSequenceAnnotationCreateSchema] = []
+    update: list[BatchSequenceAnnotationUpdateSchema] = []
+    delete: list[int] = []
+
+
+class AnnotationBatchSchema(Schema):
+    """Pulse and sequence annotation changes applied together in one transaction.
+
+    Only fields present in an update are changed. When an update carries a ``version``
+    that no longer matches the annotation's ``modified`` time, the whole batch is
+    rejected with 409 so the client can reload and retry.
+    """
+
+    pulse: BatchPulseAnnotationOperationsSchema = BatchPulseAnnotationOperationsSchema()
+    sequence: BatchSequenceAnnotationOperationsSchema = BatchSequenceAnnotationOperationsSchema()
+
+
+class BatchOperationsResultSchema(Schema):
+    created: list[int]
+    updated: list[int]
+    deleted: list[int]
+
+
+class AnnotationBatchResultSchema(Schema):
+    pulse: BatchOperationsResultSchema
+    sequence: BatchOperationsResultSchema
+
+
 @router.post("/")
 def create_recording(
     request: HttpRequest,
@@ -406,46 +520,39 @@ def _build_recordings_response(
     annotation_counts: dict[int, int],
     user_has_annotations_ids: set[int],
 ) -> list[RecordingListItemSchema]:
-    items: list[RecordingListItemSchema] = []
-    for rec in page_recordings:
-        if rec.recording_location:
-            location = json.loads(rec.recording_location.json)
-        else:
-            location = rec.recording_location
-        items.append(
-            RecordingListItemSchema(
-                id=rec.id,
-                name=rec.name,
-                audio_file=str(rec.audio_file),
-                owner_id=rec.owner_id,
-                recorded_date=rec.recorded_date,
-                recorded_time=rec.recorded_time,
-                equipment=rec.equipment,
-                comments=rec.comments,
-                recording_location=location,
-                grts_cell_id=rec.grts_cell_id,
-                sample_frame_id=rec.sample_frame_id,
-                public=rec.public,
-                created=rec.created,
-                modified=rec.modified,
-                software=rec.software,
-                detector=rec.detector,
-                species_list=rec.species_list,
-                site_name=rec.site_name,
-                unusual_occurrences=rec.unusual_occurrences,
-                tags_text=getattr(rec, "tags_text", None),
-                owner_username=rec.owner.username,
-                audio_file_presigned_url=default_storage.url(rec.audio_file.name),
-                hasSpectrogram=rec.has_spectrogram_attr,
-                userAnnotations=annotation_counts.get(rec.id, 0),
-                userMadeAnnotations=rec.id in user_has_annotations_ids,
-                fileAnnotations=[
-                    RecordingAnnotationSchema.from_orm(fa)
-                    for fa in rec.recordingannotation_set.all()
-                ],
-            )
+    return [
+        RecordingListItemSchema(
+            id=rec.id,
+            name=rec.name,
+            audio_file=str(rec.audio_file),
+            owner_id=rec.owner_id,
+            recorded_date=rec.recorded_date,
+            recorded_time=rec.recorded_time,
+            equipment=rec.equipment,
+            comments=rec.comments,
+            recording_location=rec.recording_location,
+            grts_cell_id=rec.grts_cell_id,
+            sample_frame_id=rec.sample_frame_id,
+            public=rec.public,
+            created=rec.created,
+            modified=rec.modified,
+            software=rec.software,
+            detector=rec.detector,
+            species_list=rec.species_list,
+            site_name=rec.site_name,
+            unusual_occurrences=rec.unusual_occurrences,
+            tags_text=getattr(rec, "tags_text", None),
+            owner_username=rec.owner.username,
+            audio_file_presigned_url=storage_url(rec.audio_file.name),
+            hasSpectrogram=rec.has_spectrogram_attr,
+            userAnnotations=annotation_counts.get(rec.id, 0),
+            userMadeAnnotations=rec.id in user_has_annotations_ids,
+            fileAnnotations=[
+                RecordingAnnotationSchema.from_orm(fa) for fa in rec.recordingannotation_set.all()
+            ],
         )
-    return items
+        for rec in page_recordings
+    ]
 
 
 def _base_recordings_queryset(request: HttpRequest, *, public: bool | None) -> QuerySet[Recording]:
@@ -526,7 +633,9 @@ def get_recordings(  # noqa: C901
     if q.bbox and q.bbox.strip():
         min_lon, min_lat, max_lon, max_lat = _parse_bbox(q.bbox)
         bbox_poly = Polygon.from_bbox((min_lon, min_lat, max_lon, max_lat))
-        queryset = filter_recordings_by_map_bbox(queryset, bbox_poly)
+        queryset = filter_recordings_by_map_bbox(
+            queryset, bbox_poly, vetting_enabled=_vetting_enabled()
+        )
 
     sort_field = q.sort_by or "created"
     order_prefix = "" if q.sort_direction == "asc" else "-"
@@ -594,6 +703,8 @@ def _unsubmitted_recording_ids_ordered(
         owner=request.user, submitted=True
     ).values_list("recording_id", flat=True)
 
+    vetting_enabled = _vetting_enabled()
+
     def apply_filters_and_sort(qs: QuerySet[Recording]) -> QuerySet[Recording]:
         qs = qs.exclude(pk__in=submitted_by_user)
         if tags and tags.strip():
@@ -605,7 +716,7 @@ def _unsubmitted_recording_ids_ordered(
         if bbox and bbox.strip():
             min_lon, min_lat, max_lon, max_lat = _parse_bbox(bbox)
             bbox_poly = Polygon.from_bbox((min_lon, min_lat, max_lon, max_lat))
-            qs = filter_recordings_by_map_bbox(qs, bbox_poly)
+            qs = filter_recordings_by_map_bbox(qs, bbox_poly, vetting_enabled=vetting_enabled)
         order_prefix = "" if sort_direction == "asc" else "-"
         if sort_by == "owner_username":
             qs = qs.order_by(f"{order_prefix}owner__username")
@@ -660,65 +771,76 @@ def get_unsubmitted_neighbors(
     return UnsubmittedNeighborsResponse(next_id=next_id, previous_id=previous_id)
 
 
-@router.get("/{pk}/")
-def get_recording(request: HttpRequest, pk: int):
-    # Filter recordings based on the owner's id or public=True
-    try:
-        recordings = (
-            Recording.objects.filter(pk=pk)
-            .annotate(tags_text=ArrayAgg("tags__text", filter=Q(tags__text__isnull=False)))
-            .values()
-        )
-        if len(recordings) > 0:
-            recording = recordings[0]
-
-            user = User.objects.get(id=recording["owner_id"])
-            recording["owner_username"] = user.username
-            recording["audio_file_presigned_url"] = default_storage.url(recording["audio_file"])
-            recording["hasSpectrogram"] = Recording.objects.get(
-                id=recording["id"]
-            ).spectrograms.exists()
-            if recording["recording_location"]:
-                recording["recording_location"] = json.loads(recording["recording_location"].json)
-            annotation_owners = (
-                Annotations.objects.filter(recording_id=recording["id"])
-                .values_list("owner", flat=True)
-                .distinct()
-            )
-            recording_annotation_owners = (
-                RecordingAnnotation.objects.filter(recording_id=recording["id"])
-                .values_list("owner", flat=True)
+def _ordered_species_links_prefetch() -> Prefetch:
+    """Prefetch ``RecordingAnnotation`` species links in order, as used by ``from_orm``."""
+    return Prefetch(
+        "recordingannotationspecies_set",
+        queryset=RecordingAnnotationSpecies.objects.select_related("species").order_by("order"),
+        to_attr="ordered_species_links",
+    )
+
+
+def _recording_detail_queryset(request: HttpRequest) -> QuerySet[Recording]:
+    """Annotate everything the recording detail response needs onto one query.
+
+    Owners of pulse and recording annotations are collected as arrays so the distinct
+    annotator count can be computed without extra round-trips. The current user's
+    file-level annotations (with ordered species) are loaded by a single prefetch.
+    """
+    file_annotations_prefetch = Prefetch(
+        "recordingannotation_set",
+        queryset=RecordingAnnotation.objects.filter(owner=request.user)
+        .select_related("owner")
+        .prefetch_related(_ordered_species_links_prefetch())
+        .order_by("confidence"),
+        to_attr="user_file_annotations",
+    )
+    return (
+        Recording.objects.select_related("owner")
+        .annotate(
+            tags_text=ArrayAgg("tags__text", filter=Q(tags__text__isnull=False)),
+            has_spectrogram_attr=Exists(Spectrogram.objects.filter(recording=OuterRef("pk"))),
+            annotation_owner_ids=ArraySubquery(
+                Annotations.objects.filter(recording=OuterRef("pk")).values("owner_id").distinct()
+            ),
+            recording_annotation_owner_ids=ArraySubquery(
+                RecordingAnnotation.objects.filter(recording=OuterRef("pk"))
+                .values("owner_id")
                 .distinct()
-            )
+            ),
+        )
+        .prefetch_related(file_annotations_prefetch)
+    )
 
-            # Combine the sets of owners and count unique entries
-            unique_users_with_annotations = len(
-                set(annotation_owners).union(set(recording_annotation_owners))
-            )
-            recording["userAnnotations"] = unique_users_with_annotations
-            user_has_annotations = (
-                Annotations.objects.filter(
-                    recording_id=recording["id"], owner=request.user
-                ).exists()
-                or RecordingAnnotation.objects.filter(
-                    recording_id=recording["id"], owner=request.user
-                ).exists()
-            )
-            recording["userMadeAnnotations"] = user_has_annotations
-            # Only expose file-level annotations owned by the current user
-            file_annotations = RecordingAnnotation.objects.filter(
-                recording=pk, owner=request.user
-            ).order_by("confidence")
-            recording["fileAnnotations"] = [
-                RecordingAnnotationSchema.from_orm(fileAnnotation).dict()
-                for fileAnnotation in file_annotations
-            ]
-            return recording
-        else:
-            return {"error": "Recording not found"}
-    except Recording.DoesNotExist:
+
+@router.get("/{pk}/")
+def get_recording(request: HttpRequest, pk: int):
+    recording = _recording_detail_queryset(request).filter(pk=pk).first()
+    if recording is None:
         return {"error": "Recording not found"}
 
+    # Same keys as `Recording.objects.values()` so the response shape is unchanged
+    data: dict[str, Any] = {
+        field.attname: getattr(recording, field.attname)
+        for field in Recording._meta.concrete_fields
+    }
+    data["audio_file"] = recording.audio_file.name
+    data["tags_text"] = recording.tags_text
+    data["owner_username"] = recording.owner.username
+    data["audio_file_presigned_url"] = storage_url(recording.audio_file.name)
+    data["hasSpectrogram"] = recording.has_spectrogram_attr
+
+    annotation_owner_ids = set(recording.annotation_owner_ids)
+    annotation_owner_ids.update(recording.recording_annotation_owner_ids)
+    data["userAnnotations"] = len(annotation_owner_ids)
+    data["userMadeAnnotations"] = request.user.pk in annotation_owner_ids
+    # Only expose file-level annotations owned by the current user
+    data["fileAnnotations"] = [
+        RecordingAnnotationSchema.from_orm(file_annotation).dict()
+        for file_annotation in recording.user_file_annotations
+    ]
+    return data
+
 
 @router.get("/{recording_id}/recording-annotations")
 def get_recording_annotations(request: HttpRequest, recording_id: int):
@@ -742,16 +864,50 @@ def get_recording_annotations(request: HttpRequest, recording_id: int):
     ]
 
 
-@router.get("/{pk}/spectrogram")
-def get_spectrogram(request: HttpRequest, pk: int):
-    recording = get_object_or_404(Recording, pk=pk)
+def _other_annotation_users(recording: Recording, user) -> list[dict[str, Any]]:
+    """Distinct other users who have made pulse annotations on the recording."""
+    other_users_qs = (
+        Annotations.objects.filter(recording=recording)
+        .exclude(owner=user)
+        .values("owner__username", "owner__email", "owner__pk")
+        .distinct()
+    )
+    return [
+        {
+            "username": other_user["owner__username"],
+            "email": other_user["owner__email"],
+            "id": other_user["owner__pk"],
+        }
+        for other_user in other_users_qs
+    ]
 
-    spectrogram = recording.spectrograms.latest("created")
-    compressed = recording.compressed_spectrograms.order_by("-created").first()
 
-    spectro_data = {
+def _user_annotations_data(
+    recording: Recording, user
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Serialize the pulse and sequence annotations owned by ``user`` on the recording."""
+    annotations_qs = Annotations.objects.filter(recording=recording, owner=user).prefetch_related(
+        "species"
+    )
+    sequence_annotations_qs = SequenceAnnotations.objects.filter(
+        recording=recording, owner=user
+    ).prefetch_related("species")
+    annotations_data = [
+        AnnotationSchema.from_orm(annotation, owner_email=user.email).dict()
+        for annotation in annotations_qs
+    ]
+    sequence_annotations_data = [
+        SequenceAnnotationSchema.from_orm(annotation, owner_email=user.email).dict()
+        for annotation in sequence_annotations_qs
+    ]
+    return annotations_data, sequence_annotations_data
+
+
+def _spectrogram_data(
+    spectrogram: Spectrogram, compressed: CompressedSpectrogram | None
+) -> dict[str, Any]:
+    spectro_data: dict[str, Any] = {
         "urls": spectrogram.image_url_list,
-        "filename": recording.name,
         "spectroInfo": {
             "spectroId": spectrogram.pk,
             "width": spectrogram.width,
@@ -767,48 +923,53 @@ def get_spectrogram(request: HttpRequest, pk: int):
             "start_times": compressed.starts,
             "end_times": compressed.stops,
         }
+    return spectro_data
 
-    # Get distinct other users who have made annotations on the recording
-    if recording.owner == request.user:
-        other_users_qs = (
-            Annotations.objects.filter(recording=recording)
-            .exclude(owner=request.user)
-            .values("owner__username", "owner__email", "owner__pk")
-            .distinct()
-        )
 
-        other_users = [
-            {
-                "username": user["owner__username"],
-                "email": user["owner__email"],
-                "id": user["owner__pk"],
-            }
-            for user in other_users_qs
-        ]
+def _compressed_spectrogram_data(compressed: CompressedSpectrogram) -> dict[str, Any]:
+    spectrogram = compressed.spectrogram
+    return {
+        "urls": compressed.image_url_list,
+        "mask_urls": compressed.mask_url_list,
+        "waveplot_urls": compressed.waveplot_url_list,
+        "spectroInfo": {
+            "spectroId": compressed.pk,
+            "width": spectrogram.width,
+            "start_time": 0,
+            "end_time": spectrogram.duration,
+            "height": spectrogram.height,
+            "low_freq": spectrogram.frequency_min,
+            "high_freq": spectrogram.frequency_max,
+            "start_times": compressed.starts,
+            "end_times": compressed.stops,
+            "widths": compressed.widths,
+            "compressedWidth": compressed.length,
+        },
+    }
 
-        spectro_data["otherUsers"] = other_users
 
+def _add_viewer_context(spectro_data: dict[str, Any], request: HttpRequest, recording: Recording):
+    """Add the annotation and recording fields shared by all spectrogram responses."""
+    spectro_data["filename"] = recording.name
+    if recording.owner_id == request.user.pk:
+        spectro_data["otherUsers"] = _other_annotation_users(recording, request.user)
     spectro_data["currentUser"] = request.user.email
-
-    annotations_qs = Annotations.objects.filter(recording=recording, owner=request.user)
-    sequence_annotations_qs = SequenceAnnotations.objects.filter(
-        recording=recording, owner=request.user
-    )
-
-    # Serialize the annotations using AnnotationSchema
-    annotations_data = [
-        AnnotationSchema.from_orm(annotation, owner_email=request.user.email).dict()
-        for annotation in annotations_qs
-    ]
-    sequence_annotations_data = [
-        SequenceAnnotationSchema.from_orm(annotation, owner_email=request.user.email).dict()
-        for annotation in sequence_annotations_qs
-    ]
-
+    annotations_data, sequence_annotations_data = _user_annotations_data(recording, request.user)
     spectro_data["annotations"] = annotations_data
     spectro_data["sequence"] = sequence_annotations_data
     spectro_data["grts_cell_id"] = recording.grts_cell_id
     spectro_data["sample_frame_id"] = recording.sample_frame_id
+
+
+@router.get("/{pk}/spectrogram")
+def get_spectrogram(request: HttpRequest, pk: int):
+    recording = get_object_or_404(Recording, pk=pk)
+
+    spectrogram = recording.spectrograms.latest("created")
+    compressed = recording.compressed_spectrograms.order_by("-created").first()
+
+    spectro_data = _spectrogram_data(spectrogram, compressed)
+    _add_viewer_context(spectro_data, request, recording)
     return spectro_data
 
 
@@ -816,73 +977,158 @@ def get_spectrogram(request: HttpRequest, pk: int):
 def get_spectrogram_compressed(request: HttpRequest, pk: int):
     recording = get_object_or_404(Recording, pk=pk)
     compressed_spectrogram = (
-        CompressedSpectrogram.objects.filter(recording=pk).order_by("-created").first()
+        CompressedSpectrogram.objects.filter(recording=pk)
+        .select_related("spectrogram")
+        .prefetch_related(images_prefetch())
+        .order_by("-created")
+        .first()
     )
     if compressed_spectrogram is None:
         raise Http404(404, f"Compressed spectrogram for recording {pk} not found")
 
-    spectro_data = {
-        "urls": compressed_spectrogram.image_url_list,
-        "mask_urls": compressed_spectrogram.mask_url_list,
-        "waveplot_urls": compressed_spectrogram.waveplot_url_list,
-        "filename": recording.name,
-        "spectroInfo": {
-            "spectroId": compressed_spectrogram.pk,
-            "width": compressed_spectrogram.spectrogram.width,
-            "start_time": 0,
-            "end_time": compressed_spectrogram.spectrogram.duration,
-            "height": compressed_spectrogram.spectrogram.height,
-            "low_freq": compressed_spectrogram.spectrogram.frequency_min,
-            "high_freq": compressed_spectrogram.spectrogram.frequency_max,
-            "start_times": compressed_spectrogram.starts,
-            "end_times": compressed_spectrogram.stops,
-            "widths": compressed_spectrogram.widths,
-            "compressedWidth": compressed_spectrogram.length,
-        },
-    }
+    spectro_data = _compressed_spectrogram_data(compressed_spectrogram)
+    _add_viewer_context(spectro_data, request, recording)
+    return spectro_data
+
+
+def _stat_subquery(queryset: QuerySet, expression) -> Subquery:
+    """Aggregate ``expression`` over ``queryset`` per recording as a correlated subquery."""
+    return Subquery(
+        queryset.filter(recording=OuterRef("pk"))
+        .order_by()
+        .values("recording")
+        .annotate(stat=expression)
+        .values("stat")
+    )
+
+
+# Pulses are recomputed in place, keeping their rows, so their tag covers their content
+_PULSE_CHECKSUM = MD5(
+    StringAgg(
+        Concat(
+            *(
+                part
+                for field in ("index", "bounding_box", "curve", "char_freq", "knee", "heel")
+                for part in (Cast(field, TextField()), Value("|"))
+            ),
+            Cast("slopes", TextField()),
+            Value("|"),
+            Cast("contours", TextField()),
+            output_field=TextField(),
+        ),
+        Value(";"),
+        order_by="pk",
+    )
+)
+
 
-    # Get distinct other users who have made annotations on the recording
-    if recording.owner == request.user:
-        other_users_qs = (
-            Annotations.objects.filter(recording=recording)
-            .exclude(owner=request.user)
-            .values("owner__username", "owner__email", "owner__pk")
-            .distinct()
+def _viewer_etag(request: HttpRequest, recording_pk: int) -> str:
+    """Weak ETag over the modification times of everything in the viewer bundle.
+
+    Row counts are included so deletions change the tag even when no remaining row
+    was modified. The bundle embeds presigned URLs, so the tag also changes with the
+    storage URL time bucket, before those URLs expire.
+    """
+    stats = (
+        Recording.objects.filter(pk=recording_pk)
+        .annotate(
+            spectrogram_modified=_stat_subquery(Spectrogram.objects.all(), Max("modified")),
+            compressed_modified=_stat_subquery(
+                CompressedSpectrogram.objects.all(), Max("modified")
+            ),
+            annotations_modified=_stat_subquery(Annotations.objects.all(), Max("modified")),
+            annotations_count=_stat_subquery(Annotations.objects.all(), Count("pk")),
+            sequence_modified=_stat_subquery(SequenceAnnotations.objects.all(), Max("modified")),
+            sequence_count=_stat_subquery(SequenceAnnotations.objects.all(), Count("pk")),
+            recording_annotations_modified=_stat_subquery(
+                RecordingAnnotation.objects.all(), Max("modified")
+            ),
+            recording_annotations_count=_stat_subquery(
+                RecordingAnnotation.objects.all(), Count("pk")
+            ),
+            pulse_count=_stat_subquery(PulseMetadata.objects.all(), Count("pk")),
+            pulse_last_pk=_stat_subquery(PulseMetadata.objects.all(), Max("pk")),
+            pulse_checksum=_stat_subquery(PulseMetadata.objects.all(), _PULSE_CHECKSUM),
         )
+        .values_list(
+            "modified",
+            "spectrogram_modified",
+            "compressed_modified",
+            "annotations_modified",
+            "annotations_count",
+            "sequence_modified",
+            "sequence_count",
+            "recording_annotations_modified",
+            "recording_annotations_count",
+            "pulse_count",
+            "pulse_last_pk",
+            "pulse_checksum",
+        )
+        .get()
+    )
+    # The bundle is filtered for the requesting user, so the tag must be as well.
+    digest = hashlib.sha256(
+        repr((request.user.pk, storage_url_bucket(), *stats)).encode()
+    ).hexdigest()
+    return f'W/"{digest[:32]}"'
 
-        other_users = [
-            {
-                "username": user["owner__username"],
-                "email": user["owner__email"],
-                "id": user["owner__pk"],
-            }
-            for user in other_users_qs
-        ]
 
-        spectro_data["otherUsers"] = other_users
+@router.get("/{pk}/viewer")
+def get_spectrogram_viewer_bundle(request: HttpRequest, pk: int):
+    """Everything the spectrogram viewer needs for a recording in one response.
 
-    spectro_data["currentUser"] = request.user.email
+    Combines the uncompressed and compressed spectrograms, the user's pulse, sequence
+    and recording annotations, and the computed pulse data and contours. Clients
+    may send ``If-None-Match`` to receive a 304 when nothing has changed.
+    """
+    recording = get_object_or_404(Recording, pk=pk)
+    if recording.owner_id != request.user.pk and not recording.public:
+        return {"error": "Permission denied. You do not own this recording, and it is not public."}
 
-    annotations_qs = Annotations.objects.filter(recording=recording, owner=request.user)
-    sequence_annotations_qs = SequenceAnnotations.objects.filter(
-        recording=recording, owner=request.user
+    etag = _viewer_etag(request, pk)
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    compressed = (
+        recording.compressed_spectrograms.select_related("spectrogram")
+        .prefetch_related(images_prefetch())
+        .order_by("-created")
+        .first()
     )
+    spectrogram = compressed.spectrogram if compressed else None
+    if spectrogram is None:
+        spectrogram = recording.spectrograms.order_by("-created").first()
+    if spectrogram is None:
+        raise Http404(f"Spectrogram for recording {pk} not found")
+
+    bundle = {
+        "spectrogram": _spectrogram_data(spectrogram, compressed),
+        "compressed": _compressed_spectrogram_data(compressed) if compressed else None,
+    }
+    _add_viewer_context(bundle, request, recording)
 
-    # Serialize the annotations using AnnotationSchema
-    annotations_data = [
-        AnnotationSchema.from_orm(annotation, owner_email=request.user.email).dict()
-        for annotation in annotations_qs
-    ]
-    sequence_annotations_data = [
-        SequenceAnnotationSchema.from_orm(annotation, owner_email=request.user.email).dict()
-        for annotation in sequence_annotations_qs
+    recording_annotations = (
+        RecordingAnnotation.objects.filter(recording=recording, owner=request.user)
+        .select_related("owner")
+        .prefetch_related(_ordered_species_links_prefetch())
+        .order_by("confidence")
+    )
+    bundle["recordingAnnotations"] = [
+        RecordingAnnotationSchema.from_orm(annotation).dict()
+        for annotation in recording_annotations
     ]
 
-    spectro_data["annotations"] = annotations_data
-    spectro_data["sequence"] = sequence_annotations_data
-    spectro_data["grts_cell_id"] = recording.grts_cell_id
-    spectro_data["sample_frame_id"] = recording.sample_frame_id
-    return spectro_data
+    pulses = list(PulseMetadata.objects.filter(recording=recording).order_by("index"))
+    bundle["pulseData"] = [PulseMetadataSchema.from_orm(pulse).dict() for pulse in pulses]
+    bundle["pulseContours"] = [PulseContourSchema.from_orm(pulse).dict() for pulse in pulses]
+
+    response = HttpResponse(dumps(bundle), content_type="application/json")
+    response["ETag"] = etag
+    # Always revalidate: the bundle is per-user and contains presigned URLs
+    response["Cache-Control"] = "private, no-cache"
+    return response
 
 
 @router.get("/{pk}/annotations")
@@ -931,12 +1177,27 @@ def get_pulse_contours(request: HttpRequest, pk: int):
 
 @router.get("/{pk}/pulse_data")
 def get_pulse_data(request: HttpRequest, pk: int):
+    """Return computed pulse metadata as JSON, or as packed columns if the client accepts them.
+
+    Sending ``Accept: application/vnd.batai.pulse-columns`` returns the binary format
+    described in ``bats_ai.core.utils.pulse_columns``.
+    """
     try:
         recording = Recording.objects.get(pk=pk)
         if recording.owner == request.user or recording.public:
-            computed_pulse_annotation_qs = PulseMetadata.objects.filter(
-                recording=recording
-            ).order_by("index")
+            # Contours are only used by /pulse_contours and can be large
+            computed_pulse_annotation_qs = (
+                PulseMetadata.objects.filter(recording=recording)
+                .defer("contours")
+                .order_by("index")
+            )
+            if PULSE_COLUMNS_CONTENT_TYPE in request.headers.get("Accept", ""):
+                response = HttpResponse(
+                    encode_pulse_columns(computed_pulse_annotation_qs),
+                    content_type=PULSE_COLUMNS_CONTENT_TYPE,
+                )
+                response["Vary"] = "Accept"
+                return response
             return [
                 PulseMetadataSchema.from_orm(pulse) for pulse in computed_pulse_annotation_qs.all()
             ]
@@ -1289,3 +1550,122 @@ def delete_sequence_annotation(request, recording_pk: int, sequence_annotation_p
         return {"error": "Recording not found"}
     except Annotations.DoesNotExist:
         return {"error": "Annotation not found"}
+
+
+# BATCH ANNOTATIONS
+
+
+def _version_matches(modified: datetime, version: datetime) -> bool:
+    if timezone.is_naive(version):
+        raise HttpError(422, "Annotation versions must include a timezone offset")
+    # Tolerate clients that round-tripped the value through millisecond-precision JSON
+    return abs(modified - version) < timedelta(milliseconds=1)
+
+
+def _apply_annotation_batch(  # noqa: C901
+    model: type[Annotations | SequenceAnnotations],
+    operations: BatchPulseAnnotationOperationsSchema | BatchSequenceAnnotationOperationsSchema,
+    *,
+    recording: Recording,
+    user,
+) -> BatchOperationsResultSchema:
+    """Apply one annotation model's creates, updates and deletes with bulk queries.
+
+    Must run inside a transaction; errors raise ``HttpError`` so the batch rolls back.
+    """
+    species_field = model._meta.get_field("species")
+    through = species_field.remote_field.through
+    annotation_fk = f"{species_field.m2m_field_name()}_id"
+    species_fk = f"{species_field.m2m_reverse_field_name()}_id"
+    now = timezone.now()
+    owned = model.objects.filter(recording=recording, owner=user)
+    species_by_annotation: dict[int, list[int]] = {}
+
+    updated: list[int] = []
+    if operations.update:
+        update_ids = [op.id for op in operations.update]
+        instances = owned.select_for_update().in_bulk(update_ids)
+        changed_fields: set[str] = {"modified"}
+        for op in operations.update:
+            instance = instances.get(op.id)
+            if instance is None:
+                raise HttpError(404, f"Annotation with ID {op.id} not found")
+            if op.version is not None and not _version_matches(instance.modified, op.version):
+                raise HttpError(409, f"Annotation with ID {op.id} was modified by another request")
+            values = op.dict(exclude_unset=True, exclude={"id", "version", "species_ids"})
+            for field, value in values.items():
+                setattr(instance, field, value)
+            changed_fields.update(values)
+            instance.modified = now
+            if op.species_ids is not None:
+                species_by_annotation[instance.pk] = op.species_ids
+            updated.append(instance.pk)
+        model.objects.bulk_update(instances.values(), sorted(changed_fields))
+        through.objects.filter(**{f"{annotation_fk}__in": list(species_by_annotation)}).delete()
+
+    created: list[int] = []
+    if operations.create:
+        new_instances = model.objects.bulk_create(
+            [
+                model(
+                    recording=recording,
+                    owner=user,
+                    **op.dict(exclude={"species_ids"}),
+                )
+                for op in operations.create
+            ]
+        )
+        for instance, op in zip(new_instances, operations.create, strict=True):
+            species_by_annotation[instance.pk] = op.species_ids
+            created.append(instance.pk)
+
+    through.objects.bulk_create(
+        [
+            through(**{annotation_fk: annotation_id, species_fk: species_id})
+            for annotation_id, species_ids in species_by_annotation.items()
+            for species_id in dict.fromkeys(species_ids)
+        ]
+    )
+
+    deleted: list[int] = []
+    if operations.delete:
+        delete_ids = list(dict.fromkeys(operations.delete))
+        deleted = list(owned.filter(pk__in=delete_ids).values_list("pk", flat=True))
+        missing = set(delete_ids) - set(deleted)
+        if missing:
+            raise HttpError(404, f"Annotation with ID {min(missing)} not found")
+        owned.filter(pk__in=deleted).delete()
+
+    return BatchOperationsResultSchema(created=created, updated=updated, deleted=deleted)
+
+
+@router.post("/{pk}/annotations/batch", response=AnnotationBatchResultSchema)
+def batch_annotations(request: HttpRequest, pk: int, payload: AnnotationBatchSchema):
+    """Create, update and delete pulse and sequence annotations in a single transaction.
+
+    Created IDs are returned in the order of the ``create`` lists.
+    """
+    recording = get_object_or_404(Recording, pk=pk)
+    if recording.owner_id != request.user.pk and not recording.public:
+        raise HttpError(
+            403, "Permission denied. You do not own this recording, and it is not public."
+        )
+
+    species_ids = {
+        species_id
+        for operations in (payload.pulse, payload.sequence)
+        for op in [*operations.create, *operations.update]
+        for species_id in op.species_ids or []
+    }
+    missing_species = species_ids - set(Species.objects.in_bulk(species_ids))
+    if missing_species:
+        raise HttpError(404, f"Species with ID {min(missing_species)} not found")
+
+    with transaction.atomic():
+        pulse_result = _apply_annotation_batch(
+            Annotations, payload.pulse, recording=recording, user=request.user
+        )
+        sequence_result = _apply_annotation_batch(
+            SequenceAnnotations, payload.sequence, recording=recording, user=request.user
+        )
+    return AnnotationBatchResultSchema(pulse=pulse_result, sequence=sequence_result)
@@ -1,22 +1,40 @@
 from __future__ import annotations
 
+from itertools import batched
 import logging
-from typing import TYPE_CHECKING, Any, Literal
+import math
+from typing import TYPE_CHECKING, Literal
 
+from django.contrib.gis.db.models import Collect
+from django.contrib.gis.db.models.functions import AsGeoJSON, Centroid, SnapToGrid
 from django.contrib.gis.geos import Polygon
-from django.db.models import Exists, OuterRef, Q, QuerySet
-from ninja import Query, Router, Schema
+from django.db import connection
+from django.db.models import (
+    BooleanField,
+    Case,
+    Count,
+    Exists,
+    F,
+    JSONField,
+    Min,
+    OuterRef,
+    Q,
+    QuerySet,
+    TextField,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, JSONObject
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from ninja import Field, Query, Router, Schema
 from ninja.errors import HttpError
 
 from bats_ai.core.models import (
     Configuration,
-    GRTSCells,
     Recording,
     RecordingAnnotation,
-)
-from bats_ai.core.utils.grts_utils import (
-    normalize_sample_frame_id,
-    recording_effective_sample_frame_id_case,
+    Spectrogram,
 )
 
 if TYPE_CHECKING:
@@ -26,12 +44,33 @@ logger = logging.getLogger(__name__)
 
 router = Router()
 
-
-class RecordingLocationsQuerySchema(Schema):
+MAX_TILE_ZOOM = 22
+TILE_CACHE_SECONDS = 60
+# Clusters are grid cells of 1/CLUSTER_CELLS_PER_TILE of a map tile's width at the given zoom
+CLUSTER_CELLS_PER_TILE = 4
+FEATURE_BATCH_SIZE = 2000
+# `{recordings}` is a queryset selecting `id`, `audio_file` and `map_point`
+RECORDING_LOCATIONS_TILE_SQL = """
+SELECT ST_AsMVT(tile.*, 'recordings')
+FROM (
+    SELECT
+        ST_AsMVTGeom(ST_Transform(src.map_point, 3857), ST_TileEnvelope(%s, %s, %s)) AS geom,
+        src.id AS recording_id,
+        src.audio_file AS filename
+    FROM ({recordings}) AS src
+) AS tile
+WHERE tile.geom IS NOT NULL
+"""
+
+
+class RecordingLocationsFilterSchema(Schema):
     # When true, exclude recordings the current user has already submitted.
     exclude_submitted: bool | None = None
     # Comma-separated tag texts; recording must have all listed tags.
     tags: str | None = None
+
+
+class RecordingLocationsQuerySchema(RecordingLocationsFilterSchema):
     # Bounding box filter (lon/lat) as `[min_lon, min_lat, max_lon, max_lat]`.
     bbox: str | None = None
 
@@ -57,6 +96,28 @@ class RecordingLocationsResponseSchema(Schema):
     features: list[RecordingLocationsFeatureSchema]
 
 
+class RecordingLocationClustersQuerySchema(RecordingLocationsQuerySchema):
+    # Map zoom level; clusters get smaller as it increases.
+    zoom: int = Field(..., ge=0, le=MAX_TILE_ZOOM)
+
+
+class RecordingLocationClusterPropertiesSchema(Schema):
+    count: int
+    # Set only when the cluster holds a single recording
+    recording_id: int | None
+
+
+class RecordingLocationClusterSchema(Schema):
+    type: Literal["Feature"] = "Feature"
+    geometry: RecordingLocationsFeatureGeometrySchema
+    properties: RecordingLocationClusterPropertiesSchema
+
+
+class RecordingLocationClustersResponseSchema(Schema):
+    type: Literal["FeatureCollection"] = "FeatureCollection"
+    features: list[RecordingLocationClusterSchema]
+
+
 def _split_tags(tags: str | None) -> list[str]:
     if not tags:
         return []
@@ -66,42 +127,40 @@ def _split_tags(tags: str | None) -> list[str]:
 def filter_recordings_by_map_bbox(
     qs: QuerySet[Recording],
     bbox_poly: Polygon,
+    *,
+    vetting_enabled: bool,
 ) -> QuerySet[Recording]:
-    """Keep recordings whose point lies in the bbox or whose GRTS cell centroid matches.
+    """Keep recordings whose point on the map is in the bbox.
 
-    Cell matching uses ``(grts_cell_id, sample_frame_id)`` on ``GRTSCells``, with the
-    same effective sample frame rules as ``normalize_sample_frame_id``.
+    That is their ``effective_location`` (own point, else GRTS cell centroid), or their
+    ``vetting_location`` (the other way round) when vetting is enabled. Both are
+    maintained on the row and spatially indexed, so this is a single index-backed
+    predicate.
     """
-    cell_centroid_in_bbox = GRTSCells.objects.filter(
-        centroid_4326__intersects=bbox_poly,
-        grts_cell_id=OuterRef("grts_cell_id"),
-        sample_frame_id=OuterRef("_map_bbox_effective_sf"),
-    )
-    return qs.annotate(_map_bbox_effective_sf=recording_effective_sample_frame_id_case()).filter(
-        Q(recording_location__intersects=bbox_poly)
-        | (Q(grts_cell_id__isnull=False) & Exists(cell_centroid_in_bbox))
-    )
+    if vetting_enabled:
+        return qs.filter(vetting_location__intersects=bbox_poly)
+    return qs.filter(effective_location__intersects=bbox_poly)
 
 
-def _apply_recording_filters_and_sort(
+def _apply_recording_filters_and_sort(  # noqa: PLR0913
     *,
     qs: QuerySet[Recording],
     exclude_submitted: bool,
     submitted_by_user: QuerySet[int] | None,
     tags: str | None,
     bbox_poly: Polygon | None,
+    vetting_enabled: bool,
 ) -> QuerySet[Recording]:
     if exclude_submitted and submitted_by_user is not None:
         qs = qs.exclude(pk__in=submitted_by_user)
 
-    tag_list = _split_tags(tags)
-    if tag_list:
-        for tag in tag_list:
-            qs = qs.filter(tags__text=tag)
-        qs = qs.distinct()
+    # One EXISTS per tag rather than joins, so rows are never duplicated (and can be grouped)
+    recording_tags = Recording.tags.through.objects.filter(recording_id=OuterRef("pk"))
+    for tag in _split_tags(tags):
+        qs = qs.filter(Exists(recording_tags.filter(recordingtag__text=tag)))
 
     if bbox_poly is not None:
-        qs = filter_recordings_by_map_bbox(qs, bbox_poly)
+        qs = filter_recordings_by_map_bbox(qs, bbox_poly, vetting_enabled=vetting_enabled)
 
     # Keep deterministic ordering even though we don't expose sorting params.
     return qs.order_by("-created")
@@ -135,43 +194,57 @@ def _parse_bbox(bbox: str | None) -> tuple[float, float, float, float] | None:
     return min_lon, min_lat, max_lon, max_lat
 
 
-def _get_recording_location_coords(recording: Recording) -> list[float] | None:
-    """Return `[lon, lat]` for `Recording.recording_location` if present."""
-    point = recording.recording_location
-    if not point:
-        return None
+def _vetting_enabled() -> bool:
+    config = Configuration.objects.first()
+    return bool(config.mark_annotations_completed_enabled) if config else False
 
-    # Prefer direct GEOS access instead of serializing geometry to JSON.
-    return [float(point.x), float(point.y)]
 
+def _map_recordings_queryset(
+    request: HttpRequest,
+    q: RecordingLocationsFilterSchema,
+    *,
+    vetting_enabled: bool,
+    bbox_poly: Polygon | None,
+) -> QuerySet[Recording]:
+    """Return the user's and shared recordings to show on the map, annotated with ``map_point``.
 
-def _precompute_grts_cell_centroids(
-    sample_frame_cell_id_pairs: set[tuple[int, int]],
-) -> dict[tuple[int, int], list[float]]:
-    """Precompute centroid `[lon, lat]` for each `(sample_frame_id, grts_cell_id)` pair."""
-    if not sample_frame_cell_id_pairs:
-        return {}
+    ``map_point`` is the recording's ``effective_location`` (its own location, falling
+    back to its GRTS cell centroid), or its ``vetting_location`` (the other way round)
+    when vetting is enabled. Recordings with neither are excluded.
+    """
+    has_spectrogram = Exists(Spectrogram.objects.filter(recording=OuterRef("pk")))
+    qs = Recording.objects.filter(Q(owner=request.user) | (Q(public=True) & has_spectrogram))
 
-    cell_ids = {cell_id for sample_frame_id, cell_id in sample_frame_cell_id_pairs}
-    sample_frame_ids = {sample_frame_id for sample_frame_id, cell_id in sample_frame_cell_id_pairs}
-    rows = (
-        GRTSCells.objects.filter(
-            grts_cell_id__in=cell_ids,
-            sample_frame_id__in=sample_frame_ids,
-            centroid_4326__isnull=False,
-        )
-        # DISTINCT ON columns must match the leading ORDER BY columns; `pk`
-        # breaks ties if duplicate (grts_cell_id, sample_frame_id) rows exist.
-        .order_by("grts_cell_id", "sample_frame_id", "pk")
-        .distinct("grts_cell_id", "sample_frame_id")
-        .values_list("sample_frame_id", "grts_cell_id", "centroid_4326")
+    exclude_submitted = bool(q.exclude_submitted)
+    submitted_by_user = None
+    if exclude_submitted:
+        submitted_by_user = RecordingAnnotation.objects.filter(
+            owner=request.user, submitted=True
+        ).values_list("recording_id", flat=True)
+    qs = _apply_recording_filters_and_sort(
+        qs=qs,
+        exclude_submitted=exclude_submitted,
+        submitted_by_user=submitted_by_user,
+        tags=q.tags,
+        bbox_poly=bbox_poly,
+        vetting_enabled=vetting_enabled,
     )
 
-    return {
-        (int(sample_frame_id), int(cell_id)): [float(centroid.x), float(centroid.y)]
-        for sample_frame_id, cell_id, centroid in rows
-        if centroid is not None
-    }
+    # Only show the GRTS cell centroid, not the direct recording location, when vetting
+    map_point = F("vetting_location" if vetting_enabled else "effective_location")
+    return qs.annotate(map_point=map_point).filter(map_point__isnull=False)
+
+
+def _tile_bbox(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """Return the lon/lat ``(min_lon, min_lat, max_lon, max_lat)`` of an XYZ web-mercator tile."""
+    n = 2**z
+    if not (0 <= z <= MAX_TILE_ZOOM and 0 <= x < n and 0 <= y < n):
+        raise HttpError(400, "Invalid tile coordinates")
+
+    def tile_lat(tile_y: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return x / n * 360.0 - 180.0, tile_lat(y + 1), (x + 1) / n * 360.0 - 180.0, tile_lat(y)
 
 
 @router.get("/", response=RecordingLocationsResponseSchema)
@@ -179,109 +252,127 @@ def get_recording_locations(
     request: HttpRequest,
     q: Query[RecordingLocationsQuerySchema],
 ):
-    config = Configuration.objects.first()
-    vetting_enabled = bool(config.mark_annotations_completed_enabled) if config else False
+    """Return the user's recordings, then shared recordings, as a GeoJSON FeatureCollection.
 
-    # Build "full" set: my + shared recordings.
-    my_qs = Recording.objects.filter(owner=request.user)
-    shared_qs = Recording.objects.filter(public=True).exclude(
-        Q(owner=request.user) | Q(spectrograms__isnull=True)
+    Each feature is serialized by the database and streamed out in batches, so the
+    collection is never held in memory as Python objects.
+    """
+    bbox = _parse_bbox(q.bbox)
+    bbox_poly = Polygon.from_bbox(bbox) if bbox is not None else None
+    features = (
+        _map_recordings_queryset(
+            request, q, vetting_enabled=_vetting_enabled(), bbox_poly=bbox_poly
+        )
+        .annotate(
+            is_shared=Case(
+                When(owner=request.user, then=Value(False)),
+                default=Value(True),
+                output_field=BooleanField(),
+            ),
+            feature=Cast(
+                JSONObject(
+                    type=Value("Feature"),
+                    geometry=Cast(AsGeoJSON("map_point"), output_field=JSONField()),
+                    properties=JSONObject(recording_id="id", filename="audio_file"),
+                ),
+                output_field=TextField(),
+            ),
+        )
+        .order_by("is_shared", "-created")
+        .values_list("feature", flat=True)
     )
 
-    exclude_submitted = bool(q.exclude_submitted)
-    submitted_by_user = None
-    if exclude_submitted:
-        submitted_by_user = RecordingAnnotation.objects.filter(
-            owner=request.user, submitted=True
-        ).values_list("recording_id", flat=True)
+    def stream():
+        yield b'{"type": "FeatureCollection", "features": ['
+        separator = ""
+        rows = features.iterator(chunk_size=FEATURE_BATCH_SIZE)
+        for batch in batched(rows, FEATURE_BATCH_SIZE, strict=False):
+            yield (separator + ", ".join(batch)).encode()
+            separator = ", "
+        yield b"]}"
 
-    bbox = _parse_bbox(q.bbox)
-    bbox_poly: Polygon | None = None
-    if bbox is not None:
-        bbox_poly = Polygon.from_bbox((bbox[0], bbox[1], bbox[2], bbox[3]))
+    return StreamingHttpResponse(stream(), content_type="application/json")
 
-    my_qs = _apply_recording_filters_and_sort(
-        qs=my_qs,
-        exclude_submitted=exclude_submitted,
-        submitted_by_user=submitted_by_user,
-        tags=q.tags,
-        bbox_poly=bbox_poly,
-    )
-    shared_qs = _apply_recording_filters_and_sort(
-        qs=shared_qs,
-        exclude_submitted=exclude_submitted,
-        submitted_by_user=submitted_by_user,
-        tags=q.tags,
-        bbox_poly=bbox_poly,
-    )
 
-    my_list = list(
-        my_qs.only(
-            "id",
-            "audio_file",
-            "recording_location",
-            "grts_cell_id",
-            "sample_frame_id",
-            "created",
+@router.get("/tiles/{z}/{x}/{y}.mvt")
+def get_recording_locations_tile(
+    request: HttpRequest,
+    z: int,
+    x: int,
+    y: int,
+    q: Query[RecordingLocationsFilterSchema],
+):
+    """Return recording locations in one map tile as a Mapbox Vector Tile.
+
+    The ``recordings`` layer has one point per recording with ``recording_id`` and
+    ``filename`` properties, placed with the same rules as ``get_recording_locations``.
+    Tiles may be cached privately; filters are part of the URL, so each user and
+    filter combination is cached separately.
+    """
+    bbox = _tile_bbox(z, x, y)
+    bbox_poly = Polygon.from_bbox(bbox)
+    # `bbox_poly` keeps the recordings whose `map_point` is in the tile
+    recordings = (
+        _map_recordings_queryset(
+            request, q, vetting_enabled=_vetting_enabled(), bbox_poly=bbox_poly
         )
+        .order_by()
+        .values("id", "audio_file", "map_point")
     )
-    shared_list = list(
-        shared_qs.only(
-            "id",
-            "audio_file",
-            "recording_location",
-            "grts_cell_id",
-            "sample_frame_id",
-            "created",
+    recordings_sql, recordings_params = recordings.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            RECORDING_LOCATIONS_TILE_SQL.format(recordings=recordings_sql),
+            [z, x, y, *recordings_params],
         )
-    )
-    recordings = my_list + shared_list
-
-    sample_frame_cell_id_pairs = {
-        (normalize_sample_frame_id(r.sample_frame_id), r.grts_cell_id)
-        for r in recordings
-        if r.grts_cell_id is not None
-    }
-    cell_centroids_by_sample_frame_id = _precompute_grts_cell_centroids(sample_frame_cell_id_pairs)
-
-    features: list[dict[str, Any]] = []
-    for rec in recordings:
-        coords: list[float] | None = None
-        sample_frame_for_grts = normalize_sample_frame_id(rec.sample_frame_id)
-
-        if vetting_enabled:
-            # When vetting is enabled, we only show the centroid of the
-            # GRTS cell and not the direct recording location.
-            if rec.grts_cell_id is not None and sample_frame_for_grts is not None:
-                coords = cell_centroids_by_sample_frame_id.get(
-                    (sample_frame_for_grts, rec.grts_cell_id)
-                )
-            # If we can't resolve a centroid, fall back to recording_location.
-            if coords is None:
-                coords = _get_recording_location_coords(rec)
-        else:
-            coords = _get_recording_location_coords(rec)
-            if (
-                coords is None
-                and rec.grts_cell_id is not None
-                and sample_frame_for_grts is not None
-            ):
-                coords = cell_centroids_by_sample_frame_id.get(
-                    (sample_frame_for_grts, rec.grts_cell_id)
-                )
-
-        if coords is None:
-            continue
-
-        features.append(
-            {
-                "type": "Feature",
-                "geometry": {"type": "Point", "coordinates": coords},
-                "properties": {
-                    "recording_id": rec.id,
-                    "filename": str(rec.audio_file),
-                },
-            }
+        (tile,) = cursor.fetchone()
+
+    response = HttpResponse(bytes(tile or b""), content_type="application/vnd.mapbox-vector-tile")
+    patch_cache_control(response, private=True, max_age=TILE_CACHE_SECONDS)
+    patch_vary_headers(response, ["Authorization", "Cookie"])
+    return response
+
+
+@router.get("/clusters", response=RecordingLocationClustersResponseSchema)
+def get_recording_location_clusters(
+    request: HttpRequest,
+    q: Query[RecordingLocationClustersQuerySchema],
+):
+    """Return recording locations aggregated into zoom-dependent grid clusters.
+
+    Recordings are placed as in ``get_recording_locations`` (so vetting mode clusters
+    GRTS cell centroids), snapped to a lon/lat grid and grouped in SQL. Each cluster is
+    a point at the centroid of its recordings with their ``count``.
+    """
+    bbox = _parse_bbox(q.bbox)
+    bbox_poly = Polygon.from_bbox(bbox) if bbox is not None else None
+    grid_size = 360.0 / (2**q.zoom * CLUSTER_CELLS_PER_TILE)
+    clusters = (
+        _map_recordings_queryset(
+            request, q, vetting_enabled=_vetting_enabled(), bbox_poly=bbox_poly
         )
+        .order_by()
+        .annotate(cluster_cell=SnapToGrid("map_point", grid_size))
+        .values("cluster_cell")
+        .annotate(
+            count=Count("pk"),
+            center=Centroid(Collect("map_point")),
+            first_recording_id=Min("pk"),
+        )
+    )
 
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {
+                "type": "Point",
+                "coordinates": [cluster["center"].x, cluster["center"].y],
+            },
+            "properties": {
+                "count": cluster["count"],
+                "recording_id": cluster["first_recording_id"] if cluster["count"] == 1 else None,
+            },
+        }
+        for cluster in clusters
+    ]
     return {"type": "FeatureCollection", "features": features}
@@ -14,7 +14,7 @@ from django.shortcuts import get_object_or_404
 from ninja import Query, Router, Schema
 
 from bats_ai.core.constants import DEFAULT_SAMPLE_FRAME_ID
-from bats_ai.core.models import GRTSCells, Recording, Species, SpeciesRange
+from bats_ai.core.models import GRTSCells, Recording, Species, SpeciesRangeCell
 from bats_ai.core.utils.grts_utils import normalize_sample_frame_id
 
 if TYPE_CHECKING:
@@ -61,37 +61,26 @@ def get_species(
             else DEFAULT_SAMPLE_FRAME_ID
         )
 
-    null_in_range = Value(None, output_field=BooleanField(null=True))
-
     if grts_cell_id is None:
-        qs = Species.objects.annotate(
-            in_range=null_in_range,
-        )
+        in_range = Value(None, output_field=BooleanField(null=True))
     else:
-        cell_geom = (
-            GRTSCells.objects.filter(
-                grts_cell_id=grts_cell_id,
-                sample_frame_id=sample_frame_id,
-            )
-            .exclude(geom_4326__isnull=True)
-            .values_list("geom_4326", flat=True)
-            .first()
+        # Precomputed by `rebuild_species_range_cells`; None when the cell is unknown
+        cell_exists = GRTSCells.objects.filter(
+            grts_cell_id=grts_cell_id,
+            sample_frame_id=sample_frame_id,
+            geom_4326__isnull=False,
+        )
+        cell_in_range = SpeciesRangeCell.objects.filter(
+            species_id=OuterRef("id"),
+            grts_cell_id=grts_cell_id,
+            sample_frame_id=sample_frame_id,
+        )
+        in_range = Case(
+            When(~Exists(cell_exists), then=Value(None)),
+            When(Exists(cell_in_range), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(null=True),
         )
-        if cell_geom is None:
-            qs = Species.objects.annotate(
-                in_range=null_in_range,
-            )
-        else:
-            overlaps_cell = SpeciesRange.objects.filter(
-                species_id=OuterRef("id"),
-                geom__intersects=cell_geom,
-            )
-            qs = Species.objects.annotate(
-                in_range=Case(
-                    When(Exists(overlaps_cell), then=Value(True)),
-                    default=False,
-                    output_field=BooleanField(null=True),
-                ),
-            )
+    qs = Species.objects.annotate(in_range=in_range)
 
     return qs.order_by("species_code")
@@ -84,6 +84,13 @@ DATABASES = {
 }
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Per-process by default. Deployments with more than one process must set DJANGO_CACHE_URL
+# to a Redis URL (the production compose files run a "redis" service): signed storage URLs
+# are only identical across processes, and so cacheable by browsers, when shared through it.
+CACHES = {
+    "default": env.cache_url("DJANGO_CACHE_URL", default="locmemcache://"),
+}
+
 STORAGES: dict[str, dict[str, Any]] = {
     # Inject the "default" storage in particular run configurations
     "staticfiles": {
@@ -115,6 +122,24 @@ BATAI_USE_ORIGINAL_SR_SPECTROGRAMS: bool = env.bool(
     "DJANGO_BATAI_USE_ORIGINAL_SR_SPECTROGRAMS", default=True
 )
 
+# DJANGO_BATAI_STORAGE_URL_EXPIRY_SECONDS: signature lifetime of storage URLs, for backends
+# that don't expose one (S3Storage uses its own "querystring_expire"). Generated URLs are
+# cached and reused for slightly less than this.
+BATAI_STORAGE_URL_EXPIRY_SECONDS: int = env.int(
+    "DJANGO_BATAI_STORAGE_URL_EXPIRY_SECONDS", default=3600
+)
+
+# DJANGO_BATAI_TOKEN_AUTH_CACHE_SECONDS: how long a resolved API bearer token is kept in
+# the cache. Entries are invalidated when the token is revoked or its user changes. Only
+# used with a shared DJANGO_CACHE_URL; per-process caches keep tokens for a few seconds.
+BATAI_TOKEN_AUTH_CACHE_SECONDS: int = env.int("DJANGO_BATAI_TOKEN_AUTH_CACHE_SECONDS", default=300)
+
+# DJANGO_BATAI_ANNOTATION_TOMBSTONE_RETENTION_DAYS: how long records of deleted annotations
+# are kept for incremental exports. Exports with an older watermark report them as incomplete.
+BATAI_ANNOTATION_TOMBSTONE_RETENTION_DAYS: int = env.int(
+    "DJANGO_BATAI_ANNOTATION_TOMBSTONE_RETENTION_DAYS", default=90
+)
+
 # Django's docs suggest that STATIC_URL should be a relative path,
 # for convenience serving a site on a subpath.
 STATIC_URL = "static/"
@@ -136,9 +161,13 @@ CELERY_RESULT_BACKEND = "django-db"
 
 CELERY_BEAT_SCHEDULE = {
     "delete-expired-files-daily": {
-        "task": "bats_ai.tasks.periodic.delete_expired_exported_files",
+        "task": "bats_ai.core.tasks.periodic.delete_expired_exported_files",
         "schedule": 86400,  # every 24 hours (in seconds)
     },
+    "delete-old-annotation-tombstones-daily": {
+        "task": "bats_ai.core.tasks.periodic.delete_old_annotation_tombstones",
+        "schedule": 86400,
+    },
 }
 
 GDAL_LIBRARY_PATH = osgeo.GDAL_LIBRARY_PATH
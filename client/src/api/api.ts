@@ -753,10 +753,14 @@ async function getGuanoMetadata(file: File): Promise<GuanoMetadata> {
 
 export interface ExportStatus {
   id: number;
-  status: "pending" | "complete" | "failed";
+  status: "pending" | "complete" | "failed" | "cancelled";
   downloadUrl?: string;
   created: string;
   expiresAt: string;
+  rowsExported: number;
+  rowsTotal: number | null;
+  percentComplete: number | null;
+  cancelRequested: boolean;
 }
 
 export interface ExportTagSummaryResponse {
@@ -770,6 +774,13 @@ async function getExportStatus(exportId: number) {
   return result.data;
 }
 
+async function cancelExport(exportId: number) {
+  const result = await axiosInstance.post<ExportStatus>(
+    `/export-annotation/${exportId}/cancel`,
+  );
+  return result.data;
+}
+
 async function exportTagSummary(): Promise<ExportTagSummaryResponse> {
   const result = await axiosInstance.post<ExportTagSummaryResponse>(
     "/configuration/export-tag-summary",
@@ -784,6 +795,13 @@ async function exportRecordingAnnotations(): Promise<ExportTagSummaryResponse> {
   return result.data;
 }
 
+async function exportPulseFeatures(): Promise<ExportTagSummaryResponse> {
+  const result = await axiosInstance.post<ExportTagSummaryResponse>(
+    "/configuration/export-pulse-features",
+  );
+  return result.data;
+}
+
 export interface VettingDetails {
   id: number;
   user_id: number;
@@ -907,8 +925,10 @@ export {
   getFilteredProcessingTasks,
   getFileAnnotationDetails,
   getExportStatus,
+  cancelExport,
   exportTagSummary,
   exportRecordingAnnotations,
+  exportPulseFeatures,
   getRecordingTags,
   getUnsubmittedNeighbors,
   getComputedPulseContour,